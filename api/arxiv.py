@@ -1,11 +1,22 @@
-import urllib.request
 import urllib.parse
+import logging
 import xml.etree.ElementTree as ET
 import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from config import settings
+from utils.deadline import cap_timeout
+from api.http_pool import get_http_session
+
+logger = logging.getLogger('arxiv')
 
 # https://info.arxiv.org/help/api/user-manual.html
 
-def query_arxiv(keywords, start=0, max_results=10):
+def query_arxiv(keywords, start=0, max_results=10, timeout=30):
     """
     Query the arXiv API with the given parameters and return results in JSON format.
     
@@ -13,6 +24,7 @@ def query_arxiv(keywords, start=0, max_results=10):
         keywords (list): List of keyword phrases to search for
         start (int): Starting index of results
         max_results (int): Maximum number of results to return
+        timeout (float): HTTP timeout in seconds, capped by the request deadline
     
     Returns:
         dict: JSON formatted results
@@ -28,13 +40,14 @@ def query_arxiv(keywords, start=0, max_results=10):
     search_query = "+".join(search_parts)
     
     # Construct the API URL with relevance sorting
-    url = f'http://export.arxiv.org/api/query?search_query={search_query}&sortBy=relevance&start={start}&max_results={max_results}'
+    url = f'{settings.ARXIV_API_URL}?search_query={search_query}&sortBy=relevance&start={start}&max_results={max_results}'
     
-    print(url)
+    logger.debug(f"arXiv查询: {url}")
     
     # Make the request
-    with urllib.request.urlopen(url) as response:
-        data = response.read().decode('utf-8')
+    response = get_http_session().get(url, timeout=cap_timeout(timeout, "arXiv"))
+    response.raise_for_status()
+    data = response.content.decode('utf-8')
     
     # Parse the XML response
     root = ET.fromstring(data)
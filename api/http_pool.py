@@ -0,0 +1,55 @@
+import time
+import threading
+from typing import Any, Optional
+
+from config import settings
+from utils.lazy_import import load_module
+
+# ================================ 上游HTTP连接池 ================================
+
+_session: Optional[Any] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> Any:
+    """
+    获取全局HTTP会话（requests.Session）
+
+    SiliconFlow、Serper、arXiv 的请求共用该会话，同一主机的连接保持复用，
+    省去每次调用的DNS解析和TLS握手；每个主机最多保留 HTTP_POOL_SIZE 个连接。
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                requests = load_module("requests")
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_SIZE,
+                    pool_maxsize=settings.HTTP_POOL_SIZE
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def preconnect(url: str, timeout: float) -> float:
+    """
+    向上游发送一次HEAD请求，让连接留在连接池中
+
+    上游返回任何HTTP状态码都视为连接成功（只关心DNS、TCP和TLS是否完成）。
+
+    Args:
+        url (str): 上游地址
+        timeout (float): 超时时间（秒）
+
+    Returns:
+        float: 建立连接并收到响应的耗时（秒）
+
+    Raises:
+        requests.RequestException: 无法连接
+    """
+    start = time.perf_counter()
+    get_http_session().head(url, timeout=timeout, allow_redirects=False).close()
+    return time.perf_counter() - start
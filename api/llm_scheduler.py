@@ -0,0 +1,192 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from config import settings
+from config.api_config import TASK_LONG_GENERATE
+from utils.deadline import DeadlineExceeded, remaining_time
+from utils.metrics import metrics
+
+logger = logging.getLogger('llm_scheduler')
+
+# 未声明任务类别的调用按长文本生成调度（与 get_model_tier 的默认分级一致）
+DEFAULT_TASK_CLASS = TASK_LONG_GENERATE
+
+
+class _Waiter:
+    """排队中的一次调用"""
+
+    __slots__ = ("task_class", "tag", "enqueued_at", "granted")
+
+    def __init__(self, task_class: str, tag: float):
+        self.task_class = task_class
+        self.tag = tag
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class _ProviderQueue:
+    """单个提供商的并发槽位和按任务类别划分的等待队列"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.in_flight = 0
+        self.in_flight_by_class: Dict[str, int] = {}
+        self.queues: Dict[str, Deque[_Waiter]] = {}
+        # 加权公平队列的虚拟时间，以及各类别最后一个排队调用的完成标记
+        self.virtual_time = 0.0
+        self.last_tag: Dict[str, float] = {}
+
+
+class LLMScheduler:
+    """
+    大模型调用调度器
+
+    每个提供商有固定数量的并发槽位，超出的调用按任务类别分别排队；
+    槽位空出时在各类别队首中按加权公平队列（WFQ）的完成标记选出下一个调用，
+    权重高的类别（如关键词提取）获得更大的份额，不会被长文本生成长期阻塞。
+    另外保留少量槽位只给非长文本类别使用，即使长文本生成占满提供商，短调用也无需等待长调用结束。
+    """
+
+    def __init__(
+        self,
+        default_slots: int,
+        slot_overrides: Optional[Dict[str, int]] = None,
+        class_weights: Optional[Dict[str, float]] = None,
+        reserved_slots: int = 0
+    ):
+        self.default_slots = max(1, default_slots)
+        self.slot_overrides = slot_overrides or {}
+        self.class_weights = class_weights or {}
+        self.reserved_slots = reserved_slots
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._providers: Dict[str, _ProviderQueue] = {}
+
+    def _provider(self, provider: str) -> _ProviderQueue:
+        state = self._providers.get(provider)
+        if state is None:
+            state = self._providers[provider] = _ProviderQueue(max(1, self.slot_overrides.get(provider, self.default_slots)))
+        return state
+
+    def _weight(self, task_class: str) -> float:
+        return max(self.class_weights.get(task_class, 1.0), 1e-6)
+
+    def _may_use_slot(self, state: _ProviderQueue, task_class: str) -> bool:
+        """长文本类别不能占用保留槽位"""
+        free = state.slots - state.in_flight
+        if task_class == TASK_LONG_GENERATE:
+            return free > min(self.reserved_slots, state.slots - 1)
+        return free > 0
+
+    def _dispatch(self, state: _ProviderQueue):
+        """把空闲槽位分配给完成标记最小的可运行调用"""
+        while True:
+            candidates = [
+                queue[0] for task_class, queue in state.queues.items()
+                if queue and self._may_use_slot(state, task_class)
+            ]
+            if not candidates:
+                return
+            waiter = min(candidates, key=lambda w: w.tag)
+            state.queues[waiter.task_class].popleft()
+            state.virtual_time = max(state.virtual_time, waiter.tag)
+            self._grant(state, waiter)
+
+    @staticmethod
+    def _grant(state: _ProviderQueue, waiter: _Waiter):
+        waiter.granted = True
+        state.in_flight += 1
+        state.in_flight_by_class[waiter.task_class] = state.in_flight_by_class.get(waiter.task_class, 0) + 1
+
+    def acquire(self, provider: str, task_class: Optional[str] = None) -> str:
+        """
+        获取提供商的一个槽位，等待时间受请求截止时间限制
+
+        Args:
+            provider (str): 提供商
+            task_class (Optional[str]): 任务类别 extract/short_generate/long_generate
+
+        Returns:
+            str: 实际使用的任务类别（释放槽位时传回）
+
+        Raises:
+            DeadlineExceeded: 截止时间前没有等到槽位
+        """
+        task_class = task_class or DEFAULT_TASK_CLASS
+        with self._condition:
+            state = self._provider(provider)
+            # 完成标记：从虚拟时间与本类别上一个标记中的较大者开始，按 1/权重 推进
+            tag = max(state.virtual_time, state.last_tag.get(task_class, 0.0)) + 1.0 / self._weight(task_class)
+            state.last_tag[task_class] = tag
+            waiter = _Waiter(task_class, tag)
+            state.queues.setdefault(task_class, deque()).append(waiter)
+            self._dispatch(state)
+            while not waiter.granted:
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    state.queues[task_class].remove(waiter)
+                    metrics.increment("llm_queue_timeouts", {"provider": provider, "task": task_class})
+                    raise DeadlineExceeded(f"等待 {provider} 调用槽位超时")
+                self._condition.wait(remaining)
+
+        wait = time.monotonic() - waiter.enqueued_at
+        metrics.observe("llm_queue_wait_seconds", wait, {"provider": provider, "task": task_class})
+        if wait > 1:
+            logger.info(f"{provider} {task_class} 调用排队 {wait:.1f} 秒")
+        return task_class
+
+    def release(self, provider: str, task_class: str):
+        with self._condition:
+            state = self._provider(provider)
+            state.in_flight -= 1
+            state.in_flight_by_class[task_class] -= 1
+            self._dispatch(state)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, provider: str, task_class: Optional[str] = None) -> Iterator[None]:
+        """在槽位内执行一次调用，调度器关闭时直接执行"""
+        if not settings.LLM_SCHEDULER_ENABLED:
+            yield
+            return
+        task_class = self.acquire(provider, task_class)
+        try:
+            yield
+        finally:
+            self.release(provider, task_class)
+
+    def stats(self) -> Dict[str, Any]:
+        """各提供商的槽位占用和排队情况"""
+        with self._lock:
+            return {
+                provider: {
+                    "slots": state.slots,
+                    "in_flight": state.in_flight,
+                    "in_flight_by_class": {k: v for k, v in state.in_flight_by_class.items() if v},
+                    "waiting_by_class": {k: len(q) for k, q in state.queues.items() if q},
+                }
+                for provider, state in self._providers.items()
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """获取全局大模型调用调度器"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    settings.LLM_PROVIDER_SLOTS,
+                    settings.LLM_PROVIDER_SLOT_OVERRIDES,
+                    settings.LLM_CLASS_WEIGHTS,
+                    settings.LLM_RESERVED_SLOTS
+                )
+    return _scheduler
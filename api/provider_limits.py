@@ -0,0 +1,245 @@
+import os
+import time
+import uuid
+import random
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from config import settings
+from utils.deadline import DeadlineExceeded, remaining_time
+from utils.metrics import metrics
+from utils.resilience import is_rate_limited
+
+logger = logging.getLogger('provider_limits')
+
+# 配额的统计窗口（秒）
+QUOTA_WINDOW_SECONDS = 60
+
+# 许可在调用超时之外额外保留的秒数；持有进程崩溃时许可最迟在到期后被回收
+LEASE_MARGIN_SECONDS = 30
+
+# 没有明确等待时间（如并发已满）时的轮询间隔（秒）
+POLL_INTERVAL = 0.2
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProviderLease:
+    """一次调用持有的许可；调用结束后可把 tokens 更新为实际用量"""
+
+    __slots__ = ("lease_id", "provider", "tokens")
+
+    def __init__(self, lease_id: Optional[str], provider: str, tokens: int):
+        self.lease_id = lease_id
+        self.provider = provider
+        self.tokens = tokens
+
+
+class ProviderLimiter:
+    """
+    跨进程的提供商并发和配额限制
+
+    同一主机的所有工作进程共用一个SQLite数据库：
+    leases 表记录正在进行的调用（限制并发），usage 表记录最近一分钟的请求和token（限制RPM/TPM），
+    cooldowns 表记录上游返回429后的暂停时间。获取许可在 BEGIN IMMEDIATE 事务中完成检查和写入，
+    许可不足时调用方在本地等待，而不是把请求发给上游再被限流。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default_concurrency: int,
+        concurrency: Optional[Dict[str, int]] = None,
+        rpm: Optional[Dict[str, int]] = None,
+        tpm: Optional[Dict[str, int]] = None
+    ):
+        self.path = path
+        self.default_concurrency = max(1, default_concurrency)
+        self.concurrency = concurrency or {}
+        self.rpm = rpm or {}
+        self.tpm = tpm or {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "lease_id TEXT PRIMARY KEY, provider TEXT NOT NULL, pid INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                "lease_id TEXT PRIMARY KEY, provider TEXT NOT NULL, created_at REAL NOT NULL, tokens INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS usage_provider ON usage (provider, created_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cooldowns (provider TEXT PRIMARY KEY, until REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        """打开连接（自动提交模式，事务由调用方显式开启），用完关闭"""
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _remove_dead_leases(self, conn: sqlite3.Connection, provider: str):
+        """回收已退出进程留下的许可"""
+        pids = [row[0] for row in conn.execute("SELECT DISTINCT pid FROM leases WHERE provider = ?", (provider,))]
+        for pid in pids:
+            if pid != os.getpid() and not _pid_alive(pid):
+                conn.execute("DELETE FROM leases WHERE pid = ?", (pid,))
+
+    def try_acquire(self, provider: str, tokens: int, lease_seconds: float) -> Tuple[Optional[str], float]:
+        """
+        尝试获取一个许可
+
+        Args:
+            provider (str): 提供商
+            tokens (int): 本次调用预计使用的token数
+            lease_seconds (float): 许可有效期（秒）
+
+        Returns:
+            Tuple[Optional[str], float]: (许可ID, 0)；不能获取时为 (None, 建议等待秒数)
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+                conn.execute("DELETE FROM usage WHERE created_at < ?", (now - QUOTA_WINDOW_SECONDS,))
+
+                row = conn.execute("SELECT until FROM cooldowns WHERE provider = ?", (provider,)).fetchone()
+                if row and row[0] > now:
+                    return None, row[0] - now
+
+                limit = self.concurrency.get(provider, self.default_concurrency)
+                count_sql = "SELECT COUNT(*) FROM leases WHERE provider = ?"
+                if conn.execute(count_sql, (provider,)).fetchone()[0] >= limit:
+                    self._remove_dead_leases(conn, provider)
+                    if conn.execute(count_sql, (provider,)).fetchone()[0] >= limit:
+                        return None, POLL_INTERVAL
+
+                rpm, tpm = self.rpm.get(provider), self.tpm.get(provider)
+                if rpm or tpm:
+                    requests, used_tokens, oldest = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(created_at) FROM usage WHERE provider = ?",
+                        (provider,)
+                    ).fetchone()
+                    # 单次调用超过整个TPM配额时，窗口为空即放行，避免永远等待
+                    if (rpm and requests + 1 > rpm) or (tpm and requests and used_tokens + tokens > tpm):
+                        return None, max(oldest + QUOTA_WINDOW_SECONDS - now, 0.01)
+
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO leases (lease_id, provider, pid, expires_at) VALUES (?, ?, ?, ?)",
+                    (lease_id, provider, os.getpid(), now + lease_seconds)
+                )
+                conn.execute(
+                    "INSERT INTO usage (lease_id, provider, created_at, tokens) VALUES (?, ?, ?, ?)",
+                    (lease_id, provider, now, tokens)
+                )
+                return lease_id, 0
+            finally:
+                conn.execute("COMMIT")
+
+    def acquire(self, provider: str, tokens: int, lease_seconds: float) -> str:
+        """
+        获取许可，不足时等待，等待时间受请求截止时间限制
+
+        Raises:
+            DeadlineExceeded: 截止时间前没有获取到许可
+        """
+        start = time.monotonic()
+        while True:
+            lease_id, wait = self.try_acquire(provider, tokens, lease_seconds)
+            if lease_id is not None:
+                break
+            remaining = remaining_time()
+            if remaining is not None and remaining <= wait:
+                metrics.increment("provider_limit_timeouts", {"provider": provider})
+                raise DeadlineExceeded(f"等待 {provider} 并发/配额许可超时")
+            # 多个进程同时等待时加入抖动，避免同时醒来争抢
+            time.sleep(wait + random.uniform(0, POLL_INTERVAL / 2))
+
+        waited = time.monotonic() - start
+        metrics.observe("provider_limit_wait_seconds", waited, {"provider": provider})
+        if waited > 1:
+            logger.info(f"{provider} 等待并发/配额许可 {waited:.1f} 秒")
+        return lease_id
+
+    def release(self, provider: str, lease_id: str, tokens: Optional[int] = None):
+        """释放许可；提供 tokens 时把配额用量更新为实际值"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE lease_id = ?", (lease_id,))
+            if tokens is not None:
+                conn.execute("UPDATE usage SET tokens = ? WHERE lease_id = ?", (tokens, lease_id))
+
+    def penalize(self, provider: str, seconds: float):
+        """上游限流后让所有进程暂停调用该提供商"""
+        until = time.time() + seconds
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO cooldowns (provider, until) VALUES (?, ?) "
+                "ON CONFLICT(provider) DO UPDATE SET until = MAX(until, excluded.until)",
+                (provider, until)
+            )
+        metrics.increment("provider_rate_limited", {"provider": provider})
+        logger.warning(f"{provider} 返回限流，所有工作进程暂停 {seconds:.0f} 秒")
+
+    @contextmanager
+    def lease(self, provider: str, tokens: int, timeout: float) -> Iterator[ProviderLease]:
+        """
+        在许可内执行一次调用；调用抛出限流错误时暂停该提供商
+
+        Args:
+            provider (str): 提供商
+            tokens (int): 预计token数，调用方可在结束前把 lease.tokens 改为实际用量
+            timeout (float): 调用超时（秒），决定许可有效期
+        """
+        if not settings.PROVIDER_LIMITS_ENABLED:
+            yield ProviderLease(None, provider, tokens)
+            return
+        lease = ProviderLease(self.acquire(provider, tokens, timeout + LEASE_MARGIN_SECONDS), provider, tokens)
+        try:
+            yield lease
+        except Exception as e:
+            if is_rate_limited(e):
+                self.penalize(provider, settings.PROVIDER_RATE_LIMIT_COOLDOWN)
+            raise
+        finally:
+            try:
+                self.release(provider, lease.lease_id, lease.tokens)
+            except Exception as e:
+                # 释放失败时许可会在到期后自动回收
+                logger.warning(f"释放 {provider} 许可失败: {str(e)}")
+
+
+_limiter: Optional[ProviderLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_provider_limiter() -> ProviderLimiter:
+    """获取全局提供商限流器"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = ProviderLimiter(
+                    settings.PROVIDER_LIMITS_PATH,
+                    settings.PROVIDER_MAX_CONCURRENCY,
+                    settings.PROVIDER_CONCURRENCY_OVERRIDES,
+                    settings.PROVIDER_RPM,
+                    settings.PROVIDER_TPM
+                )
+    return _limiter
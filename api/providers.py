@@ -0,0 +1,77 @@
+import os
+from types import ModuleType
+from typing import Dict, List, Optional
+
+from utils.lazy_import import load_module
+
+# ================================ 模型提供商注册表 ================================
+
+
+class ProviderSpec:
+    """
+    模型提供商插件
+
+    Args:
+        name (str): 提供商标识，对应 SimpleAPIClient 的 call_<name>/stream_<name> 方法
+        display_name (str): 日志中显示的名称
+        api_key_env (str): API密钥所在的环境变量，未设置时该提供商不参与自动备用
+        sdk_module (Optional[str]): SDK模块名，首次调用时才导入；直接走HTTP的提供商为None
+    """
+
+    __slots__ = ("name", "display_name", "api_key_env", "sdk_module")
+
+    def __init__(self, name: str, display_name: str, api_key_env: str, sdk_module: Optional[str] = None):
+        self.name = name
+        self.display_name = display_name
+        self.api_key_env = api_key_env
+        self.sdk_module = sdk_module
+
+
+_providers: Dict[str, ProviderSpec] = {}
+
+
+def register_provider(spec: ProviderSpec):
+    """注册（或替换）一个提供商"""
+    _providers[spec.name] = spec
+
+
+for _spec in (
+    ProviderSpec("gemini", "Gemini", "GEMINI_API_KEY", "google.generativeai"),
+    ProviderSpec("openai", "OpenAI", "OPENAI_API_KEY", "openai"),
+    ProviderSpec("siliconflow", "SiliconFlow", "SILICONFLOW_API_KEY"),
+    ProviderSpec("qwen", "Qwen", "ALI_BAILIAN_API_KEY", "dashscope"),
+    ProviderSpec("claude", "Claude", "CLAUDE_API_KEY", "anthropic"),
+):
+    register_provider(_spec)
+
+
+def get_provider(name: str) -> Optional[ProviderSpec]:
+    return _providers.get(name)
+
+
+def provider_names() -> List[str]:
+    return list(_providers)
+
+
+def get_api_key(name: str) -> Optional[str]:
+    spec = _providers.get(name)
+    return os.getenv(spec.api_key_env) if spec else None
+
+
+def is_configured(name: str) -> bool:
+    """提供商已注册且设置了API密钥"""
+    return bool(get_api_key(name))
+
+
+def load_sdk(name: str) -> ModuleType:
+    """
+    获取提供商的SDK模块，首次使用时导入
+
+    Raises:
+        ImportError: SDK未安装
+        KeyError: 提供商未注册或不需要SDK
+    """
+    spec = _providers.get(name)
+    if spec is None or spec.sdk_module is None:
+        raise KeyError(name)
+    return load_module(spec.sdk_module)
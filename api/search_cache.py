@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+import unicodedata
+import concurrent.futures
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from config import settings
+from utils.deadline import DeadlineExceeded, remaining_time
+from utils.metrics import metrics
+
+logger = logging.getLogger('search_cache')
+
+# ================================ 查询归一化 ================================
+
+
+def normalize_query(text: str) -> str:
+    """
+    归一化搜索词：全角转半角（NFKC）、大小写折叠、去除标点符号、合并空白
+
+    Args:
+        text (str): 原始搜索词
+
+    Returns:
+        str: 归一化后的搜索词
+    """
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    text = ''.join(
+        ' ' if unicodedata.category(char)[0] in ('P', 'S') else char
+        for char in text
+    )
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def normalize_keyword_group(keywords: Iterable[str]) -> Tuple[str, ...]:
+    """归一化arXiv关键词组：逐个归一化后去重排序，与顺序无关"""
+    return tuple(sorted({normalize_query(k) for k in keywords if normalize_query(k)}))
+
+
+# ================================ 缓存 ================================
+
+
+class SearchCache:
+    """
+    持久化的搜索结果缓存
+
+    结果以zlib压缩的JSON存入SQLite，按来源设置不同TTL。
+    过期后的 stale 窗口内先返回旧结果，同时在后台刷新（stale-while-revalidate）。
+    """
+
+    def __init__(self, path: str, ttls: Dict[str, float], stale_seconds: float):
+        self.path = path
+        self.ttls = ttls
+        self.stale_seconds = stale_seconds
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "cache_key TEXT PRIMARY KEY, source TEXT NOT NULL, "
+                "value BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """打开连接，事务结束后提交并关闭"""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(source: str, query: Any) -> str:
+        return f"{source}:{json.dumps(query, ensure_ascii=False, sort_keys=True)}"
+
+    def get(self, cache_key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """读取缓存，返回 (结果, 写入时间)，不存在时返回 (None, None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM search_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(zlib.decompress(row[0]).decode('utf-8')), row[1]
+
+    def set(self, cache_key: str, source: str, value: Any):
+        """写入缓存"""
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (cache_key, source, value, created_at) VALUES (?, ?, ?, ?)",
+                (cache_key, source, blob, time.time())
+            )
+
+    def purge_expired(self) -> int:
+        """删除超过 TTL + stale 窗口的记录，返回删除条数"""
+        now = time.time()
+        removed = 0
+        with self._lock, self._connect() as conn:
+            for source, ttl in self.ttls.items():
+                cursor = conn.execute(
+                    "DELETE FROM search_cache WHERE source = ? AND created_at < ?",
+                    (source, now - ttl - self.stale_seconds)
+                )
+                removed += cursor.rowcount
+        return removed
+
+    def warm(self) -> int:
+        """清理过期记录后顺序读取一遍缓存，把数据页载入操作系统页缓存，返回缓存条数"""
+        self.purge_expired()
+        count = 0
+        with self._connect() as conn:
+            for _ in conn.execute("SELECT value FROM search_cache"):
+                count += 1
+        return count
+
+    def get_or_fetch(
+        self,
+        source: str,
+        query: Any,
+        fetch: Callable[[], Any],
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        优先返回缓存结果，未命中时调用 fetch 并写入缓存
+
+        Args:
+            source (str): 来源，如 tavily/serper/arxiv，决定TTL
+            query (Any): 已归一化的查询（可JSON序列化）
+            fetch (Callable): 实际请求函数
+            should_cache (Optional[Callable]): 判断结果是否可缓存，默认缓存非空结果
+
+        Returns:
+            Any: 搜索结果
+        """
+        should_cache = should_cache or bool
+        cache_key = self.make_key(source, query)
+        ttl = self.ttls.get(source, 0)
+
+        try:
+            value, created_at = self.get(cache_key)
+        except Exception as e:
+            logger.warning(f"读取搜索缓存失败: {str(e)}")
+            value, created_at = None, None
+
+        if created_at is not None:
+            age = time.time() - created_at
+            if age < ttl:
+                metrics.increment("search_cache", {"source": source, "result": "hit"})
+                return value
+            if age < ttl + self.stale_seconds:
+                metrics.increment("search_cache", {"source": source, "result": "stale"})
+                self._refresh_in_background(source, cache_key, fetch, should_cache)
+                return value
+
+        metrics.increment("search_cache", {"source": source, "result": "miss"})
+        value = fetch()
+        self._store(source, cache_key, value, should_cache)
+        return value
+
+    def _store(self, source: str, cache_key: str, value: Any, should_cache: Callable[[Any], bool]):
+        if not should_cache(value):
+            return
+        try:
+            self.set(cache_key, source, value)
+        except Exception as e:
+            logger.warning(f"写入搜索缓存失败: {str(e)}")
+
+    def _refresh_in_background(self, source: str, cache_key: str, fetch: Callable[[], Any], should_cache):
+        """后台刷新过期结果，同一个键同时只刷新一次"""
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        def refresh():
+            try:
+                self._store(source, cache_key, fetch(), should_cache)
+            except Exception as e:
+                logger.warning(f"后台刷新搜索缓存失败 {cache_key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        # 新线程不继承请求上下文，刷新不受当前请求截止时间约束
+        threading.Thread(target=refresh, name="search-cache-refresh", daemon=True).start()
+
+
+# ================================ 合并并发请求 ================================
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求
+
+    同一个键同时只执行一次，其余调用等待并共享结果（批量生成时多个条目常常同时搜索同一个关键词）。
+    等待方受自己的截止时间约束。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = concurrent.futures.Future()
+
+        if not leader:
+            metrics.increment("search_singleflight_shared")
+            try:
+                return future.result(timeout=remaining_time())
+            except concurrent.futures.TimeoutError:
+                raise DeadlineExceeded(f"等待相同搜索请求结果时超过截止时间: {key}")
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+_single_flight = SingleFlight()
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """获取全局搜索缓存，未启用时返回None"""
+    global _search_cache
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(
+                    settings.SEARCH_CACHE_PATH,
+                    {
+                        "tavily": settings.SEARCH_CACHE_TTL_TAVILY,
+                        "serper": settings.SEARCH_CACHE_TTL_SERPER,
+                        "arxiv": settings.SEARCH_CACHE_TTL_ARXIV,
+                    },
+                    settings.SEARCH_CACHE_STALE_SECONDS
+                )
+    return _search_cache
+
+
+def cached_search(
+    source: str,
+    query: Any,
+    fetch: Callable[[], Any],
+    should_cache: Optional[Callable[[Any], bool]] = None
+) -> Any:
+    """
+    带缓存的搜索调用，缓存未启用或不可用时直接调用 fetch；并发的相同查询只请求一次
+
+    Args:
+        source (str): 来源 tavily/serper/arxiv
+        query (Any): 已归一化的查询
+        fetch (Callable): 实际请求函数
+        should_cache (Optional[Callable]): 判断结果是否可缓存
+
+    Returns:
+        Any: 搜索结果
+    """
+    try:
+        cache = get_search_cache()
+    except Exception as e:
+        logger.warning(f"搜索缓存不可用: {str(e)}")
+        cache = None
+    if cache is None:
+        return _single_flight.do(SearchCache.make_key(source, query), fetch)
+    return _single_flight.do(
+        SearchCache.make_key(source, query),
+        lambda: cache.get_or_fetch(source, query, fetch, should_cache)
+    )
@@ -1,4 +1,3 @@
-import http.client
 import json
 import os
 import sys
@@ -10,11 +9,14 @@ sys.path.append(str(project_root))
 # 从环境变量获取API密钥
 serper_api_key = os.getenv('SERPER_API_KEY')
 
-def query_singleWebsite(url, includeMarkdown=True):
+from config import settings
+from utils.deadline import cap_timeout
+from api.http_pool import get_http_session
+
+def query_singleWebsite(url, includeMarkdown=True, timeout=30):
         """
-        输入url
+        输入url，超时时间受请求截止时间约束
         """
-        conn = http.client.HTTPSConnection("scrape.serper.dev")
         payload = json.dumps({
         "url": url,
         "includeMarkdown": includeMarkdown
@@ -23,10 +25,11 @@ def query_singleWebsite(url, includeMarkdown=True):
         'X-API-KEY': serper_api_key,
         'Content-Type': 'application/json'
         }
-        conn.request("POST", "/", payload, headers)
-        res = conn.getresponse()
-        data = res.read()
-        json_data = json.loads(data)
+        # 通过共享连接池发送，复用到 scrape.serper.dev 的连接
+        res = get_http_session().post(
+            settings.SERPER_SCRAPE_URL, data=payload, headers=headers, timeout=cap_timeout(timeout, "Serper")
+        )
+        json_data = json.loads(res.content)
         return json_data
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
 import json
 import time
 import logging
+import functools
+import threading
+from contextlib import contextmanager
 from typing import Optional
-import requests
-import openai
-import google.generativeai as genai
-import anthropic
-import dashscope
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, Callable, List, Tuple
+from config import settings
+from config.api_config import get_model_tier
+from decorator.with_timeout import with_timeout
+from utils.deadline import DeadlineExceeded, cap_timeout, can_fit, remaining_time
+from utils.resilience import RetryPolicy, allow_retry, get_retry_budget, record_attempt
+from api.llm_scheduler import get_llm_scheduler
+from api.http_pool import get_http_session
+from api.providers import get_provider, is_configured, load_sdk
+from api.provider_limits import ProviderLease, get_provider_limiter
+from utils.tokens import estimate_tokens
 
-# 从环境变量获取API密钥
+# 从环境变量获取API密钥；各家SDK在首次调用时才导入（见 api.providers）
 openai_api_key = os.getenv('OPENAI_API_KEY')
 gemini_api_key = os.getenv('GEMINI_API_KEY')
 claude_api_key = os.getenv('CLAUDE_API_KEY')
@@ -20,22 +28,97 @@ deerapi_api_key = os.getenv('DEERAPI_API_KEY')
 
 logger = logging.getLogger('simple_api')
 
+# 未指定任务类别时的默认备用顺序
+DEFAULT_PROVIDER_ORDER = ["gemini", "openai", "siliconflow", "qwen", "claude"]
+
+
+# 持有连接池的SDK客户端，按提供商缓存复用
+_SDK_CLIENT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "openai": lambda: load_sdk("openai").OpenAI(api_key=openai_api_key),
+    "claude": lambda: load_sdk("claude").Anthropic(api_key=claude_api_key),
+}
+_sdk_clients: Dict[str, Any] = {}
+_sdk_clients_lock = threading.Lock()
+
+
+def get_sdk_client(provider: str) -> Optional[Any]:
+    """
+    获取提供商的SDK客户端，首次使用时创建，之后复用其中的HTTP连接
+    
+    Returns:
+        Optional[Any]: 客户端；该提供商不使用客户端对象（如Gemini、Qwen）时为None
+    """
+    factory = _SDK_CLIENT_FACTORIES.get(provider)
+    if factory is None:
+        return None
+    client = _sdk_clients.get(provider)
+    if client is None:
+        with _sdk_clients_lock:
+            client = _sdk_clients.get(provider)
+            if client is None:
+                client = _sdk_clients[provider] = factory()
+    return client
+
+
+# 剩余预算低于该秒数时不再发起新的调用
+MIN_CALL_SECONDS = 1
+
+# 既未指定超时也未指定任务类别时的单次调用超时（秒）
+DEFAULT_TIMEOUT = 60
+
+# 未指定最大输出长度时，配额预估按该输出token数计算
+DEFAULT_OUTPUT_TOKENS = 2000
+
+
+def resolve_timeout(timeout: Optional[float], tier: Optional[Dict[str, Any]]) -> float:
+    """调用方显式指定的超时优先，其次为任务分级的超时，都没有时为 DEFAULT_TIMEOUT"""
+    if timeout is not None:
+        return timeout
+    return tier["timeout"] if tier else DEFAULT_TIMEOUT
+
+
+@contextmanager
+def provider_slot(
+    provider: str, task: Optional[str], prompt: str, timeout: float, max_tokens: Optional[int] = None
+) -> Iterator[ProviderLease]:
+    """
+    先在本进程的调度器中排队，再获取同一主机所有工作进程共享的并发和配额许可
+    
+    Args:
+        provider (str): 提供商
+        task (Optional[str]): 任务类别
+        prompt (str): 输入提示，用于预估token
+        timeout (float): 调用超时
+        max_tokens (Optional[int]): 最大输出token数
+    
+    Yields:
+        ProviderLease: 许可；获取时按最大输出预估配额，调用方把实际输出的token加到 lease.tokens 上
+    """
+    with get_llm_scheduler().slot(provider, task):
+        prompt_tokens = estimate_tokens(prompt)
+        with get_provider_limiter().lease(provider, prompt_tokens + (max_tokens or DEFAULT_OUTPUT_TOKENS), timeout) as lease:
+            lease.tokens = prompt_tokens
+            yield lease
+
+
 class SimpleAPIClient:
     """简化的API调用客户端"""
     
-    def __init__(self, max_retries: int = 3, retry_delay: int = 5):
+    def __init__(self, max_retries: int = 3, retry_policy: Optional[RetryPolicy] = None):
         self.max_retries = max_retries
-        self.retry_delay = retry_delay
+        # 轮次之间按指数退避+抖动等待，每个提供商的重试受各自的重试预算约束
+        self.retry_policy = retry_policy or RetryPolicy()
     
-    def call_openai(self, prompt: str, model: str = "gpt-3.5-turbo", timeout: int = 60) -> str:
+    def call_openai(self, prompt: str, model: str = "gpt-3.5-turbo", timeout: int = 60, max_tokens: Optional[int] = None) -> str:
         """调用OpenAI API"""
         try:
-            client = openai.OpenAI(api_key=openai_api_key)
+            client = get_sdk_client("openai")
             
             response = client.chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
-                timeout=timeout
+                timeout=timeout,
+                **({"max_tokens": max_tokens} if max_tokens else {})
             )
             
             return response.choices[0].message.content
@@ -43,27 +126,34 @@ class SimpleAPIClient:
             logger.error(f"OpenAI API调用失败: {str(e)}")
             raise
     
-    def call_gemini(self, prompt: str, model: str = "gemini-1.5-flash", timeout: int = 60) -> str:
+    def call_gemini(self, prompt: str, model: str = "gemini-1.5-flash", timeout: int = 60, max_tokens: Optional[int] = None) -> str:
         """调用Google Gemini API"""
         try:
+            genai = load_sdk("gemini")
             genai.configure(api_key=gemini_api_key)
             model_instance = genai.GenerativeModel(model)
             
-            response = model_instance.generate_content(prompt)
+            generation_config = {"max_output_tokens": max_tokens} if max_tokens else None
+            response = model_instance.generate_content(
+                prompt,
+                generation_config=generation_config,
+                request_options={"timeout": timeout}
+            )
             return response.text
         except Exception as e:
             logger.error(f"Gemini API调用失败: {str(e)}")
             raise
     
-    def call_claude(self, prompt: str, model: str = "claude-3-sonnet-20240229", timeout: int = 60) -> str:
+    def call_claude(self, prompt: str, model: str = "claude-3-sonnet-20240229", timeout: int = 60, max_tokens: Optional[int] = None) -> str:
         """调用Claude API"""
         try:
-            client = anthropic.Anthropic(api_key=claude_api_key)
+            client = get_sdk_client("claude")
             
             response = client.messages.create(
                 model=model,
-                max_tokens=4000,
-                messages=[{"role": "user", "content": prompt}]
+                max_tokens=max_tokens or 4000,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=timeout
             )
             
             return response.content[0].text
@@ -71,15 +161,18 @@ class SimpleAPIClient:
             logger.error(f"Claude API调用失败: {str(e)}")
             raise
     
-    def call_qwen(self, prompt: str, timeout: int = 60) -> str:
-        """调用阿里通义千问API"""
+    @with_timeout(timeout_param='timeout', default_seconds=60)
+    def call_qwen(self, prompt: str, model: str = "qwen-max", timeout: int = 60, max_tokens: Optional[int] = None) -> str:
+        """调用阿里通义千问API（SDK不支持超时参数，由with_timeout强制超时）"""
         try:
+            dashscope = load_sdk("qwen")
             dashscope.api_key = ali_bailian_api_key
             
             response = dashscope.Generation.call(
-                model='qwen-max',
+                model=model,
                 prompt=prompt,
-                result_format='message'
+                result_format='message',
+                **({"max_tokens": max_tokens} if max_tokens else {})
             )
             
             if response.status_code == 200:
@@ -90,10 +183,10 @@ class SimpleAPIClient:
             logger.error(f"Qwen API调用失败: {str(e)}")
             raise
     
-    def call_siliconflow(self, prompt: str, model: str = "Qwen/Qwen2.5-7B-Instruct", timeout: int = 60) -> str:
+    def call_siliconflow(self, prompt: str, model: str = "Qwen/Qwen2.5-7B-Instruct", timeout: int = 60, max_tokens: Optional[int] = None) -> str:
         """调用SiliconFlow API"""
         try:
-            url = "https://api.siliconflow.cn/v1/chat/completions"
+            url = f"{settings.SILICONFLOW_BASE_URL}/chat/completions"
             
             headers = {
                 "Authorization": f"Bearer {siliconflow_api_key}",
@@ -103,11 +196,11 @@ class SimpleAPIClient:
             data = {
                 "model": model,
                 "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 4000,
+                "max_tokens": max_tokens or 4000,
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=timeout)
+            response = get_http_session().post(url, headers=headers, json=data, timeout=timeout)
             response.raise_for_status()
             
             result = response.json()
@@ -116,76 +209,400 @@ class SimpleAPIClient:
             logger.error(f"SiliconFlow API调用失败: {str(e)}")
             raise
     
-    def generate_with_fallback(self, prompt: str, timeout: int = 60) -> str:
+    # ================================ 流式调用 ================================
+    
+    def stream_openai(self, prompt: str, model: str = "gpt-3.5-turbo", timeout: int = 60, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """流式调用OpenAI API"""
+        client = get_sdk_client("openai")
+        
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout,
+            stream=True,
+            **({"max_tokens": max_tokens} if max_tokens else {})
+        )
+        
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def stream_gemini(self, prompt: str, model: str = "gemini-1.5-flash", timeout: int = 60, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """流式调用Google Gemini API"""
+        genai = load_sdk("gemini")
+        genai.configure(api_key=gemini_api_key)
+        model_instance = genai.GenerativeModel(model)
+        
+        generation_config = {"max_output_tokens": max_tokens} if max_tokens else None
+        
+        for chunk in model_instance.generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True,
+            request_options={"timeout": timeout}
+        ):
+            if chunk.text:
+                yield chunk.text
+    
+    def stream_claude(self, prompt: str, model: str = "claude-3-sonnet-20240229", timeout: int = 60, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """流式调用Claude API"""
+        client = get_sdk_client("claude")
+        
+        with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens or 4000,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=timeout
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+    
+    def stream_qwen(self, prompt: str, model: str = "qwen-max", timeout: int = 60, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """流式调用阿里通义千问API"""
+        dashscope = load_sdk("qwen")
+        dashscope.api_key = ali_bailian_api_key
+        
+        responses = dashscope.Generation.call(
+            model=model,
+            prompt=prompt,
+            result_format='message',
+            stream=True,
+            incremental_output=True,
+            **({"max_tokens": max_tokens} if max_tokens else {})
+        )
+        
+        for response in responses:
+            if response.status_code != 200:
+                raise Exception(f"Qwen API调用失败: {response.message}")
+            content = response.output.choices[0].message.content
+            if content:
+                yield content
+    
+    def stream_siliconflow(self, prompt: str, model: str = "Qwen/Qwen2.5-7B-Instruct", timeout: int = 60, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """流式调用SiliconFlow API（SSE）"""
+        url = f"{settings.SILICONFLOW_BASE_URL}/chat/completions"
+        
+        headers = {
+            "Authorization": f"Bearer {siliconflow_api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        data = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens or 4000,
+            "temperature": 0.7,
+            "stream": True
+        }
+        
+        with get_http_session().post(url, headers=headers, json=data, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                delta = json.loads(payload)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+    
+    # ================================ 备用策略 ================================
+    
+    def _build_api_methods(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        tier: Optional[Dict[str, Any]] = None,
+        stream: bool = False,
+        task: Optional[str] = None
+    ) -> List[Tuple[str, str, Callable[[], Any]]]:
+        """
+        按备用链构造待尝试的API调用列表
+        
+        Args:
+            prompt (str): 输入提示
+            timeout (Optional[float]): 超时时间，为空时使用分级配置（见 resolve_timeout）
+            tier (Optional[Dict[str, Any]]): 模型分级配置，为空时使用默认顺序和模型
+            stream (bool): 是否构造流式调用
+            task (Optional[str]): 任务类别，决定调用在调度器中的排队类别
+            
+        Returns:
+            List[Tuple[str, str, Callable]]: (API名称, 提供商, 无参调用函数) 列表
+        """
+        timeout = resolve_timeout(timeout, tier)
+        if tier:
+            chain = tier["providers"]
+            max_tokens = tier["max_tokens"]
+        else:
+            chain = [(provider, None) for provider in DEFAULT_PROVIDER_ORDER]
+            max_tokens = None
+        
+        prefix = "stream_" if stream else "call_"
+        api_methods = []
+        for provider, model in chain:
+            spec = get_provider(provider)
+            method = getattr(self, prefix + provider, None)
+            if spec is None or method is None:
+                logger.warning(f"未知的模型提供商: {provider}，已跳过")
+                continue
+            if not is_configured(provider):
+                # 未配置密钥的提供商不参与备用，也不会导入其SDK
+                logger.debug(f"未设置 {spec.api_key_env}，跳过 {spec.display_name}")
+                continue
+            
+            kwargs = {}
+            if model:
+                kwargs["model"] = model
+            if max_tokens:
+                kwargs["max_tokens"] = max_tokens
+            
+            api_name = spec.display_name
+            if model:
+                api_name = f"{api_name}({model})"
+            bind = self._bind_stream_method if stream else self._bind_api_method
+            api_methods.append((api_name, provider, bind(method, provider, task, prompt, timeout, kwargs)))
+        return api_methods
+    
+    @staticmethod
+    def _bind_api_method(
+        method: Callable, provider: str, task: Optional[str], prompt: str, timeout: int, kwargs: Dict[str, Any]
+    ) -> Callable[[], Any]:
+        """绑定调用参数；先等到该提供商的槽位和许可，超时时间在实际调用时按剩余预算截断"""
+        def api_method():
+            with provider_slot(provider, task, prompt, timeout, kwargs.get("max_tokens")) as lease:
+                result = method(prompt, timeout=cap_timeout(timeout, "模型调用"), **kwargs)
+                lease.tokens += estimate_tokens(result or "")
+                return result
+        return api_method
+    
+    @staticmethod
+    def _bind_stream_method(
+        method: Callable, provider: str, task: Optional[str], prompt: str, timeout: int, kwargs: Dict[str, Any]
+    ) -> Callable[[], Iterator[str]]:
+        """绑定流式调用参数，槽位和许可从取第一个片段时占用到流结束或被关闭"""
+        def stream_method():
+            with provider_slot(provider, task, prompt, timeout, kwargs.get("max_tokens")) as lease:
+                for chunk in method(prompt, timeout=cap_timeout(timeout, "模型调用"), **kwargs):
+                    lease.tokens += estimate_tokens(chunk)
+                    yield chunk
+        return stream_method
+    
+    def _budget_exhausted(self) -> bool:
+        """剩余预算是否已不足以发起新的调用"""
+        remaining = remaining_time()
+        return remaining is not None and remaining < MIN_CALL_SECONDS
+    
+    def _may_attempt(self, provider: str, round_index: int, last_error: Optional[Exception]) -> bool:
+        """首轮直接调用；后续轮次属于重试，需通过错误分类和该提供商的重试预算"""
+        if round_index == 0:
+            get_retry_budget(provider).record_request()
+            return True
+        return allow_retry(provider, last_error or Exception("空响应"), 0)
+    
+    def _wait_next_round(self, round_index: int) -> bool:
+        """轮次之间退避等待，剩余预算不足以再试一轮时返回False"""
+        delay = self.retry_policy.backoff(round_index)
+        if not can_fit(delay + MIN_CALL_SECONDS):
+            logger.warning("剩余时间不足以再重试一轮，停止重试")
+            return False
+        logger.info(f"等待 {delay:.2f} 秒后重试...")
+        time.sleep(delay)
+        return True
+    
+    def stream_with_fallback(
+        self, prompt: str, timeout: Optional[float] = None, tier: Optional[Dict[str, Any]] = None, task: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        使用备用策略流式生成内容
+        
+        只有在某个API尚未输出任何内容时失败才会切换到下一个API，
+        已开始输出后出现的错误直接抛出，避免调用方收到重复内容。
+        
+        Args:
+            prompt (str): 输入提示
+            timeout (Optional[float]): 超时时间，为空时使用分级配置
+            tier (Optional[Dict[str, Any]]): 模型分级配置
+            task (Optional[str]): 任务类别，用于调度排队
+            
+        Yields:
+            str: 生成内容的增量片段
+        """
+        stream_methods = self._build_api_methods(prompt, timeout, tier, stream=True, task=task)
+        if not stream_methods:
+            raise Exception("备用链中没有已设置API密钥的模型提供商")
+        max_rounds = tier["max_rounds"] if tier else self.max_retries
+        
+        last_error = None
+        errors: Dict[str, Optional[Exception]] = {}
+        
+        for retry in range(max_rounds):
+            for api_name, provider, stream_method in stream_methods:
+                if self._budget_exhausted():
+                    raise DeadlineExceeded(f"请求截止时间已到，停止流式调用。最后一个错误: {str(last_error)}")
+                if not self._may_attempt(provider, retry, errors.get(api_name)):
+                    continue
+                
+                start_time = time.monotonic()
+                try:
+                    logger.info(f"尝试使用 {api_name} 流式API (重试 {retry + 1}/{max_rounds})")
+                    chunks = stream_method()
+                    first_chunk = next(chunks)
+                except StopIteration:
+                    record_attempt(provider, False, time.monotonic() - start_time)
+                    errors[api_name] = None
+                    logger.warning(f"{api_name} 流式API 返回空内容")
+                    continue
+                except Exception as e:
+                    record_attempt(provider, False, time.monotonic() - start_time)
+                    last_error = errors[api_name] = e
+                    logger.warning(f"{api_name} 流式API 调用失败: {str(e)}")
+                    continue
+                
+                record_attempt(provider, True, time.monotonic() - start_time)
+                logger.info(f"成功使用 {api_name} 流式API 获取响应")
+                yield first_chunk
+                yield from chunks
+                return
+            
+            if retry < max_rounds - 1 and not self._wait_next_round(retry):
+                break
+        
+        raise Exception(f"所有流式API调用都失败了。最后一个错误: {str(last_error)}")
+    
+    def generate_with_fallback(
+        self, prompt: str, timeout: Optional[float] = None, tier: Optional[Dict[str, Any]] = None, task: Optional[str] = None
+    ) -> str:
         """
         使用备用策略生成内容
         
+        首轮依次尝试备用链中的每个API；之后的轮次为重试，
+        不可重试的错误（如鉴权失败）和重试预算耗尽的提供商会被跳过。
+        
         Args:
             prompt (str): 输入提示
-            timeout (int): 超时时间
+            timeout (Optional[float]): 超时时间，为空时使用分级配置
+            tier (Optional[Dict[str, Any]]): 模型分级配置，决定备用链、超时和最大输出长度
+            task (Optional[str]): 任务类别，用于调度排队
             
         Returns:
             str: 生成的内容
         """
         # 按优先级尝试不同的API
-        api_methods = [
-            ("Gemini", lambda: self.call_gemini(prompt, timeout=timeout)),
-            ("OpenAI", lambda: self.call_openai(prompt, timeout=timeout)),
-            ("SiliconFlow", lambda: self.call_siliconflow(prompt, timeout=timeout)),
-            ("Qwen", lambda: self.call_qwen(prompt, timeout=timeout)),
-            ("Claude", lambda: self.call_claude(prompt, timeout=timeout))
-        ]
+        api_methods = self._build_api_methods(prompt, timeout, tier, task=task)
+        if not api_methods:
+            raise Exception("备用链中没有已设置API密钥的模型提供商")
+        max_rounds = tier["max_rounds"] if tier else self.max_retries
+        start_time = time.time()
         
         last_error = None
+        errors: Dict[str, Optional[Exception]] = {}
         
-        for retry in range(self.max_retries):
-            for api_name, api_method in api_methods:
+        for retry in range(max_rounds):
+            for api_name, provider, api_method in api_methods:
+                if self._budget_exhausted():
+                    raise DeadlineExceeded(f"请求截止时间已到，停止调用。最后一个错误: {str(last_error)}")
+                if not self._may_attempt(provider, retry, errors.get(api_name)):
+                    continue
+                
+                attempt_start = time.monotonic()
                 try:
-                    logger.info(f"尝试使用 {api_name} API (重试 {retry + 1}/{self.max_retries})")
+                    logger.info(f"尝试使用 {api_name} API (重试 {retry + 1}/{max_rounds})")
                     result = api_method()
                     
                     if result and result.strip():
+                        record_attempt(provider, True, time.monotonic() - attempt_start)
                         logger.info(f"成功使用 {api_name} API 获取响应")
+                        elapsed = time.time() - start_time
+                        if tier and elapsed > tier["latency_slo"]:
+                            logger.warning(f"调用耗时 {elapsed:.1f} 秒，超出期望延迟 {tier['latency_slo']} 秒")
                         return result.strip()
+                    
+                    record_attempt(provider, False, time.monotonic() - attempt_start)
+                    errors[api_name] = None
                         
                 except Exception as e:
-                    last_error = e
+                    record_attempt(provider, False, time.monotonic() - attempt_start)
+                    last_error = errors[api_name] = e
                     logger.warning(f"{api_name} API 调用失败: {str(e)}")
                     continue
             
-            if retry < self.max_retries - 1:
-                logger.info(f"等待 {self.retry_delay} 秒后重试...")
-                time.sleep(self.retry_delay)
+            if retry < max_rounds - 1 and not self._wait_next_round(retry):
+                break
         
         raise Exception(f"所有API调用都失败了。最后一个错误: {str(last_error)}")
 
 # 创建全局客户端实例
 api_client = SimpleAPIClient()
 
-def call_llm(prompt: str, model_name: str = "auto", timeout: int = 60) -> str:
+def _single_provider_kwargs(model_name: str, timeout: Optional[float], task: Optional[str]) -> Dict[str, Any]:
+    """指定了模型提供商时，按任务类别补充该提供商在分级中的模型和参数"""
+    tier = get_model_tier(task) if task else None
+    kwargs: Dict[str, Any] = {"timeout": resolve_timeout(timeout, tier)}
+    if tier:
+        kwargs["max_tokens"] = tier["max_tokens"]
+        for provider, model in tier["providers"]:
+            if provider == model_name:
+                kwargs["model"] = model
+                break
+    kwargs["timeout"] = cap_timeout(kwargs["timeout"], "模型调用")
+    return kwargs
+
+
+def call_llm(prompt: str, model_name: str = "auto", timeout: Optional[float] = None, task: Optional[str] = None) -> str:
     """
     调用大语言模型
     
     Args:
         prompt (str): 输入提示
         model_name (str): 模型名称，支持 "auto", "gemini", "openai", "claude", "qwen", "siliconflow"
-        timeout (int): 超时时间
+        timeout (Optional[float]): 超时时间；显式指定时优先，为空时使用任务分级的超时（未指定任务类别时为60秒）
+        task (Optional[str]): 任务类别 extract/short_generate/long_generate，见 config.api_config
         
     Returns:
         str: 生成的内容
     """
+    tier = get_model_tier(task) if task else None
+    
     if model_name == "auto":
-        return api_client.generate_with_fallback(prompt, timeout)
-    elif model_name == "gemini":
-        return api_client.call_gemini(prompt, timeout=timeout)
-    elif model_name == "openai":
-        return api_client.call_openai(prompt, timeout=timeout)
-    elif model_name == "claude":
-        return api_client.call_claude(prompt, timeout=timeout)
-    elif model_name == "qwen":
-        return api_client.call_qwen(prompt, timeout=timeout)
-    elif model_name == "siliconflow":
-        return api_client.call_siliconflow(prompt, timeout=timeout)
-    else:
+        return api_client.generate_with_fallback(prompt, timeout, tier, task)
+    
+    method = getattr(api_client, f"call_{model_name}", None) if get_provider(model_name) else None
+    if method is None:
         logger.warning(f"未知的模型名称: {model_name}，使用自动备用策略")
-        return api_client.generate_with_fallback(prompt, timeout) 
\ No newline at end of file
+        return api_client.generate_with_fallback(prompt, timeout, tier, task)
+    with provider_slot(model_name, task, prompt, resolve_timeout(timeout, tier), tier["max_tokens"] if tier else None) as lease:
+        result = method(prompt, **_single_provider_kwargs(model_name, timeout, task))
+        lease.tokens += estimate_tokens(result or "")
+        return result
+
+
+def stream_llm(prompt: str, model_name: str = "auto", timeout: Optional[float] = None, task: Optional[str] = None) -> Iterator[str]:
+    """
+    流式调用大语言模型
+    
+    Args:
+        prompt (str): 输入提示
+        model_name (str): 模型名称，支持 "auto", "gemini", "openai", "claude", "qwen", "siliconflow"
+        timeout (Optional[float]): 超时时间；显式指定时优先，为空时使用任务分级的超时（未指定任务类别时为60秒）
+        task (Optional[str]): 任务类别 extract/short_generate/long_generate
+        
+    Yields:
+        str: 生成内容的增量片段
+    """
+    tier = get_model_tier(task) if task else None
+    
+    if model_name == "auto":
+        return api_client.stream_with_fallback(prompt, timeout, tier, task)
+    
+    method = getattr(api_client, f"stream_{model_name}", None) if get_provider(model_name) else None
+    if method is None:
+        logger.warning(f"未知的模型名称: {model_name}，使用自动备用策略")
+        return api_client.stream_with_fallback(prompt, timeout, tier, task)
+    
+    def stream_in_slot():
+        with provider_slot(model_name, task, prompt, resolve_timeout(timeout, tier), tier["max_tokens"] if tier else None) as lease:
+            for chunk in method(prompt, **_single_provider_kwargs(model_name, timeout, task)):
+                lease.tokens += estimate_tokens(chunk)
+                yield chunk
+    return stream_in_slot()
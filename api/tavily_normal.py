@@ -3,8 +3,6 @@ import json
 import logging
 import time
 from typing import Dict, Any, List, Optional
-import requests
-from tavily import TavilyClient
 import os
 import sys
 from pathlib import Path
@@ -15,20 +13,48 @@ sys.path.append(str(project_root))
 # 从环境变量获取API密钥
 tavily_api_key = os.getenv('TAVILY_API_KEY')
 
-# 初始化Tavily客户端
-client = TavilyClient(tavily_api_key) if tavily_api_key else None
+from utils.deadline import cap_timeout
+from utils.lazy_import import load_module
 
-def query_zhihu(prompt, N):
-    client = TavilyClient(tavily_api_key)
+def search_zhihu_pages(prompt, N, include_raw_content=False, search_depth="advanced", timeout=60):
+    """
+    搜索知乎页面
+
+    Args:
+        prompt (str): 搜索词
+        N (int): 最大结果数
+        include_raw_content (bool): 是否在搜索结果中直接返回页面正文，省去单独抓取
+        search_depth (str): 搜索深度 basic/advanced，basic 更快更便宜
+        timeout (int): 超时时间（秒）
+
+    Returns:
+        list: [{"url": 链接, "title": 标题, "content": 摘要, "score": 相关度, "raw_content": 页面正文或None}]
+    """
+    # tavily SDK 在首次搜索时才导入
+    client = load_module("tavily").TavilyClient(tavily_api_key)
+    # 不请求 include_answer：生成的回答从未被读取，只会增加延迟和费用
     response = client.search(
+        timeout=cap_timeout(timeout, "Tavily"),
         query=prompt,
-        search_depth="advanced",
+        search_depth=search_depth,
         max_results=N,
         time_range="year",
-        include_answer="advanced",
+        include_raw_content=include_raw_content,
         include_domains=["zhihu.com"]
     )
-    return [r["url"] for r in response["results"]]
+    return [
+        {
+            "url": r["url"],
+            "title": r.get("title"),
+            "content": r.get("content"),
+            "score": r.get("score"),
+            "raw_content": r.get("raw_content"),
+        }
+        for r in response["results"]
+    ]
+
+def query_zhihu(prompt, N, timeout=60):
+    return [r["url"] for r in search_zhihu_pages(prompt, N, timeout=timeout)]
         
 if __name__ == "__main__":
     pass
\ No newline at end of file
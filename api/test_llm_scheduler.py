@@ -0,0 +1,70 @@
+import time
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# 导入大模型调用调度器
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from api.llm_scheduler import LLMScheduler
+from config.api_config import TASK_EXTRACT, TASK_LONG_GENERATE
+from utils.deadline import DeadlineExceeded, deadline_scope
+
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def start(self, scheduler, task_class, order):
+        """在后台线程中排队，拿到槽位后记录并立即释放"""
+        def run():
+            scheduler.acquire("gemini", task_class)
+            order.append(task_class)
+            scheduler.release("gemini", task_class)
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def wait_queued(self, scheduler, count):
+        for _ in range(100):
+            stats = scheduler.stats().get("gemini", {})
+            if sum(stats.get("waiting_by_class", {}).values()) == count:
+                return
+            time.sleep(0.01)
+        self.fail("排队数量不符")
+
+    def test_weighted_fair_order(self):
+        """槽位空出时权重高的类别优先，但低权重类别不会饿死"""
+        scheduler = LLMScheduler(1, class_weights={TASK_EXTRACT: 4, TASK_LONG_GENERATE: 1})
+        held = scheduler.acquire("gemini", TASK_LONG_GENERATE)
+        order = []
+        threads = [self.start(scheduler, TASK_LONG_GENERATE, order) for _ in range(2)]
+        self.wait_queued(scheduler, 2)
+        threads += [self.start(scheduler, TASK_EXTRACT, order) for _ in range(5)]
+        self.wait_queued(scheduler, 7)
+        scheduler.release("gemini", held)
+        for thread in threads:
+            thread.join(1)
+        # 完成标记：长文本 2、3，关键词提取 1.25、1.5、1.75、2、2.25
+        self.assertEqual(order, [TASK_EXTRACT] * 3 + [TASK_LONG_GENERATE] + [TASK_EXTRACT] * 2 + [TASK_LONG_GENERATE])
+
+    def test_reserved_slot_for_short_calls(self):
+        """长文本生成占满可用槽位后，短调用仍可使用保留槽位"""
+        scheduler = LLMScheduler(2, reserved_slots=1)
+        held = scheduler.acquire("gemini", TASK_LONG_GENERATE)
+        with deadline_scope(0.1):
+            self.assertRaises(DeadlineExceeded, scheduler.acquire, "gemini", TASK_LONG_GENERATE)
+            self.assertEqual(scheduler.acquire("gemini", TASK_EXTRACT), TASK_EXTRACT)
+        self.assertEqual(scheduler.stats()["gemini"]["in_flight"], 2)
+        self.assertEqual(scheduler.stats()["gemini"]["waiting_by_class"], {})
+        scheduler.release("gemini", TASK_EXTRACT)
+        scheduler.release("gemini", held)
+
+    def test_slot_released_on_error(self):
+        scheduler = LLMScheduler(1)
+        with self.assertRaises(ValueError):
+            with scheduler.slot("openai", TASK_EXTRACT):
+                raise ValueError("调用失败")
+        self.assertEqual(scheduler.stats()["openai"]["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# 导入跨进程限流
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from api.provider_limits import ProviderLimiter, QUOTA_WINDOW_SECONDS
+from utils.deadline import DeadlineExceeded, deadline_scope
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class TestProviderLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "limits.sqlite3")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_concurrency_shared_between_instances(self):
+        """两个实例（模拟两个工作进程）共用同一并发上限"""
+        worker_a = ProviderLimiter(self.path, 2)
+        worker_b = ProviderLimiter(self.path, 2)
+        first, _ = worker_a.try_acquire("openai", 100, 60)
+        second, _ = worker_b.try_acquire("openai", 100, 60)
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(worker_b.try_acquire("openai", 100, 60)[0])
+        self.assertIsNotNone(worker_b.try_acquire("gemini", 100, 60)[0])
+        worker_a.release("openai", first)
+        self.assertIsNotNone(worker_b.try_acquire("openai", 100, 60)[0])
+
+    def test_expired_and_dead_leases_reclaimed(self):
+        limiter = ProviderLimiter(self.path, 1)
+        self.assertIsNotNone(limiter.try_acquire("openai", 0, -1)[0])
+        lease_id, _ = limiter.try_acquire("openai", 0, 60)
+        self.assertIsNotNone(lease_id)
+        with limiter._connect() as conn:
+            conn.execute("UPDATE leases SET pid = ?", (2 ** 22 + 12345,))
+        self.assertIsNotNone(limiter.try_acquire("openai", 0, 60)[0])
+
+    def test_rpm_and_tpm_quotas(self):
+        limiter = ProviderLimiter(self.path, 10, rpm={"openai": 2}, tpm={"gemini": 1000})
+        for _ in range(2):
+            lease_id, _ = limiter.try_acquire("openai", 10, 60)
+            limiter.release("openai", lease_id)
+        lease_id, wait = limiter.try_acquire("openai", 10, 60)
+        self.assertIsNone(lease_id)
+        self.assertTrue(0 < wait <= QUOTA_WINDOW_SECONDS)
+
+        lease_id, _ = limiter.try_acquire("gemini", 900, 60)
+        self.assertIsNone(limiter.try_acquire("gemini", 200, 60)[0])
+        # 按实际用量更新后配额释放出来
+        limiter.release("gemini", lease_id, tokens=300)
+        self.assertIsNotNone(limiter.try_acquire("gemini", 200, 60)[0])
+
+    def test_wait_bounded_by_deadline(self):
+        limiter = ProviderLimiter(self.path, 1)
+        limiter.try_acquire("openai", 0, 60)
+        with deadline_scope(0.3):
+            self.assertRaises(DeadlineExceeded, limiter.acquire, "openai", 0, 60)
+
+    def test_rate_limited_error_pauses_provider(self):
+        """上游返回429后所有实例暂停调用该提供商"""
+        limiter = ProviderLimiter(self.path, 4)
+        with self.assertRaises(RateLimitError):
+            with limiter.lease("openai", 10, 60):
+                raise RateLimitError()
+        lease_id, wait = ProviderLimiter(self.path, 4).try_acquire("openai", 10, 60)
+        self.assertIsNone(lease_id)
+        self.assertGreater(wait, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
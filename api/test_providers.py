@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# 导入提供商注册表
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from api import providers
+from api.providers import ProviderSpec, get_provider, is_configured, load_sdk, register_provider
+
+
+class TestProviders(unittest.TestCase):
+
+    def setUp(self):
+        # 测试结束后恢复注册表，替身提供商不影响同一进程中的其他测试
+        patcher = mock.patch.dict(providers._providers)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        register_provider(ProviderSpec("dummy", "Dummy", "DUMMY_TEST_API_KEY", "colorsys"))
+        register_provider(ProviderSpec("dummy_http", "DummyHTTP", "DUMMY_TEST_API_KEY"))
+
+    def test_configured_by_api_key(self):
+        os.environ.pop("DUMMY_TEST_API_KEY", None)
+        self.assertFalse(is_configured("dummy"))
+        os.environ["DUMMY_TEST_API_KEY"] = "key"
+        try:
+            self.assertTrue(is_configured("dummy"))
+        finally:
+            del os.environ["DUMMY_TEST_API_KEY"]
+        self.assertFalse(is_configured("unknown"))
+
+    def test_sdk_imported_on_first_use(self):
+        sys.modules.pop("colorsys", None)
+        self.assertEqual(get_provider("dummy").display_name, "Dummy")
+        self.assertNotIn("colorsys", sys.modules)
+        module = load_sdk("dummy")
+        self.assertIs(module, sys.modules["colorsys"])
+        self.assertIs(load_sdk("dummy"), module)
+        with self.assertRaises(KeyError):
+            load_sdk("dummy_http")
+
+    def test_registry_does_not_import_sdks(self):
+        """导入注册表不应加载任何模型SDK"""
+        for name, sdk in (("openai", "openai"), ("claude", "anthropic"), ("qwen", "dashscope"),
+                          ("gemini", "google.generativeai")):
+            self.assertEqual(get_provider(name).sdk_module, sdk)
+            self.assertNotIn(sdk, sys.modules)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+
+# 导入搜索缓存
+sys.path.insert(0, str(Path(__file__).parent))
+from search_cache import SearchCache, SingleFlight, normalize_query, normalize_keyword_group
+
+
+class TestNormalize(unittest.TestCase):
+
+    def test_normalize_query(self):
+        """全角、大小写、标点和多余空白归一化后一致"""
+        self.assertEqual(normalize_query("  深度学习：Transformer！ "), "深度学习 transformer")
+        self.assertEqual(normalize_query("ＢＥＲＴ，  模型"), normalize_query("bert 模型"))
+
+    def test_normalize_keyword_group(self):
+        """关键词组与顺序、大小写和重复无关"""
+        self.assertEqual(
+            normalize_keyword_group(["Graph Neural Network", "Drug"]),
+            normalize_keyword_group(["drug", "graph neural network", "DRUG"])
+        )
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "cache", "search.sqlite3")
+        self.cache = SearchCache(self.path, {"tavily": 60}, stale_seconds=60)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def fetch(self):
+        self.calls += 1
+        return [{"link": "https://zhuanlan.zhihu.com/p/1", "content": "内容" * 100}]
+
+    def test_hit_after_miss(self):
+        """第二次查询命中缓存，结果经压缩存储后保持一致"""
+        first = self.cache.get_or_fetch("tavily", "深度学习", self.fetch)
+        second = self.cache.get_or_fetch("tavily", "深度学习", self.fetch)
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    def test_should_cache(self):
+        """不可缓存的结果（如空结果）每次重新请求"""
+        self.cache.get_or_fetch("tavily", "q", lambda: [])
+        self.cache.get_or_fetch("tavily", "q", self.fetch)
+        self.assertEqual(self.calls, 1)
+
+    def test_expired_entry_refetched(self):
+        """超过 TTL + stale 窗口的记录重新请求"""
+        self.cache.get_or_fetch("tavily", "q", self.fetch)
+        self._age_entries(200)
+        self.cache.get_or_fetch("tavily", "q", self.fetch)
+        self.assertEqual(self.calls, 2)
+        self._age_entries(200)
+        self.assertEqual(self.cache.purge_expired(), 1)
+
+    def test_stale_while_revalidate(self):
+        """stale 窗口内立即返回旧结果，并在后台刷新"""
+        self.cache.get_or_fetch("tavily", "q", lambda: ["旧结果"])
+        self._age_entries(90)
+        refreshed = threading.Event()
+
+        def fetch_new():
+            refreshed.set()
+            return ["新结果"]
+
+        self.assertEqual(self.cache.get_or_fetch("tavily", "q", fetch_new), ["旧结果"])
+        self.assertTrue(refreshed.wait(1))
+        for _ in range(50):
+            if self.cache.get(self.cache.make_key("tavily", "q"))[0] == ["新结果"]:
+                break
+            time.sleep(0.02)
+        self.assertEqual(self.cache.get_or_fetch("tavily", "q", self.fetch), ["新结果"])
+        self.assertEqual(self.calls, 0)
+
+    def _age_entries(self, seconds):
+        with self.cache._connect() as conn:
+            conn.execute("UPDATE search_cache SET created_at = created_at - ?", (seconds,))
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_shared(self):
+        """并发的相同请求只执行一次，所有调用得到同一结果"""
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(1)
+            return ["结果"]
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do("k", fetch))) for _ in range(5)]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [["结果"]] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
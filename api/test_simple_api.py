@@ -0,0 +1,68 @@
+import unittest
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+# 导入模型调用
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.api_config import TASK_EXTRACT, TASK_LONG_GENERATE, get_model_tier
+from api import simple_api
+
+
+class _Lease:
+    tokens = 0
+
+
+@contextmanager
+def _free_slot(*args, **kwargs):
+    # 不经过调度器和跨进程配额
+    yield _Lease()
+
+
+class TestCallLLMTimeout(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        patches = [
+            mock.patch.object(simple_api, "is_configured", lambda provider: True),
+            mock.patch.object(simple_api, "provider_slot", _free_slot),
+        ]
+        for provider in ("gemini", "openai", "siliconflow", "qwen", "claude"):
+            patches.append(mock.patch.object(simple_api.api_client, f"call_{provider}", self._fake(provider)))
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake(self, provider):
+        def call(prompt, timeout=None, model=None, max_tokens=None):
+            self.calls.append({"provider": provider, "timeout": timeout, "model": model, "max_tokens": max_tokens})
+            return "ok"
+        return call
+
+    def test_task_uses_tier_settings(self):
+        """只声明任务类别时，使用该分级的首选模型、超时和最大输出"""
+        simple_api.call_llm("提示", task=TASK_EXTRACT)
+        tier = get_model_tier(TASK_EXTRACT)
+        self.assertEqual(self.calls[-1], {
+            "provider": tier["providers"][0][0], "model": tier["providers"][0][1],
+            "timeout": tier["timeout"], "max_tokens": tier["max_tokens"],
+        })
+
+    def test_explicit_timeout_wins(self):
+        """显式指定的超时优先于分级超时，自动备用和指定提供商都一样"""
+        simple_api.call_llm("提示", "auto", 5, task=TASK_LONG_GENERATE)
+        self.assertEqual(self.calls[-1]["timeout"], 5)
+        self.assertEqual(self.calls[-1]["max_tokens"], get_model_tier(TASK_LONG_GENERATE)["max_tokens"])
+        simple_api.call_llm("提示", "openai", 5, task=TASK_LONG_GENERATE)
+        self.assertEqual(self.calls[-1]["timeout"], 5)
+        simple_api.call_llm("提示", "openai", task=TASK_LONG_GENERATE)
+        self.assertEqual(self.calls[-1]["timeout"], get_model_tier(TASK_LONG_GENERATE)["timeout"])
+
+    def test_default_timeout_without_task(self):
+        simple_api.call_llm("提示")
+        self.assertEqual(self.calls[-1]["timeout"], simple_api.DEFAULT_TIMEOUT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import sys
+import time
+import threading
+import unittest
+from pathlib import Path
+
+# 导入启动预热
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from api.warmup import Warmup
+
+
+class TestWarmup(unittest.TestCase):
+
+    def test_report_per_step(self):
+        """失败和超时的步骤分别记录，不影响就绪"""
+        def fail():
+            raise ConnectionError("refused")
+
+        warmup = Warmup()
+        self.assertFalse(warmup.ready)
+        report = warmup.run([
+            ("ok", lambda: "连接已建立"),
+            ("fail", fail),
+            ("slow", lambda: time.sleep(1)),
+        ], timeout=0.1)
+
+        self.assertTrue(report["ready"])
+        self.assertEqual(report["steps"]["ok"]["status"], "ok")
+        self.assertEqual(report["steps"]["ok"]["detail"], "连接已建立")
+        self.assertIn("ms", report["steps"]["ok"])
+        self.assertEqual(report["steps"]["fail"], {"status": "error", "error": "refused", "ms": report["steps"]["fail"]["ms"]})
+        self.assertEqual(report["steps"]["slow"]["status"], "timeout")
+        self.assertLess(report["seconds"], 1)
+
+    def test_late_step_keeps_timeout(self):
+        """超时后才完成的步骤不会覆盖 timeout 状态"""
+        finished = threading.Event()
+
+        def slow():
+            time.sleep(0.3)
+            finished.set()
+            return "连接已建立"
+
+        warmup = Warmup()
+        warmup.run([("slow", slow)], timeout=0.05)
+        self.assertTrue(finished.wait(2))
+        time.sleep(0.05)
+        self.assertEqual(warmup.report()["steps"]["slow"], {"status": "timeout"})
+
+
+if __name__ == "__main__":
+    unittest.main()
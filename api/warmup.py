@@ -0,0 +1,197 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from api.http_pool import preconnect
+from api.providers import get_provider, is_configured, load_sdk, provider_names
+from api.provider_limits import get_provider_limiter
+from api.search_cache import get_search_cache
+from api.simple_api import get_sdk_client
+from utils.lazy_import import load_module
+from utils.metrics import metrics
+from utils.report_store import get_report_store
+from utils.upload_store import get_upload_store
+
+logger = logging.getLogger('warmup')
+
+# 预热步骤：(名称, 无参函数)，函数返回的字符串作为说明写入报告
+WarmupStep = Tuple[str, Callable[[], Optional[str]]]
+
+# ================================ 预热步骤 ================================
+
+
+def _provider_step(name: str, timeout: float) -> Callable[[], Optional[str]]:
+    """导入提供商SDK、创建客户端；直接走HTTP的提供商建立连接池中的连接"""
+    http_urls = {"siliconflow": settings.SILICONFLOW_BASE_URL}
+
+    def step():
+        if get_provider(name).sdk_module:
+            load_sdk(name)
+        get_sdk_client(name)
+        if name in http_urls:
+            preconnect(http_urls[name], timeout)
+            return "连接已建立"
+        return "SDK和客户端已加载"
+    return step
+
+
+def _http_step(url: str, timeout: float) -> Callable[[], Optional[str]]:
+    def step():
+        preconnect(url, timeout)
+        return "连接已建立"
+    return step
+
+
+def _warm_tavily() -> str:
+    # SDK使用自己的连接，且每次搜索新建客户端，共享连接池无法为它预热，只预先导入SDK
+    load_module("tavily")
+    return "SDK已加载"
+
+
+def _warm_caches() -> str:
+    cache = get_search_cache()
+    entries = cache.warm() if cache is not None else 0
+    get_report_store()
+    get_upload_store()
+    get_provider_limiter()
+    return f"搜索缓存 {entries} 条"
+
+
+def _warm_keywords() -> str:
+    # 首次分词会加载jieba词典（已安装时），耗时较长
+    from tool.local_keywords import tokenize
+    tokenize("预热分词词典")
+    return "分词词典已加载"
+
+
+def build_steps(timeout: Optional[float] = None) -> List[WarmupStep]:
+    """
+    按当前配置生成预热步骤：已配置密钥的模型提供商、Tavily、Serper、arXiv、本地缓存和分词词典
+
+    Args:
+        timeout (Optional[float]): 建立连接的超时时间，默认读取配置
+    """
+    timeout = timeout or settings.WARMUP_TIMEOUT
+    steps: List[WarmupStep] = [
+        (f"llm:{name}", _provider_step(name, timeout)) for name in provider_names() if is_configured(name)
+    ]
+    if os.getenv('TAVILY_API_KEY'):
+        steps.append(("tavily", _warm_tavily))
+    if os.getenv('SERPER_API_KEY'):
+        steps.append(("serper", _http_step(settings.SERPER_SCRAPE_URL, timeout)))
+    steps.append(("arxiv", _http_step(settings.ARXIV_API_URL, timeout)))
+    steps.append(("caches", _warm_caches))
+    steps.append(("keywords", _warm_keywords))
+    return steps
+
+
+# ================================ 预热状态 ================================
+
+
+class Warmup:
+    """
+    启动预热
+
+    各步骤并行执行，每步的耗时和结果记录在报告中；单个上游失败或超时不阻止服务就绪，
+    只要预热结束（或未启用），/ready 就返回就绪。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "disabled")
+
+    def run(self, steps: Optional[List[WarmupStep]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        执行预热，返回报告
+
+        Args:
+            steps (Optional[List[WarmupStep]]): 预热步骤，默认按配置生成
+            timeout (Optional[float]): 等待所有步骤的最长时间，超时的步骤记为 timeout
+        """
+        timeout = timeout or settings.WARMUP_TIMEOUT
+        steps = steps if steps is not None else build_steps(timeout)
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+            self.steps = {name: {"status": "running"} for name, _ in steps}
+
+        def run_step(name: str, func: Callable[[], Optional[str]]):
+            start = time.perf_counter()
+            try:
+                detail = func()
+                outcome = {"status": "ok", "detail": detail if isinstance(detail, str) else None}
+            except Exception as e:
+                logger.warning(f"预热 {name} 失败: {str(e)}")
+                outcome = {"status": "error", "error": str(e)}
+            elapsed = time.perf_counter() - start
+            metrics.observe("warmup_seconds", elapsed, {"step": name, "status": outcome["status"]})
+            with self._lock:
+                # 超过等待时间后才完成的步骤已记为 timeout，不再覆盖
+                if self.steps[name]["status"] == "running":
+                    self.steps[name] = {**outcome, "ms": round(elapsed * 1000, 1)}
+
+        executor = ThreadPoolExecutor(max_workers=max(1, len(steps)), thread_name_prefix="warmup")
+        futures = [executor.submit(run_step, name, func) for name, func in steps]
+        # 加上连接超时之外的余量，让正常完成的步骤都能记录下来
+        wait(futures, timeout=timeout * 2)
+        executor.shutdown(wait=False)
+
+        with self._lock:
+            for name, outcome in self.steps.items():
+                if outcome["status"] == "running":
+                    self.steps[name] = {"status": "timeout"}
+            self.status = "ready"
+            self.finished_at = time.time()
+        logger.info(f"预热完成，耗时 {self.finished_at - self.started_at:.2f} 秒")
+        return self.report()
+
+    def start(self) -> bool:
+        """在后台线程中预热，已开始过时返回False；未启用预热时直接就绪"""
+        with self._lock:
+            if self._thread is not None or self.status != "pending":
+                return False
+            if not settings.WARMUP_ON_STARTUP:
+                self.status = "disabled"
+                return False
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+            return True
+
+    def report(self) -> Dict[str, Any]:
+        """就绪状态和各步骤的耗时"""
+        with self._lock:
+            duration = None
+            if self.started_at is not None:
+                duration = round((self.finished_at or time.time()) - self.started_at, 3)
+            return {
+                "ready": self.ready,
+                "status": self.status,
+                "seconds": duration,
+                "steps": {name: dict(outcome) for name, outcome in self.steps.items()},
+            }
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    """获取全局预热状态"""
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = Warmup()
+    return _warmup
@@ -1,22 +1,255 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, g, request, jsonify, stream_with_context
 import logging
 import traceback
+import os
+import re
+import hmac
 import json
-from main import generate_academic_report_api
+import uuid
+from config import settings
+from main import generate_academic_report_api, split_variant_key
+from batch import get_batch_job_manager, normalize_item
+from utils.deadline import DeadlineExceeded
+from utils.json_stream import Deferred, stream_json
+from utils.log_pipeline import current_request_id, log_context, setup_logging
+from utils.metrics import metrics
+from utils.profiling import profile_scope
+from api.llm_scheduler import get_llm_scheduler
+from api.warmup import get_warmup
+from utils.upload_store import UploadTooLarge, UploadWriterSet, get_upload_store
+from utils.report_store import get_report_store, save_report
+
+
+class UploadRequest(Request):
+    """/uploads 请求的文件直接流式写入上传存储，边写边计算哈希，不缓存在内存中"""
+
+    def _is_upload(self):
+        return self.path.rstrip('/') == '/uploads'
+
+    @property
+    def max_content_length(self):
+        if self._is_upload():
+            return settings.UPLOAD_MAX_REQUEST_BYTES
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self._is_upload():
+            # 格式检查放到提交时进行，解析过程中抛出的 ValueError 会被静默忽略
+            # 记录打开的写入器，解析中途出错时由 close_upload_writers 清理临时文件
+            if getattr(self, '_upload_writers', None) is None:
+                self._upload_writers = UploadWriterSet(get_upload_store())
+            return self._upload_writers.open_writer(filename or '')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+    def close_upload_writers(self):
+        """关闭本次请求打开的上传写入器，删除未提交的临时文件"""
+        writers = getattr(self, '_upload_writers', None)
+        if writers is not None:
+            writers.close_all()
+
 
 # 配置Flask应用
 app = Flask(__name__)
+app.request_class = UploadRequest
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# 配置日志：日志经内存队列由后台线程写入，请求线程不做文件I/O
+setup_logging()
 logger = logging.getLogger(__name__)
 
+VALID_ACADEMIC_LEVELS = ['本科', '硕士', '博士']
+VALID_COUNTRIES = ['中国', '美国', '英国', '澳大利亚', '加拿大', '日本', '欧洲']
+VALID_PROPOSAL_MODES = ['single', 'sections']
+VALID_KEYWORD_MODES = ['llm', 'local', 'hybrid']
+
+# 客户端指定的请求ID同时用作性能分析目录名，只接受安全字符
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def parse_variants(raw_variants):
+    """
+    解析请求中的 variants 参数
+
+    Args:
+        raw_variants: [{"academicLevel": "硕士", "country": "中国"}, ...]
+
+    Returns:
+        Tuple[Optional[List[Tuple[str, str]]], Optional[str]]: (变体列表, 错误信息)，参数有效时错误信息为None
+    """
+    if not isinstance(raw_variants, list) or not raw_variants:
+        return None, 'variants 必须是非空数组'
+    if len(raw_variants) > settings.VARIANTS_MAX:
+        return None, f'单次请求最多 {settings.VARIANTS_MAX} 个变体'
+    variants = []
+    for item in raw_variants:
+        if not isinstance(item, dict):
+            return None, 'variants 的每一项必须包含 academicLevel 和 country'
+        academic_level = item.get('academicLevel', '硕士')
+        country = item.get('country', '中国')
+        if academic_level not in VALID_ACADEMIC_LEVELS:
+            return None, f'学术层次必须是以下之一: {", ".join(VALID_ACADEMIC_LEVELS)}'
+        if country not in VALID_COUNTRIES:
+            return None, f'国家必须是以下之一: {", ".join(VALID_COUNTRIES)}'
+        variants.append((academic_level, country))
+    return variants, None
+
+
+def validate_generation_options(academic_level, country, proposal_mode=None, keyword_mode=None, deadline_seconds=None):
+    """
+    校验生成参数，单条生成、详细生成和批量任务的每个条目共用
+
+    Returns:
+        Optional[str]: 错误信息，参数有效时为None
+    """
+    if academic_level not in VALID_ACADEMIC_LEVELS:
+        return f'学术层次必须是以下之一: {", ".join(VALID_ACADEMIC_LEVELS)}'
+    if country not in VALID_COUNTRIES:
+        return f'国家必须是以下之一: {", ".join(VALID_COUNTRIES)}'
+    if proposal_mode is not None and proposal_mode not in VALID_PROPOSAL_MODES:
+        return f'生成模式必须是以下之一: {", ".join(VALID_PROPOSAL_MODES)}'
+    if keyword_mode is not None and keyword_mode not in VALID_KEYWORD_MODES:
+        return f'关键词模式必须是以下之一: {", ".join(VALID_KEYWORD_MODES)}'
+    if deadline_seconds is not None and (
+        isinstance(deadline_seconds, bool)
+        or not isinstance(deadline_seconds, (int, float))
+        or deadline_seconds <= 0
+    ):
+        return '截止时间必须是正数（秒）'
+    return None
+
+
+def is_admin_request():
+    """请求携带了正确的管理令牌（X-Admin-Token）；未配置令牌时始终为False"""
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(settings.PROFILE_ADMIN_TOKEN) and hmac.compare_digest(token, settings.PROFILE_ADMIN_TOKEN)
+
+
+def requested_profile_dir():
+    """
+    请求头 X-Profile: 1 时开启本次请求的性能分析
+
+    Returns:
+        tuple: (保存目录, None)；未开启时为 (None, None)；令牌不正确时为 (None, 403响应)
+    """
+    if (request.headers.get('X-Profile') or '').strip().lower() not in ('1', 'true', 'yes', 'on'):
+        return None, None
+    if not is_admin_request():
+        return None, (jsonify({
+            'code': 403,
+            'message': '开启性能分析需要有效的管理令牌',
+            'data': None
+        }), 403)
+    g.profile_id = current_request_id()
+    return os.path.join(settings.PROFILE_DIR, g.profile_id), None
+
+
+def failure_status(result):
+    """生成失败的HTTP状态码：因请求截止时间到达而失败时为504，其他为500"""
+    return 504 if result.get('deadline_exceeded') else 500
+
+
+def stream_json_response(payload, status=200):
+    """
+    逐块编码的JSON响应（分块传输），不在内存中生成完整的响应体；客户端接受gzip时逐块压缩
+
+    响应体在视图返回后才生成，stream_with_context 让请求上下文（包括日志的请求ID）保持到输出结束。
+    """
+    use_gzip = settings.STREAM_GZIP_ENABLED and bool(request.accept_encodings['gzip'])
+    response = Response(stream_with_context(stream_json(payload, use_gzip)), status=status, mimetype='application/json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def variants_response(title, details, result, detailed=False):
+    """多变体生成结果的响应：每个变体单独保存报告，部分变体失败时仍返回成功的变体"""
+    if result['status'] == 'error':
+        return jsonify({
+            'code': failure_status(result),
+            'message': result.get('message', '生成失败'),
+            'data': None
+        }), failure_status(result)
+
+    def save_variant(academic_level, country, variant):
+        return save_report(title, details, academic_level, country, {
+            **variant,
+            'zhihu_research': result['zhihu_research'],
+            'arxiv_papers': result['arxiv_papers'],
+            'research': result['research']
+        })
+
+    response_variants = {}
+    for key, variant in result['variants'].items():
+        academic_level, country = split_variant_key(key)
+        if variant['status'] == 'success':
+            # 流式输出时报告在编码到 reportId 时才保存，不推迟首字节
+            report_id = Deferred(lambda level=academic_level, c=country, v=variant: save_variant(level, c, v)) \
+                if detailed else save_variant(academic_level, country, variant)
+            variant = dict(variant, reportId=report_id)
+        response_variants[key] = variant
+
+    data = {'variants': response_variants}
+    if detailed:
+        data['zhihu_research'] = result['zhihu_research']
+        data['arxiv_papers'] = result['arxiv_papers']
+        data['research_sources'] = {
+            'zhihu_count': len(result['zhihu_research']),
+            'arxiv_count': len(result['arxiv_papers'])
+        }
+    else:
+        data['zhihu_research_count'] = len(result['zhihu_research'])
+        data['arxiv_papers_count'] = len(result['arxiv_papers'])
+    payload = {
+        'code': 200,
+        'message': '生成成功' if result['status'] == 'success' else result['message'],
+        'data': data
+    }
+    if detailed:
+        # 详细结果包含所有知乎页面和论文，流式输出
+        return stream_json_response(payload)
+    return jsonify(payload), 200
+
+@app.before_request
+def start_warmup():
+    """
+    第一个请求到达时在后台开始预热（已开始或已完成时不做任何事）
+
+    不在导入 app 时启动线程：测试和 flask 命令行不应触发预热，
+    gunicorn --preload 在 fork 前导入的线程也不会带到工作进程里。
+    """
+    warmup = get_warmup()
+    if warmup.status == "pending":
+        warmup.start()
+
+@app.before_request
+def bind_request_id():
+    """为每个请求分配请求ID（可由 X-Request-ID 请求头指定），该请求的所有日志都带上这个ID"""
+    request_id = (request.headers.get('X-Request-ID') or '').strip()
+    if not REQUEST_ID_PATTERN.match(request_id) or request_id.strip('.') == '':
+        request_id = uuid.uuid4().hex
+    g.log_context = log_context(request_id=request_id)
+    g.log_context.__enter__()
+
+@app.after_request
+def add_request_id_header(response):
+    request_id = current_request_id()
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    if g.get('profile_id'):
+        response.headers['X-Profile-Id'] = g.profile_id
+    return response
+
+@app.teardown_request
+def unbind_request_id(exc):
+    context = g.pop('log_context', None)
+    if context is not None:
+        context.__exit__(None, None, None)
+
+@app.teardown_request
+def close_upload_writers(exc):
+    # 上传超过大小限制等错误会中断 multipart 解析，留下未关闭的临时文件
+    request.close_upload_writers()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -25,6 +258,81 @@ def health_check():
         'message': '学术论文生成服务运行正常'
     }), 200
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查：启动预热完成前返回503，返回各上游的预热耗时"""
+    report = get_warmup().report()
+    return jsonify({
+        'code': 200 if report['ready'] else 503,
+        'message': '服务已就绪' if report['ready'] else '服务预热中',
+        'data': report
+    }), 200 if report['ready'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_snapshot():
+    """运行指标：上游调用次数、重试次数、耗时、模型调用排队等"""
+    return jsonify({
+        'code': 200,
+        'message': 'success',
+        'data': {
+            **metrics.snapshot(),
+            'llm_scheduler': get_llm_scheduler().stats()
+        }
+    }), 200
+
+@app.route('/uploads', methods=['POST'])
+def upload_files():
+    """
+    上传材料文件，返回可在 materialFiles 中代替文件路径使用的文件ID
+    
+    支持两种方式:
+    1. multipart/form-data，可包含多个文件字段
+    2. 请求体直接为文件内容（可使用 chunked 传输），文件名通过 filename 查询参数或 X-File-Name 请求头提供
+    """
+    store = get_upload_store()
+    try:
+        uploaded = []
+        if request.mimetype == 'multipart/form-data':
+            for _, file_storage in request.files.items(multi=True):
+                uploaded.append(store.commit(file_storage.stream))
+        else:
+            filename = request.args.get('filename') or request.headers.get('X-File-Name')
+            if not filename:
+                return jsonify({
+                    'code': 400,
+                    'message': '请通过 filename 参数或 X-File-Name 请求头提供文件名',
+                    'data': None
+                }), 400
+            uploaded.append(store.save_stream(request.stream, filename))
+    except UploadTooLarge as e:
+        return jsonify({
+            'code': 413,
+            'message': str(e),
+            'data': None
+        }), 413
+    except ValueError as e:
+        return jsonify({
+            'code': 400,
+            'message': str(e),
+            'data': None
+        }), 400
+    
+    if not uploaded:
+        return jsonify({
+            'code': 400,
+            'message': '未收到文件',
+            'data': None
+        }), 400
+    
+    logger.info(f"收到上传文件: {[(f['fileName'], f['size']) for f in uploaded]}")
+    return jsonify({
+        'code': 200,
+        'message': '上传成功',
+        'data': {
+            'files': [{k: f[k] for k in ('fileId', 'fileName', 'size', 'sha256')} for f in uploaded]
+        }
+    }), 200
+
 @app.route('/generate_academic_report', methods=['POST'])
 def generate():
     """
@@ -36,7 +344,9 @@ def generate():
         "details": "研究方案详情", 
         "academicLevel": "本科|硕士|博士",
         "country": "中国|美国|英国|澳大利亚|加拿大|日本|欧洲",
-        "materialFiles": ["文件路径1", "文件路径2"]  // 可选
+        "materialFiles": ["文件路径1", "文件路径2"],  // 可选
+        "variants": [{"academicLevel": "硕士", "country": "中国"}, ...],  // 可选，提供时忽略 academicLevel/country
+        "previousReportId": "上一次返回的reportId"  // 可选，增量生成，只重新执行输入变化的阶段
     }
     """
     try:
@@ -56,6 +366,11 @@ def generate():
         academic_level = data.get('academicLevel', '硕士')
         country = data.get('country', '中国')
         material_files = data.get('materialFiles', [])
+        proposal_mode = data.get('proposalMode')
+        keyword_mode = data.get('keywordMode')
+        deadline_seconds = data.get('deadlineSeconds')
+        raw_variants = data.get('variants')
+        previous_report_id = data.get('previousReportId')
         
         # 参数验证
         if not title and not details:
@@ -65,41 +380,75 @@ def generate():
                 'data': None
             }), 400
         
-        # 验证学术层次
-        valid_levels = ['本科', '硕士', '博士']
-        if academic_level not in valid_levels:
+        # 验证学术层次、国家、生成模式、关键词模式和截止时间
+        error = validate_generation_options(academic_level, country, proposal_mode, keyword_mode, deadline_seconds)
+        if error:
             return jsonify({
                 'code': 400,
-                'message': f'学术层次必须是以下之一: {", ".join(valid_levels)}',
+                'message': error,
                 'data': None
             }), 400
         
-        # 验证国家
-        valid_countries = ['中国', '美国', '英国', '澳大利亚', '加拿大', '日本', '欧洲']
-        if country not in valid_countries:
+        # 验证多变体
+        variants = None
+        if raw_variants is not None:
+            variants, error = parse_variants(raw_variants)
+            if error:
+                return jsonify({
+                    'code': 400,
+                    'message': error,
+                    'data': None
+                }), 400
+        
+        # 增量生成的上一次报告
+        if previous_report_id is not None and get_report_store().find(previous_report_id) is None:
             return jsonify({
                 'code': 400,
-                'message': f'国家必须是以下之一: {", ".join(valid_countries)}',
+                'message': f'上一次的报告不存在: {previous_report_id}',
+                'data': None
+            }), 400
+        
+        # 上传文件ID替换为本地文件
+        try:
+            material_files = get_upload_store().resolve_material_files(material_files)
+        except KeyError as e:
+            return jsonify({
+                'code': 400,
+                'message': f'上传文件不存在: {e.args[0]}',
                 'data': None
             }), 400
         
         logger.info(f"收到生成请求 - 标题: {title[:50]}..., 学术层次: {academic_level}, 国家: {country}")
         
-        # 调用生成函数
-        result = generate_academic_report_api(
-            title=title,
-            details=details,
-            academic_level=academic_level,
-            country=country,
-            material_files=material_files
-        )
+        # 调用生成函数，请求开启性能分析时在采样分析下执行
+        profile_dir, error_response = requested_profile_dir()
+        if error_response:
+            return error_response
+        with profile_scope(profile_dir, settings.PROFILE_SAMPLE_INTERVAL):
+            result = generate_academic_report_api(
+                title=title,
+                details=details,
+                academic_level=academic_level,
+                country=country,
+                material_files=material_files,
+                proposal_mode=proposal_mode,
+                keyword_mode=keyword_mode,
+                deadline_seconds=deadline_seconds,
+                variants=variants,
+                previous_report_id=previous_report_id
+            )
+        
+        if variants:
+            return variants_response(title, details, result)
         
         if result['status'] == 'success':
             response_data = {
                 'proposal': result['proposal'],
                 'experiment_design': result['experiment_design'],
                 'zhihu_research_count': len(result.get('zhihu_research', [])),
-                'arxiv_papers_count': len(result.get('arxiv_papers', []))
+                'arxiv_papers_count': len(result.get('arxiv_papers', [])),
+                'reused_stages': result.get('reused_stages', []),
+                'reportId': save_report(title, details, academic_level, country, result)
             }
             
             return jsonify({
@@ -109,20 +458,21 @@ def generate():
             }), 200
         else:
             return jsonify({
-                'code': 500,
+                'code': failure_status(result),
                 'message': result.get('message', '生成失败'),
                 'data': None
-            }), 500
+            }), failure_status(result)
             
     except Exception as e:
         logger.error(f"生成过程中发生错误: {str(e)}")
         logger.error(traceback.format_exc())
         
+        status = 504 if isinstance(e, DeadlineExceeded) else 500
         return jsonify({
-            'code': 500,
+            'code': status,
             'message': f'服务器内部错误: {str(e)}',
             'data': None
-        }), 500
+        }), status
 
 @app.route('/generate_academic_report_detailed', methods=['POST'])
 def generate_detailed():
@@ -146,6 +496,11 @@ def generate_detailed():
         academic_level = data.get('academicLevel', '硕士')
         country = data.get('country', '中国')
         material_files = data.get('materialFiles', [])
+        proposal_mode = data.get('proposalMode')
+        keyword_mode = data.get('keywordMode')
+        deadline_seconds = data.get('deadlineSeconds')
+        raw_variants = data.get('variants')
+        previous_report_id = data.get('previousReportId')
         
         # 参数验证（与上面相同）
         if not title and not details:
@@ -155,19 +510,68 @@ def generate_detailed():
                 'data': None
             }), 400
         
+        error = validate_generation_options(academic_level, country, proposal_mode, keyword_mode, deadline_seconds)
+        if error:
+            return jsonify({
+                'code': 400,
+                'message': error,
+                'data': None
+            }), 400
+        
+        variants = None
+        if raw_variants is not None:
+            variants, error = parse_variants(raw_variants)
+            if error:
+                return jsonify({
+                    'code': 400,
+                    'message': error,
+                    'data': None
+                }), 400
+        
+        # 增量生成的上一次报告
+        if previous_report_id is not None and get_report_store().find(previous_report_id) is None:
+            return jsonify({
+                'code': 400,
+                'message': f'上一次的报告不存在: {previous_report_id}',
+                'data': None
+            }), 400
+        
+        # 上传文件ID替换为本地文件
+        try:
+            material_files = get_upload_store().resolve_material_files(material_files)
+        except KeyError as e:
+            return jsonify({
+                'code': 400,
+                'message': f'上传文件不存在: {e.args[0]}',
+                'data': None
+            }), 400
+        
         logger.info(f"收到详细生成请求 - 标题: {title[:50]}..., 学术层次: {academic_level}, 国家: {country}")
         
-        # 调用生成函数
-        result = generate_academic_report_api(
-            title=title,
-            details=details,
-            academic_level=academic_level,
-            country=country,
-            material_files=material_files
-        )
+        # 调用生成函数，请求开启性能分析时在采样分析下执行
+        profile_dir, error_response = requested_profile_dir()
+        if error_response:
+            return error_response
+        with profile_scope(profile_dir, settings.PROFILE_SAMPLE_INTERVAL):
+            result = generate_academic_report_api(
+                title=title,
+                details=details,
+                academic_level=academic_level,
+                country=country,
+                material_files=material_files,
+                proposal_mode=proposal_mode,
+                keyword_mode=keyword_mode,
+                deadline_seconds=deadline_seconds,
+                variants=variants,
+                previous_report_id=previous_report_id
+            )
+        
+        if variants:
+            return variants_response(title, details, result, detailed=True)
         
         if result['status'] == 'success':
-            return jsonify({
+            # 包含所有知乎页面和论文，流式输出，不在内存中生成完整的响应体
+            return stream_json_response({
                 'code': 200,
                 'message': '生成成功',
                 'data': {
@@ -178,25 +582,195 @@ def generate_detailed():
                     'research_sources': {
                         'zhihu_count': len(result.get('zhihu_research', [])),
                         'arxiv_count': len(result.get('arxiv_papers', []))
-                    }
+                    },
+                    'reused_stages': result.get('reused_stages', []),
+                    # 最后一个键：前面的内容发送后才保存报告，保存不计入首字节时间
+                    'reportId': Deferred(lambda: save_report(title, details, academic_level, country, result))
                 }
-            }), 200
+            })
         else:
             return jsonify({
-                'code': 500,
+                'code': failure_status(result),
                 'message': result.get('message', '生成失败'),
                 'data': None
-            }), 500
+            }), failure_status(result)
             
     except Exception as e:
         logger.error(f"详细生成过程中发生错误: {str(e)}")
         logger.error(traceback.format_exc())
         
+        status = 504 if isinstance(e, DeadlineExceeded) else 500
         return jsonify({
-            'code': 500,
+            'code': status,
             'message': f'服务器内部错误: {str(e)}',
             'data': None
-        }), 500
+        }), status
+
+@app.route('/batches', methods=['POST'])
+def create_batch():
+    """
+    创建后台批量生成任务
+    
+    请求体格式:
+    {
+        "items": [{"title": "...", "details": "...", "academicLevel": "硕士", "country": "中国"}, ...],
+        "concurrency": 2,  // 可选
+        "profile": false  // 可选，对每个条目做性能分析，需携带管理令牌
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    concurrency = data.get('concurrency')
+    profile = data.get('profile') is True
+    
+    if profile and not is_admin_request():
+        return jsonify({
+            'code': 403,
+            'message': '开启性能分析需要有效的管理令牌',
+            'data': None
+        }), 403
+    
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return jsonify({
+            'code': 400,
+            'message': 'items 必须是非空的对象数组',
+            'data': None
+        }), 400
+    
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        return jsonify({
+            'code': 400,
+            'message': f'单个批量任务最多 {settings.BATCH_MAX_ITEMS} 条',
+            'data': None
+        }), 400
+    
+    if concurrency is not None and (isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency <= 0):
+        return jsonify({
+            'code': 400,
+            'message': '并发数必须是正整数',
+            'data': None
+        }), 400
+    
+    # 每个条目按单条生成接口的规则校验，任务创建后不会再因参数错误失败
+    for index, item in enumerate(items, 1):
+        params = normalize_item(item)
+        if not params['title'] and not params['details']:
+            error = '请提供论文标题或研究方案'
+        else:
+            error = validate_generation_options(
+                params['academic_level'], params['country'],
+                params['proposal_mode'], params['keyword_mode'], params['deadline_seconds']
+            )
+        if error:
+            return jsonify({
+                'code': 400,
+                'message': f'第 {index} 条: {error}',
+                'data': None
+            }), 400
+    
+    job_id = get_batch_job_manager().submit(items, concurrency, profile)
+    logger.info(f"创建批量任务 {job_id}，共 {len(items)} 条")
+    return jsonify({
+        'code': 200,
+        'message': '批量任务已创建',
+        'data': {'jobId': job_id, 'total': len(items)}
+    }), 200
+
+@app.route('/batches/<job_id>', methods=['GET'])
+def get_batch(job_id):
+    """批量任务进度和已完成的结果"""
+    manager = get_batch_job_manager()
+    if not manager.exists(job_id):
+        return jsonify({
+            'code': 404,
+            'message': '批量任务不存在',
+            'data': None
+        }), 404
+    
+    # 已完成的结果可能很多，流式输出
+    return stream_json_response({
+        'code': 200,
+        'message': 'success',
+        'data': manager.status(job_id)
+    })
+
+@app.route('/batches/<job_id>/resume', methods=['POST'])
+def resume_batch(job_id):
+    """续跑中断的批量任务（如服务重启后），已成功的条目不会重新生成，失败的条目重试"""
+    manager = get_batch_job_manager()
+    if not manager.exists(job_id):
+        return jsonify({
+            'code': 404,
+            'message': '批量任务不存在',
+            'data': None
+        }), 404
+    
+    started = manager.resume(job_id)
+    return jsonify({
+        'code': 200,
+        'message': '任务已开始续跑' if started else '任务正在运行',
+        'data': {'jobId': job_id}
+    }), 200
+
+@app.route('/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    """
+    获取已生成的报告（含知乎和arXiv资料）
+    
+    报告按内容寻址、不会变化：支持 ETag/If-None-Match 条件请求、
+    Accept-Encoding 协商（可直接返回压缩存储的字节）和 Range 分段下载。
+    """
+    accepted = [encoding for encoding in ('zstd', 'gzip') if request.accept_encodings[encoding]]
+    representation = get_report_store().get_representation(report_id, accepted)
+    if representation is None:
+        return jsonify({
+            'code': 404,
+            'message': '报告不存在',
+            'data': None
+        }), 404
+    
+    body, encoding = representation
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    # 不同编码的字节不同，ETag 需区分编码
+    response.set_etag(f"{report_id}-{encoding or 'identity'}")
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    获取开启性能分析的请求的结果（需携带管理令牌）
+
+    默认返回各阶段耗时和最耗时的函数；format=collapsed 时返回折叠栈文本，可直接用 flamegraph.pl 或 speedscope 打开
+    """
+    if not is_admin_request():
+        return jsonify({
+            'code': 403,
+            'message': '需要有效的管理令牌',
+            'data': None
+        }), 403
+    
+    directory = os.path.join(settings.PROFILE_DIR, profile_id)
+    if not REQUEST_ID_PATTERN.match(profile_id) or not os.path.isdir(directory):
+        return jsonify({
+            'code': 404,
+            'message': '性能分析结果不存在',
+            'data': None
+        }), 404
+    
+    if request.args.get('format') == 'collapsed':
+        with open(os.path.join(directory, 'profile.collapsed'), 'r', encoding='utf-8') as f:
+            return Response(f.read(), mimetype='text/plain')
+    with open(os.path.join(directory, 'profile.json'), 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    return jsonify({
+        'code': 200,
+        'message': 'success',
+        'data': summary
+    }), 200
 
 @app.route('/api_info', methods=['GET'])
 def api_info():
@@ -210,6 +784,21 @@ def api_info():
                 'method': 'GET',
                 'description': '健康检查'
             },
+            '/ready': {
+                'method': 'GET',
+                'description': '就绪检查，启动预热（SDK、连接池、缓存）完成前返回503，包含各上游预热耗时'
+            },
+            '/metrics': {
+                'method': 'GET',
+                'description': '运行指标（上游调用、重试、耗时、模型调用排队）'
+            },
+            '/uploads': {
+                'method': 'POST',
+                'description': '上传材料文件（multipart/form-data 或请求体直接为文件内容），返回文件ID',
+                'parameters': {
+                    'filename': 'string - 文件名，请求体直接为文件内容时使用（也可用 X-File-Name 请求头）'
+                }
+            },
             '/generate_academic_report': {
                 'method': 'POST',
                 'description': '生成开题报告和实验设计',
@@ -218,18 +807,51 @@ def api_info():
                     'details': 'string - 研究方案详情',
                     'academicLevel': 'string - 学术层次（本科/硕士/博士）',
                     'country': 'string - 就读国家',
-                    'materialFiles': 'array - 本地文件路径列表（可选）'
+                    'materialFiles': 'array - 本地文件路径或 /uploads 返回的文件ID列表（可选）',
+                    'proposalMode': 'string - 开题报告生成模式 single/sections（可选）',
+                    'keywordMode': 'string - 搜索关键词来源 llm/local/hybrid（可选）',
+                    'deadlineSeconds': 'number - 整个请求的截止时间（秒，可选）',
+                    'variants': 'array - [{academicLevel, country}]，同一题目按多个组合生成，搜索只做一次（可选）',
+                    'previousReportId': 'string - 上一次返回的 reportId，修改标题或方案后增量生成，复用未变化阶段的结果（可选）'
                 }
             },
             '/generate_academic_report_detailed': {
                 'method': 'POST', 
-                'description': '生成开题报告和实验设计（详细版，包含所有中间结果）',
+                'description': '生成开题报告和实验设计（详细版，包含所有中间结果；分块流式输出，支持gzip）',
                 'parameters': '同上'
+            },
+            '/batches': {
+                'method': 'POST',
+                'description': '创建后台批量生成任务，相同搜索在条目间共享',
+                'parameters': {
+                    'items': 'array - 条目列表，字段同 /generate_academic_report',
+                    'concurrency': 'integer - 同时生成的条目数（可选）',
+                    'profile': 'boolean - 对每个条目做性能分析，结果保存在任务目录的 profiles/ 下，需 X-Admin-Token（可选）'
+                }
+            },
+            '/batches/<jobId>': {
+                'method': 'GET',
+                'description': '批量任务进度和已完成的结果（分块流式输出，支持gzip）'
+            },
+            '/batches/<jobId>/resume': {
+                'method': 'POST',
+                'description': '续跑中断的批量任务，失败的条目重新生成'
+            },
+            '/profiles/<profileId>': {
+                'method': 'GET',
+                'description': '性能分析结果（需 X-Admin-Token）；生成接口带 X-Profile: 1 请求头时开启，响应头 X-Profile-Id 即为 profileId',
+                'parameters': {
+                    'format': 'string - collapsed 时返回火焰图折叠栈文本（可选）'
+                }
+            },
+            '/reports/<reportId>': {
+                'method': 'GET',
+                'description': '获取生成接口返回的 reportId 对应的完整报告，支持 ETag、压缩协商和 Range'
             }
         },
         'supported_file_formats': ['PDF', 'DOCX', 'DOC'],
-        'supported_academic_levels': ['本科', '硕士', '博士'],
-        'supported_countries': ['中国', '美国', '英国', '澳大利亚', '加拿大', '日本', '欧洲']
+        'supported_academic_levels': VALID_ACADEMIC_LEVELS,
+        'supported_countries': VALID_COUNTRIES
     }
     
     return jsonify(info), 200
@@ -252,6 +874,15 @@ def method_not_allowed(error):
         'data': None
     }), 405
 
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    """413错误处理"""
+    return jsonify({
+        'code': 413,
+        'message': '上传内容超过大小限制',
+        'data': None
+    }), 413
+
 @app.errorhandler(500)
 def internal_error(error):
     """500错误处理"""
@@ -264,4 +895,6 @@ def internal_error(error):
 
 if __name__ == '__main__':
     logger.info("启动学术论文生成服务（简化版）")
+    # 服务启动时立即在后台预热，不等第一个请求
+    get_warmup().start()
     app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file
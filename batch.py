@@ -0,0 +1,330 @@
+"""
+批量生成开题报告和实验设计
+
+从JSONL读取条目（每行一个JSON对象，字段同 /generate_academic_report 接口），有界并发生成，
+每完成一条就追加写入结果文件；中断后用相同参数重新运行，会跳过结果文件中已成功的行，
+失败的行（上游错误、超时、限流等）重新生成。
+各条目的知乎/arXiv搜索通过搜索缓存共享，并发的相同搜索只请求一次。
+
+命令行用法:
+    python batch.py input.jsonl output.jsonl --concurrency 2
+"""
+import os
+import json
+import uuid
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from main import generate_academic_report_api
+from utils.log_pipeline import setup_logging
+from utils.profiling import profile_scope
+from utils.report_store import save_report
+
+logger = logging.getLogger('batch')
+
+# ================================ 读写JSONL ================================
+
+
+def read_items(input_path: str) -> List[Tuple[int, Any]]:
+    """
+    读取输入文件
+
+    Returns:
+        List[Tuple[int, Any]]: (行号, 条目)，行号从1开始；无法解析的行条目为 None
+    """
+    items = []
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append((line_no, json.loads(line)))
+            except json.JSONDecodeError:
+                items.append((line_no, None))
+    return items
+
+
+def load_completed(output_path: str) -> Set[int]:
+    """
+    读取结果文件中已成功的行号
+
+    失败的行不算完成，续跑时重新生成；崩溃时写了一半的最后一行会被忽略并重新生成。
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if record.get("status") == "success":
+                    completed.add(record["line"])
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                continue
+    return completed
+
+
+def truncate_partial_line(output_path: str):
+    """截掉崩溃时写了一半的最后一行，保证后续追加的记录从新行开始"""
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def _first_present(raw: Dict[str, Any], *keys: str) -> Any:
+    """按顺序返回第一个存在的字段值（包括 0、空字符串等需要校验的值），都不存在时返回None"""
+    for key in keys:
+        if key in raw:
+            return raw[key]
+    return None
+
+
+def normalize_item(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """把输入条目转换为 generate_academic_report_api 的参数，兼容驼峰和下划线字段名"""
+    return {
+        "title": str(raw.get("title") or "").strip(),
+        "details": str(raw.get("details") or "").strip(),
+        "academic_level": raw.get("academicLevel") or raw.get("academic_level") or raw.get("level") or "硕士",
+        "country": raw.get("country") or "中国",
+        "material_files": raw.get("materialFiles") or raw.get("material_files") or [],
+        "proposal_mode": _first_present(raw, "proposalMode", "proposal_mode"),
+        "keyword_mode": _first_present(raw, "keywordMode", "keyword_mode"),
+        "deadline_seconds": _first_present(raw, "deadlineSeconds", "deadline_seconds"),
+        "previous_report_id": raw.get("previousReportId") or raw.get("previous_report_id"),
+    }
+
+
+# ================================ 批量执行 ================================
+
+
+def generate_item(params: Dict[str, Any], profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    """生成单个条目，返回写入结果文件的记录（不含行号）；提供 profile_dir 时在采样分析下生成"""
+    record = {
+        "input": {
+            "title": params["title"],
+            "details": params["details"],
+            "academicLevel": params["academic_level"],
+            "country": params["country"],
+        }
+    }
+    if profile_dir:
+        record["profile"] = profile_dir
+    try:
+        with profile_scope(profile_dir, settings.PROFILE_SAMPLE_INTERVAL):
+            result = generate_academic_report_api(**params)
+    except Exception as e:
+        logger.error(f"批量条目生成失败: {str(e)}")
+        record.update({"status": "error", "message": str(e)})
+        return record
+
+    if result.get("status") != "success":
+        record.update({"status": "error", "message": result.get("message", "生成失败")})
+        return record
+
+    record.update({
+        "status": "success",
+        "proposal": result["proposal"],
+        "experiment_design": result["experiment_design"],
+        "zhihu_research_count": len(result.get("zhihu_research", [])),
+        "arxiv_papers_count": len(result.get("arxiv_papers", [])),
+        "reportId": save_report(params["title"], params["details"], params["academic_level"], params["country"], result),
+    })
+    return record
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: Optional[int] = None,
+    profile_dir: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    批量生成
+
+    结果按完成顺序逐行追加到 output_path，每行包含输入行号 line；
+    结果文件中已成功的行直接跳过，失败的行重新生成并追加新的记录，因此中断后重新运行即可续跑。
+    同一批次中参数完全相同的条目只生成一次。
+
+    Args:
+        input_path (str): 输入JSONL路径
+        output_path (str): 结果JSONL路径
+        concurrency (Optional[int]): 同时生成的条目数，默认读取配置
+        profile_dir (Optional[str]): 提供时对每个条目做性能分析，结果保存在 <profile_dir>/line-<行号>/
+
+    Returns:
+        Dict[str, int]: total/skipped（此前已成功）/succeeded/failed 条数
+    """
+    concurrency = concurrency or settings.BATCH_CONCURRENCY
+    items = read_items(input_path)
+    truncate_partial_line(output_path)
+    completed = load_completed(output_path)
+    stats = {"total": len(items), "skipped": 0, "succeeded": 0, "failed": 0}
+
+    # 按参数分组，相同条目共享一次生成
+    groups: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+    invalid: List[Tuple[int, str]] = []
+    for line_no, raw in items:
+        if line_no in completed:
+            stats["skipped"] += 1
+            continue
+        if not isinstance(raw, dict):
+            invalid.append((line_no, "无法解析的JSON行"))
+            continue
+        params = normalize_item(raw)
+        if not params["title"] and not params["details"]:
+            invalid.append((line_no, "请提供论文标题或研究方案"))
+            continue
+        key = json.dumps(params, ensure_ascii=False, sort_keys=True)
+        groups.setdefault(key, (params, []))[1].append(line_no)
+
+    logger.info(f"批量生成：共 {stats['total']} 条，已完成 {stats['skipped']} 条，待生成 {len(groups)} 组")
+
+    write_lock = threading.Lock()
+    with open(output_path, 'a', encoding='utf-8') as out:
+
+        def write(line_no: int, record: Dict[str, Any]):
+            with write_lock:
+                out.write(json.dumps({"line": line_no, **record}, ensure_ascii=False) + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+                stats["succeeded" if record["status"] == "success" else "failed"] += 1
+
+        for line_no, message in invalid:
+            write(line_no, {"status": "error", "message": message})
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(
+                    generate_item, params, os.path.join(profile_dir, f"line-{lines[0]}") if profile_dir else None
+                ): lines
+                for params, lines in groups.values()
+            }
+            for future in as_completed(futures):
+                record = future.result()
+                for line_no in futures[future]:
+                    write(line_no, record)
+                logger.info(f"批量进度：成功 {stats['succeeded']}，失败 {stats['failed']}，共 {stats['total']}")
+
+    return stats
+
+
+# ================================ 后台批量任务 ================================
+
+
+class BatchJobManager:
+    """
+    后台批量任务
+
+    每个任务在 <root>/<job_id>/ 下保存 input.jsonl 和 output.jsonl，
+    服务重启后可通过 resume 从结果文件续跑。开启性能分析的任务另有 profiles/ 目录，续跑时同样开启。
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._running: Dict[str, threading.Thread] = {}
+
+    def _paths(self, job_id: str) -> Tuple[str, str]:
+        job_dir = os.path.join(self.root, job_id)
+        return os.path.join(job_dir, "input.jsonl"), os.path.join(job_dir, "output.jsonl")
+
+    def _profile_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id, "profiles")
+
+    def exists(self, job_id: str) -> bool:
+        return job_id.isalnum() and os.path.exists(self._paths(job_id)[0])
+
+    def submit(self, items: List[Dict[str, Any]], concurrency: Optional[int] = None, profile: bool = False) -> str:
+        """保存输入并在后台开始生成，返回任务ID；profile 为True时对每个条目做性能分析"""
+        job_id = uuid.uuid4().hex
+        input_path, _ = self._paths(job_id)
+        os.makedirs(os.path.dirname(input_path), exist_ok=True)
+        if profile:
+            os.makedirs(self._profile_dir(job_id), exist_ok=True)
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.resume(job_id, concurrency)
+        return job_id
+
+    def resume(self, job_id: str, concurrency: Optional[int] = None) -> bool:
+        """在后台运行（或续跑）任务，任务已在运行时返回False"""
+        input_path, output_path = self._paths(job_id)
+        profile_dir = self._profile_dir(job_id)
+        profile_dir = profile_dir if os.path.isdir(profile_dir) else None
+        with self._lock:
+            thread = self._running.get(job_id)
+            if thread is not None and thread.is_alive():
+                return False
+
+            def run():
+                try:
+                    run_batch(input_path, output_path, concurrency, profile_dir)
+                except Exception as e:
+                    logger.error(f"批量任务 {job_id} 失败: {str(e)}")
+
+            thread = threading.Thread(target=run, name=f"batch-{job_id[:8]}", daemon=True)
+            self._running[job_id] = thread
+            thread.start()
+            return True
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """任务进度和已完成的结果；续跑重新生成的行只保留最新的记录"""
+        input_path, output_path = self._paths(job_id)
+        total = len(read_items(input_path))
+        latest: Dict[Any, Dict[str, Any]] = {}
+        if os.path.exists(output_path):
+            with open(output_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(record, dict):
+                        latest[record.get("line")] = record
+        results = list(latest.values())
+        with self._lock:
+            thread = self._running.get(job_id)
+            running = thread is not None and thread.is_alive()
+        return {
+            "jobId": job_id,
+            "total": total,
+            "completed": len(results),
+            "failed": sum(1 for r in results if r.get("status") != "success"),
+            "running": running,
+            "results": sorted(results, key=lambda r: r.get("line", 0)),
+        }
+
+
+_job_manager: Optional[BatchJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_batch_job_manager() -> BatchJobManager:
+    """获取全局批量任务管理器"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = BatchJobManager(settings.BATCH_DIR)
+    return _job_manager
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量生成开题报告和实验设计")
+    parser.add_argument("input", help="输入JSONL文件，每行包含 title/details/academicLevel/country")
+    parser.add_argument("output", help="结果JSONL文件，已存在时从中断处续跑，失败的行重新生成")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时生成的条目数")
+    parser.add_argument("--profile-dir", default=None, help="对每个条目做性能分析，结果保存到该目录")
+    args = parser.parse_args()
+
+    setup_logging()
+    print(json.dumps(run_batch(args.input, args.output, args.concurrency, args.profile_dir), ensure_ascii=False))
@@ -0,0 +1,96 @@
+"""
+启动耗时基准
+
+在全新的Python进程中导入模块（默认 main 和 app），多次运行取中位数，
+并用 -X importtime 的输出列出累计耗时最多的模块，用于确认模型SDK等重依赖没有在导入时加载。
+
+命令行用法:
+    python benchmark_startup.py --runs 5 --top 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        List[Tuple[str, int]]: (模块名, 累计耗时微秒)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|", 2)
+            entries.append((name.strip(), int(cumulative)))
+        except ValueError:
+            continue
+    return entries
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """在新进程中导入模块一次，返回墙钟耗时和各模块导入耗时"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+        return {"ok": False, "seconds": elapsed, "error": errors[-1] if errors else f"exit {proc.returncode}"}
+    return {"ok": True, "seconds": elapsed, "imports": parse_importtime(proc.stderr)}
+
+
+def benchmark(module: str, runs: int, top: int) -> Dict[str, Any]:
+    """
+    多次冷启动导入模块
+
+    Args:
+        module (str): 模块名
+        runs (int): 运行次数
+        top (int): 列出累计耗时最多的模块数
+
+    Returns:
+        Dict[str, Any]: 中位数耗时（秒）和最慢的模块（毫秒）；导入失败时包含错误信息
+    """
+    results = [measure_import(module) for _ in range(runs)]
+    failed = [r for r in results if not r["ok"]]
+    if failed:
+        return {"module": module, "status": "error", "error": failed[0]["error"]}
+
+    # 取中位数那一次的逐模块耗时，排除被测模块自身
+    results.sort(key=lambda r: r["seconds"])
+    median_run = results[len(results) // 2]
+    slowest = sorted(
+        ((name, us) for name, us in median_run["imports"] if name != module),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+    return {
+        "module": module,
+        "status": "success",
+        "median_seconds": round(statistics.median(r["seconds"] for r in results), 3),
+        "min_seconds": round(results[0]["seconds"], 3),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="测量 main/app 的冷启动导入耗时")
+    parser.add_argument("modules", nargs="*", default=["main", "app"], help="要测量的模块")
+    parser.add_argument("--runs", type=int, default=5, help="每个模块的运行次数")
+    parser.add_argument("--top", type=int, default=10, help="列出累计耗时最多的模块数")
+    args = parser.parse_args()
+
+    for name in args.modules:
+        print(json.dumps(benchmark(name, max(1, args.runs), args.top), ensure_ascii=False, indent=2))
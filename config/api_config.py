@@ -0,0 +1,91 @@
+import os
+from typing import Dict, Any, List, Tuple
+
+# ================================ 任务类别 ================================
+
+# 调用方按任务类别声明需求，由分级配置决定使用哪些模型
+TASK_EXTRACT = "extract"                # 关键词、提纲等小型结构化输出
+TASK_SHORT_GENERATE = "short_generate"  # 单个章节等中等长度生成
+TASK_LONG_GENERATE = "long_generate"    # 完整开题报告、实验设计等长文本生成
+
+# ================================ 模型分级 ================================
+
+# providers:   按优先级排列的 (提供商, 模型) 备用链
+# timeout:     单次调用超时（秒）
+# max_tokens:  最大输出token数
+# latency_slo: 期望延迟（秒），超出时记录告警
+# max_rounds:  备用链最多轮询几轮
+MODEL_TIERS: Dict[str, Dict[str, Any]] = {
+    TASK_EXTRACT: {
+        "providers": [
+            ("gemini", "gemini-1.5-flash"),
+            ("openai", "gpt-4o-mini"),
+            ("siliconflow", "Qwen/Qwen2.5-7B-Instruct"),
+            ("qwen", "qwen-turbo"),
+            ("claude", "claude-3-haiku-20240307"),
+        ],
+        "timeout": 20,
+        "max_tokens": 512,
+        "latency_slo": 5,
+        "max_rounds": 1,
+    },
+    TASK_SHORT_GENERATE: {
+        "providers": [
+            ("gemini", "gemini-1.5-flash"),
+            ("openai", "gpt-4o-mini"),
+            ("siliconflow", "Qwen/Qwen2.5-32B-Instruct"),
+            ("qwen", "qwen-plus"),
+            ("claude", "claude-3-haiku-20240307"),
+        ],
+        "timeout": 60,
+        "max_tokens": 2000,
+        "latency_slo": 30,
+        "max_rounds": 2,
+    },
+    TASK_LONG_GENERATE: {
+        "providers": [
+            ("gemini", "gemini-1.5-pro"),
+            ("openai", "gpt-4o"),
+            ("siliconflow", "Qwen/Qwen2.5-72B-Instruct"),
+            ("qwen", "qwen-max"),
+            ("claude", "claude-3-5-sonnet-20240620"),
+        ],
+        "timeout": 120,
+        "max_tokens": 8000,
+        "latency_slo": 90,
+        "max_rounds": 2,
+    },
+}
+
+
+def _parse_providers(value: str) -> List[Tuple[str, str]]:
+    """解析 "gemini:gemini-1.5-flash,openai:gpt-4o-mini" 格式的备用链"""
+    providers = []
+    for item in value.split(','):
+        if ':' in item:
+            provider, model = item.split(':', 1)
+            providers.append((provider.strip(), model.strip()))
+    return providers
+
+
+# 环境变量覆盖，如 LLM_TIER_EXTRACT_PROVIDERS / LLM_TIER_EXTRACT_TIMEOUT / LLM_TIER_EXTRACT_MAX_TOKENS
+for _task, _tier in MODEL_TIERS.items():
+    _prefix = f"LLM_TIER_{_task.upper()}_"
+    if os.getenv(_prefix + "PROVIDERS"):
+        _tier["providers"] = _parse_providers(os.getenv(_prefix + "PROVIDERS")) or _tier["providers"]
+    for _key in ("timeout", "max_tokens", "latency_slo", "max_rounds"):
+        if os.getenv(_prefix + _key.upper()):
+            _tier[_key] = int(os.getenv(_prefix + _key.upper()))
+
+
+def get_model_tier(task: str) -> Dict[str, Any]:
+    """
+    获取任务类别对应的模型分级配置
+
+    Args:
+        task (str): 任务类别
+
+    Returns:
+        Dict[str, Any]: 分级配置，未知类别时返回长文本生成配置
+    """
+    return MODEL_TIERS.get(task, MODEL_TIERS[TASK_LONG_GENERATE])
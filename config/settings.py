@@ -0,0 +1,267 @@
+import os
+
+# 所有运行参数均可通过环境变量覆盖，未设置时使用下方默认值
+
+
+def _get_list(name: str, default: str):
+    """读取逗号分隔的环境变量为列表"""
+    return [item.strip() for item in os.getenv(name, default).split(',') if item.strip()]
+
+
+def _get_mapping(name: str, default: str, cast=int):
+    """读取 "key:value,key:value" 格式的环境变量为字典"""
+    mapping = {}
+    for item in _get_list(name, default):
+        if ':' in item:
+            key, value = item.split(':', 1)
+            mapping[key.strip()] = cast(value.strip())
+    return mapping
+
+
+def _get_bool(name: str, default: bool) -> bool:
+    """读取布尔型环境变量"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# ================================ 日志 ================================
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+# json：每行一条JSON记录（含请求ID和阶段）；text：原有的文本格式
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+
+# 日志文件，按大小轮转；设置为空时只输出到标准错误
+LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(20 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+# 待写入日志的队列长度，写入跟不上时丢弃新日志而不阻塞请求线程
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+
+# ================================ 性能分析 ================================
+
+# 请求头 X-Profile 或批量任务 profile 参数开启单次采样分析时需携带的管理令牌（X-Admin-Token），为空时禁用
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN', '')
+
+# 单个请求的分析结果保存目录（<目录>/<请求ID>/）；批量任务保存在任务目录的 profiles/ 下
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+# 采样间隔（秒）
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+
+
+# ================================ 截止时间 ================================
+
+# 单个请求从开始到返回的总预算（秒），各阶段和上游调用共享该预算
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '600'))
+
+# with_timeout 共享线程池的线程数上限
+TIMEOUT_EXECUTOR_WORKERS = int(os.getenv('TIMEOUT_EXECUTOR_WORKERS', '16'))
+
+
+# ================================ 重试策略 ================================
+
+# 单次上游调用的最大尝试次数（含首次）
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '3'))
+
+# 指数退避的基础等待和最大等待（秒），实际等待在 [0, 上限] 内随机抖动
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '8'))
+
+# 每个上游的重试预算：重试次数长期不超过请求数的 RATIO 倍，最多积累 BURST 次
+RETRY_BUDGET_RATIO = float(os.getenv('RETRY_BUDGET_RATIO', '0.2'))
+RETRY_BUDGET_BURST = float(os.getenv('RETRY_BUDGET_BURST', '10'))
+
+
+# ================================ 搜索结果缓存 ================================
+
+SEARCH_CACHE_ENABLED = _get_bool('SEARCH_CACHE_ENABLED', True)
+SEARCH_CACHE_PATH = os.getenv('SEARCH_CACHE_PATH', 'cache/search_cache.sqlite3')
+
+# 各来源缓存有效期（秒）：知乎搜索按年份范围、arXiv结果日内变化很小、网页内容更稳定
+SEARCH_CACHE_TTL_TAVILY = float(os.getenv('SEARCH_CACHE_TTL_TAVILY', str(24 * 3600)))
+SEARCH_CACHE_TTL_SERPER = float(os.getenv('SEARCH_CACHE_TTL_SERPER', str(7 * 24 * 3600)))
+SEARCH_CACHE_TTL_ARXIV = float(os.getenv('SEARCH_CACHE_TTL_ARXIV', str(24 * 3600)))
+
+# 过期后仍可先返回旧结果并后台刷新的时间窗口（秒）
+SEARCH_CACHE_STALE_SECONDS = float(os.getenv('SEARCH_CACHE_STALE_SECONDS', str(24 * 3600)))
+
+
+# ================================ 知乎搜索 ================================
+
+# 是否让Tavily在搜索结果中直接返回页面正文；正文缺失或为安全验证页时才用Serper单独抓取
+ZHIHU_TAVILY_RAW_CONTENT = _get_bool('ZHIHU_TAVILY_RAW_CONTENT', True)
+
+# Tavily搜索深度，从低到高逐级尝试，低档结果足够时不再升级
+ZHIHU_SEARCH_TIERS = _get_list('ZHIHU_SEARCH_TIERS', 'basic,advanced')
+
+# 结果充分性：相关度不低于 MIN_RELEVANCE 的结果数达到请求数的 SUFFICIENT_RATIO 即视为足够
+ZHIHU_MIN_RELEVANCE = float(os.getenv('ZHIHU_MIN_RELEVANCE', '0.5'))
+ZHIHU_SUFFICIENT_RATIO = float(os.getenv('ZHIHU_SUFFICIENT_RATIO', '0.6'))
+
+# 是否丢弃近似重复的知乎页面，以及判定为重复的SimHash最大海明距离（64位）
+ZHIHU_DEDUP_ENABLED = _get_bool('ZHIHU_DEDUP_ENABLED', True)
+ZHIHU_DEDUP_MAX_DISTANCE = int(os.getenv('ZHIHU_DEDUP_MAX_DISTANCE', '6'))
+
+
+# ================================ 上传文件检索 ================================
+
+# 上传文件正文总长超过该字符数时，只把最相关的段落放入提示
+RETRIEVAL_MAX_PROMPT_CHARS = int(os.getenv('RETRIEVAL_MAX_PROMPT_CHARS', '12000'))
+
+# 分段长度和相邻段落重叠的字符数
+RETRIEVAL_PASSAGE_CHARS = int(os.getenv('RETRIEVAL_PASSAGE_CHARS', '800'))
+RETRIEVAL_PASSAGE_OVERLAP = int(os.getenv('RETRIEVAL_PASSAGE_OVERLAP', '150'))
+
+# 按文件内容哈希保存的BM25索引目录
+RETRIEVAL_INDEX_DIR = os.getenv('RETRIEVAL_INDEX_DIR', 'cache/retrieval')
+
+# 索引目录的总字节上限，超出时按最近使用时间删除最旧的索引
+RETRIEVAL_INDEX_MAX_BYTES = int(os.getenv('RETRIEVAL_INDEX_MAX_BYTES', str(256 * 1024 * 1024)))
+
+
+# ================================ 请求内存上限 ================================
+
+# 单次请求所有上传文件正文合计的字节上限（UTF-8），超出部分截断，用完后不再解析后续文件
+REQUEST_FILE_TEXT_MAX_BYTES = int(os.getenv('REQUEST_FILE_TEXT_MAX_BYTES', str(4 * 1024 * 1024)))
+
+# 单次请求抓取的网页正文合计的字节上限，以及单个知乎页面的字节上限
+REQUEST_SCRAPED_MAX_BYTES = int(os.getenv('REQUEST_SCRAPED_MAX_BYTES', str(1024 * 1024)))
+ZHIHU_PAGE_MAX_BYTES = int(os.getenv('ZHIHU_PAGE_MAX_BYTES', str(128 * 1024)))
+
+
+# ================================ 文件上传 ================================
+
+# 上传文件保存目录
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', 'uploads')
+
+# 单个文件和单次请求的大小上限（字节）
+UPLOAD_MAX_FILE_BYTES = int(os.getenv('UPLOAD_MAX_FILE_BYTES', str(50 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv('UPLOAD_MAX_REQUEST_BYTES', str(200 * 1024 * 1024)))
+
+# 流式写盘时每块的字节数
+UPLOAD_CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', str(64 * 1024)))
+
+# 允许上传的文件格式，与 file_parser 支持的格式一致
+UPLOAD_ALLOWED_EXTENSIONS = _get_list('UPLOAD_ALLOWED_EXTENSIONS', '.pdf,.docx,.doc')
+
+
+# ================================ 报告存储 ================================
+
+# 生成结果按内容哈希保存的目录，可通过 GET /reports/<id> 重复获取
+REPORT_STORE_DIR = os.getenv('REPORT_STORE_DIR', 'reports')
+
+# 压缩方式：auto（安装了 zstandard 时用 zstd，否则 gzip）/ zstd / gzip
+REPORT_STORE_CODEC = os.getenv('REPORT_STORE_CODEC', 'auto')
+
+
+# ================================ 响应流式输出 ================================
+
+# 详细接口和批量任务结果逐块编码输出（分块传输），每块的大致字节数
+STREAM_JSON_CHUNK_BYTES = int(os.getenv('STREAM_JSON_CHUNK_BYTES', str(64 * 1024)))
+
+# 客户端接受gzip时是否压缩流式响应，以及压缩级别（1-9）
+STREAM_GZIP_ENABLED = _get_bool('STREAM_GZIP_ENABLED', True)
+STREAM_GZIP_LEVEL = int(os.getenv('STREAM_GZIP_LEVEL', '6'))
+
+
+# ================================ 批量生成 ================================
+
+# 后台批量任务的输入和结果目录
+BATCH_DIR = os.getenv('BATCH_DIR', 'batches')
+
+# 同时生成的条目数；各条目内部仍有自己的搜索和生成并行
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '2'))
+
+# 单个批量任务的最大条目数
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '500'))
+
+
+# ================================ 增量生成 ================================
+
+# 修改后的标题和研究方案与上一次的相似度不低于该值时，复用上一次的搜索关键词和搜索结果
+REVISION_SIMILARITY_THRESHOLD = float(os.getenv('REVISION_SIMILARITY_THRESHOLD', '0.85'))
+
+
+# ================================ 模型调用调度 ================================
+
+# 是否通过调度器限制每个模型提供商的并发调用并按任务类别排队
+LLM_SCHEDULER_ENABLED = _get_bool('LLM_SCHEDULER_ENABLED', True)
+
+# 每个提供商的并发调用槽位，可按提供商覆盖，如 "openai:4,claude:2"
+LLM_PROVIDER_SLOTS = int(os.getenv('LLM_PROVIDER_SLOTS', '8'))
+LLM_PROVIDER_SLOT_OVERRIDES = _get_mapping('LLM_PROVIDER_SLOT_OVERRIDES', '')
+
+# 各任务类别排队时的权重，权重越大获得的槽位份额越大
+LLM_CLASS_WEIGHTS = _get_mapping('LLM_CLASS_WEIGHTS', 'extract:8,short_generate:4,long_generate:1', float)
+
+# 每个提供商保留给关键词提取、章节生成等短调用的槽位数，长文本生成不能占用
+LLM_RESERVED_SLOTS = int(os.getenv('LLM_RESERVED_SLOTS', '2'))
+
+
+# ================================ 模型提供商限流 ================================
+
+# 是否在同一主机的所有工作进程之间协调各提供商的并发和配额
+PROVIDER_LIMITS_ENABLED = _get_bool('PROVIDER_LIMITS_ENABLED', True)
+
+# 协调用的SQLite数据库，同一主机的工作进程需指向同一路径
+PROVIDER_LIMITS_PATH = os.getenv('PROVIDER_LIMITS_PATH', 'cache/provider_limits.sqlite3')
+
+# 每个提供商在整台主机上的最大并发调用数，可按提供商覆盖，如 "openai:8,claude:4"
+PROVIDER_MAX_CONCURRENCY = int(os.getenv('PROVIDER_MAX_CONCURRENCY', '16'))
+PROVIDER_CONCURRENCY_OVERRIDES = _get_mapping('PROVIDER_CONCURRENCY_OVERRIDES', '')
+
+# 每个提供商每分钟的请求数和token数配额，如 "openai:500,gemini:300"，未配置的提供商不限制
+PROVIDER_RPM = _get_mapping('PROVIDER_RPM', '')
+PROVIDER_TPM = _get_mapping('PROVIDER_TPM', '')
+
+# 上游仍返回429时，所有工作进程暂停调用该提供商的秒数
+PROVIDER_RATE_LIMIT_COOLDOWN = float(os.getenv('PROVIDER_RATE_LIMIT_COOLDOWN', '10'))
+
+
+# ================================ 连接池和预热 ================================
+
+# 上游HTTP连接池中每个主机保留的连接数，应不小于同一上游的最大并发
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '16'))
+
+# 上游地址，测试或内网部署时可指向本地替身服务
+SILICONFLOW_BASE_URL = os.getenv('SILICONFLOW_BASE_URL', 'https://api.siliconflow.cn/v1')
+SERPER_SCRAPE_URL = os.getenv('SERPER_SCRAPE_URL', 'https://scrape.serper.dev')
+ARXIV_API_URL = os.getenv('ARXIV_API_URL', 'http://export.arxiv.org/api/query')
+
+# 启动时在后台预热（导入SDK、建立连接、加载缓存），完成前 /ready 返回503
+WARMUP_ON_STARTUP = _get_bool('WARMUP_ON_STARTUP', True)
+
+# 每个预热步骤的超时时间（秒），超时或失败的上游不阻止服务就绪
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', '5'))
+
+
+# ================================ 搜索关键词 ================================
+
+# 是否流式生成搜索关键词，并在每个关键词解析出来后立即开始搜索
+STREAM_KEYWORDS = _get_bool('STREAM_KEYWORDS', True)
+
+# 关键词来源：llm（大模型生成）/ local（本地提取，不调用大模型）/ hybrid（本地关键词立即搜索，大模型关键词到达后合并）
+KEYWORD_MODE = os.getenv('KEYWORD_MODE', 'llm')
+
+
+# ================================ 开题报告生成 ================================
+
+# 开题报告生成模式：single（单次整体生成）/ sections（先生成提纲，再分段并行生成）
+PROPOSAL_GENERATION_MODE = os.getenv('PROPOSAL_GENERATION_MODE', 'single')
+
+# 分段生成时各段轮流使用的模型，支持 auto/gemini/openai/claude/qwen/siliconflow
+PROPOSAL_SECTION_PROVIDERS = _get_list('PROPOSAL_SECTION_PROVIDERS', 'auto')
+
+# 分段生成的最大并行数
+PROPOSAL_SECTION_WORKERS = int(os.getenv('PROPOSAL_SECTION_WORKERS', '6'))
+
+# 多变体生成（同一题目多个学术层次/国家组合）时并行生成的变体数
+VARIANT_WORKERS = int(os.getenv('VARIANT_WORKERS', '4'))
+
+# 单次请求最多的变体数
+VARIANTS_MAX = int(os.getenv('VARIANTS_MAX', '8'))
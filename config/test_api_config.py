@@ -0,0 +1,49 @@
+import importlib
+import os
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# 导入模型分级配置
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config import api_config
+from config.api_config import TASK_EXTRACT, TASK_LONG_GENERATE, TASK_SHORT_GENERATE
+
+
+class TestModelTiers(unittest.TestCase):
+
+    def test_task_to_tier(self):
+        """小型抽取任务用更快的模型、更短的超时和输出；未知类别按长文本生成处理"""
+        tiers = api_config.MODEL_TIERS
+        extract, long_generate = api_config.get_model_tier(TASK_EXTRACT), api_config.get_model_tier(TASK_LONG_GENERATE)
+        self.assertIs(extract, tiers[TASK_EXTRACT])
+        self.assertIs(api_config.get_model_tier(TASK_SHORT_GENERATE), tiers[TASK_SHORT_GENERATE])
+        self.assertIs(api_config.get_model_tier("unknown"), long_generate)
+        self.assertLess(extract["timeout"], long_generate["timeout"])
+        self.assertLess(extract["max_tokens"], long_generate["max_tokens"])
+        self.assertEqual(extract["providers"][0], ("gemini", "gemini-1.5-flash"))
+
+    def test_env_overrides(self):
+        """环境变量覆盖备用链和数值配置，格式错误的备用链保留默认值"""
+        overrides = {
+            "LLM_TIER_EXTRACT_PROVIDERS": "openai:gpt-4o-mini, siliconflow:Qwen/Qwen2.5-7B-Instruct",
+            "LLM_TIER_EXTRACT_TIMEOUT": "7",
+            "LLM_TIER_LONG_GENERATE_MAX_TOKENS": "4000",
+            "LLM_TIER_SHORT_GENERATE_PROVIDERS": "invalid",
+        }
+        try:
+            with mock.patch.dict(os.environ, overrides):
+                importlib.reload(api_config)
+                extract = api_config.get_model_tier(TASK_EXTRACT)
+                self.assertEqual(extract["providers"], [("openai", "gpt-4o-mini"), ("siliconflow", "Qwen/Qwen2.5-7B-Instruct")])
+                self.assertEqual(extract["timeout"], 7)
+                self.assertEqual(api_config.get_model_tier(TASK_LONG_GENERATE)["max_tokens"], 4000)
+                self.assertEqual(api_config.get_model_tier(TASK_SHORT_GENERATE)["providers"][0][0], "gemini")
+        finally:
+            # 恢复默认配置，避免影响其他测试
+            importlib.reload(api_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
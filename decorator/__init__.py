@@ -1,4 +1,13 @@
 from .counting_time import counting_time
-from .with_timeout import with_timeout
+from .with_timeout import with_timeout, async_with_timeout
+from .timeout_executor import CancellationToken, TimeoutExecutor, current_cancellation_token, get_timeout_executor
 
-__all__ = ['counting_time', 'with_timeout']
+__all__ = [
+    'counting_time',
+    'with_timeout',
+    'async_with_timeout',
+    'CancellationToken',
+    'TimeoutExecutor',
+    'current_cancellation_token',
+    'get_timeout_executor',
+]
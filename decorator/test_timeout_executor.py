@@ -0,0 +1,109 @@
+import time
+import asyncio
+import threading
+import unittest
+import concurrent.futures
+import sys
+from pathlib import Path
+
+# 导入超时执行器和装饰器
+sys.path.insert(0, str(Path(__file__).parent))
+from timeout_executor import TimeoutExecutor, current_cancellation_token
+from with_timeout import with_timeout, async_with_timeout
+from utils.deadline import DeadlineExceeded, deadline_scope
+
+# 允许的返回延迟误差（秒）
+TOLERANCE = 0.2
+
+
+@with_timeout(timeout_param='timeout')
+def slow_function(timeout=None, sleep_time=1):
+    """不响应取消的慢函数"""
+    time.sleep(sleep_time)
+    return "正常完成"
+
+
+def cooperative_function(stopped: threading.Event, sleep_time=5):
+    """响应取消标记的函数"""
+    token = current_cancellation_token()
+    deadline = time.monotonic() + sleep_time
+    while time.monotonic() < deadline:
+        if token.wait(0.01):
+            stopped.set()
+            return "已取消"
+    return "正常完成"
+
+
+@async_with_timeout(timeout_param='timeout')
+async def async_slow_function(timeout=None, sleep_time=1):
+    await asyncio.sleep(sleep_time)
+    return "正常完成"
+
+
+class TestTimeoutExecutor(unittest.TestCase):
+
+    def test_returns_at_timeout(self):
+        """超时后立即返回，不等待被调用函数结束"""
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            slow_function(timeout=0.3, sleep_time=2)
+        self.assertLess(time.monotonic() - start, 0.3 + TOLERANCE)
+
+    def test_returns_at_deadline(self):
+        """请求截止时间早于函数超时时间时按截止时间返回"""
+        start = time.monotonic()
+        with deadline_scope(0.3):
+            with self.assertRaises(DeadlineExceeded):
+                slow_function(timeout=10, sleep_time=2)
+        self.assertLess(time.monotonic() - start, 0.3 + TOLERANCE)
+
+    def test_cooperative_cancellation(self):
+        """超时后取消标记被置位，协作函数随即退出"""
+        executor = TimeoutExecutor(max_workers=2)
+        stopped = threading.Event()
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            executor.run(cooperative_function, 0.1, (stopped,))
+        self.assertTrue(stopped.wait(1))
+
+    def test_abandoned_accounting(self):
+        """仍在运行的已放弃任务被计数，结束后计数归零"""
+        executor = TimeoutExecutor(max_workers=2)
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            executor.run(time.sleep, 0.1, (0.5,))
+        stats = executor.stats()
+        self.assertEqual(stats["abandoned_running"], 1)
+        self.assertEqual(stats["abandoned_total"], 1)
+        time.sleep(0.6)
+        self.assertEqual(executor.stats()["abandoned_running"], 0)
+
+    def test_threads_reused(self):
+        """多次调用复用线程池，不会持续创建线程"""
+        slow_function(timeout=1, sleep_time=0)
+        before = threading.active_count()
+        for _ in range(50):
+            slow_function(timeout=1, sleep_time=0)
+        self.assertLessEqual(threading.active_count(), before + 1)
+
+    def test_async_returns_at_timeout(self):
+        """异步版本按超时时间返回"""
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            asyncio.run(async_slow_function(timeout=0.3, sleep_time=2))
+        self.assertLess(time.monotonic() - start, 0.3 + TOLERANCE)
+        self.assertEqual(asyncio.run(async_slow_function(timeout=1, sleep_time=0.1)), "正常完成")
+
+    def test_run_async_sync_function(self):
+        """在事件循环中等待同步函数，超时后立即返回"""
+        executor = TimeoutExecutor(max_workers=2)
+
+        async def main():
+            return await executor.run_async(time.sleep, 0.3, (2,))
+
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(main())
+        self.assertLess(time.monotonic() - start, 0.3 + TOLERANCE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import sys
+import asyncio
+import logging
+import threading
+import contextvars
+import concurrent.futures
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from config import settings
+
+logger = logging.getLogger('timeout_executor')
+
+
+class CancellationToken:
+    """
+    协作式取消标记
+
+    线程无法被强制终止，超时后只能通知被调用函数尽快退出；
+    长时间运行的函数应在循环中检查 cancelled 或调用 raise_if_cancelled()。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise concurrent.futures.CancelledError("操作已被取消")
+
+    def wait(self, seconds: float) -> bool:
+        """可被取消打断的休眠，被取消时返回True"""
+        return self._event.wait(seconds)
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    'current_cancellation_token', default=None
+)
+
+
+def current_cancellation_token() -> Optional[CancellationToken]:
+    """在超时执行器中运行时返回当前任务的取消标记，否则返回None"""
+    return _current_token.get()
+
+
+class TimeoutExecutor:
+    """
+    共享的有界超时执行器
+
+    所有带超时的调用复用同一个线程池，避免每次调用创建线程；
+    超时后立即返回调用方，并对仍在后台运行的任务（已放弃的线程）计数。
+    """
+
+    def __init__(self, max_workers: int = 16, name: str = "timeout"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._abandoned_running = 0
+        self._abandoned_total = 0
+        self._timeouts_total = 0
+
+    def submit(self, func: Callable[..., Any], args: tuple = (), kwargs: Optional[Dict[str, Any]] = None):
+        """
+        提交任务，返回 (future, 取消标记)
+
+        任务在调用方上下文的副本中运行，可读取截止时间等上下文变量。
+        参数以元组和字典显式传入，避免与被调用函数自身的 timeout 参数冲突。
+        """
+        kwargs = kwargs or {}
+        token = CancellationToken()
+        context = contextvars.copy_context()
+
+        def task():
+            _current_token.set(token)
+            return func(*args, **kwargs)
+
+        future = self._executor.submit(context.run, task)
+        return future, token
+
+    def run(self, func: Callable[..., Any], timeout: Optional[float], args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        在共享线程池中执行函数，最多等待 timeout 秒
+
+        Raises:
+            concurrent.futures.TimeoutError: 超时，此时任务已被通知取消
+        """
+        future, token = self.submit(func, args, kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            self._abandon(future, token)
+            raise
+
+    async def run_async(self, func: Callable[..., Any], timeout: Optional[float], args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        run 的异步版本：在事件循环中等待共享线程池里的同步函数
+
+        Raises:
+            asyncio.TimeoutError: 超时，此时任务已被通知取消
+        """
+        future, token = self.submit(func, args, kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(future, token)
+            raise
+
+    def _abandon(self, future, token: CancellationToken):
+        """超时后通知取消；尚未开始的任务直接撤销，已在运行的记为放弃"""
+        token.cancel()
+        with self._lock:
+            self._timeouts_total += 1
+        if future.cancel():
+            return
+
+        with self._lock:
+            self._abandoned_running += 1
+            self._abandoned_total += 1
+            running = self._abandoned_running
+        future.add_done_callback(self._on_abandoned_done)
+
+        if running * 2 >= self.max_workers:
+            logger.warning(f"超时执行器中有 {running} 个已放弃的任务仍在运行（线程池上限 {self.max_workers}）")
+
+    def _on_abandoned_done(self, _future):
+        with self._lock:
+            self._abandoned_running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        执行器统计
+
+        Returns:
+            Dict[str, int]: max_workers、abandoned_running（仍在运行的已放弃任务）、
+                            abandoned_total、timeouts_total
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "abandoned_running": self._abandoned_running,
+                "abandoned_total": self._abandoned_total,
+                "timeouts_total": self._timeouts_total,
+            }
+
+
+_shared_executor: Optional[TimeoutExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_timeout_executor() -> TimeoutExecutor:
+    """获取进程内共享的超时执行器"""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_lock:
+            if _shared_executor is None:
+                _shared_executor = TimeoutExecutor(settings.TIMEOUT_EXECUTOR_WORKERS)
+    return _shared_executor
@@ -1,36 +1,79 @@
 import os
+import sys
 import signal
+import asyncio
 import functools
+from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import concurrent.futures
 import threading
 
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from utils.deadline import DeadlineExceeded, remaining_time
+from decorator.timeout_executor import get_timeout_executor
+
 # 定义 with_timeout 装饰器
 def timeout_handler(signum, frame):
     """超时信号处理函数"""
     raise TimeoutError("操作超时")
 
+def _resolve_timeout(func, kwargs, timeout_param, default_seconds):
+    """确定超时时间，并用请求截止时间（utils.deadline）约束，返回 (秒数, 是否受截止时间约束)"""
+    seconds = default_seconds
+    if timeout_param and timeout_param in kwargs:
+        seconds = kwargs[timeout_param]
+    
+    remaining = remaining_time()
+    bound_by_deadline = remaining is not None and (seconds is None or remaining < seconds)
+    if bound_by_deadline:
+        if remaining <= 0:
+            raise DeadlineExceeded(f"函数 {func.__name__} 未执行：请求已超过截止时间")
+        seconds = remaining
+    return seconds, bound_by_deadline
+
+def _timeout_error(func, seconds, bound_by_deadline):
+    if bound_by_deadline:
+        return DeadlineExceeded(f"函数 {func.__name__} 执行超过请求截止时间（剩余{seconds:.1f}秒）")
+    return TimeoutError(f"函数 {func.__name__} 执行超时（{seconds}秒）")
+
 def with_timeout(timeout_param=None, default_seconds=120):
     """函数超时装饰器
     
     修改为始终使用ThreadPoolExecutor实现超时功能，
     因为signal模块只能在主线程中使用。
+    
+    所有调用复用共享的有界线程池（decorator.timeout_executor），
+    超时时间同时受请求截止时间约束；超时后立即返回调用方，
+    被调用函数可通过 current_cancellation_token() 感知取消并尽快退出。
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # 确定超时时间
-            seconds = default_seconds
-            if timeout_param and timeout_param in kwargs:
-                seconds = kwargs[timeout_param]
-            
-            # 使用线程池实现超时
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(func, *args, **kwargs)
-                try:
-                    return future.result(timeout=seconds)
-                except concurrent.futures.TimeoutError:
-                    raise TimeoutError(f"函数 {func.__name__} 执行超时（{seconds}秒）")
+            seconds, bound_by_deadline = _resolve_timeout(func, kwargs, timeout_param, default_seconds)
+            try:
+                return get_timeout_executor().run(func, seconds, args, kwargs)
+            except concurrent.futures.TimeoutError:
+                raise _timeout_error(func, seconds, bound_by_deadline)
+                
+        return wrapper
+    return decorator
+
+def async_with_timeout(timeout_param=None, default_seconds=120):
+    """异步函数超时装饰器
+    
+    用于 async def 函数：超时后取消协程并抛出 TimeoutError；
+    同步函数请在异步代码中使用 get_timeout_executor().run_async。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            seconds, bound_by_deadline = _resolve_timeout(func, kwargs, timeout_param, default_seconds)
+            try:
+                return await asyncio.wait_for(func(*args, **kwargs), seconds)
+            except asyncio.TimeoutError:
+                raise _timeout_error(func, seconds, bound_by_deadline)
                 
         return wrapper
     return decorator
@@ -1,17 +1,20 @@
 import os
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import zipfile
 import xml.etree.ElementTree as ET
 
+from tool.research_records import ByteBudget
+
 logger = logging.getLogger('file_parser')
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(file_path: str, max_chars: Optional[int] = None) -> str:
     """
     从PDF文件中提取文本内容
     
     Args:
         file_path (str): PDF文件路径
+        max_chars (Optional[int]): 提取到该字符数后不再读取后续页面
         
     Returns:
         str: 提取的文本内容
@@ -21,12 +24,16 @@ def extract_text_from_pdf(file_path: str) -> str:
         
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
+            parts = []
+            length = 0
             
             for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+                parts.append(page.extract_text() + "\n")
+                length += len(parts[-1])
+                if max_chars is not None and length >= max_chars:
+                    break
                 
-        return text.strip()
+        return "".join(parts).strip()
     except ImportError:
         logger.error("PyPDF2 not installed. Please install it with: pip install PyPDF2")
         return ""
@@ -34,12 +41,13 @@ def extract_text_from_pdf(file_path: str) -> str:
         logger.error(f"Error reading PDF file {file_path}: {str(e)}")
         return ""
 
-def extract_text_from_docx(file_path: str) -> str:
+def extract_text_from_docx(file_path: str, max_chars: Optional[int] = None) -> str:
     """
     从DOCX文件中提取文本内容
     
     Args:
         file_path (str): DOCX文件路径
+        max_chars (Optional[int]): 提取到该字符数后不再读取后续段落
         
     Returns:
         str: 提取的文本内容
@@ -48,12 +56,16 @@ def extract_text_from_docx(file_path: str) -> str:
         import docx
         
         doc = docx.Document(file_path)
-        text = ""
+        parts = []
+        length = 0
         
         for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
+            parts.append(paragraph.text + "\n")
+            length += len(parts[-1])
+            if max_chars is not None and length >= max_chars:
+                break
             
-        return text.strip()
+        return "".join(parts).strip()
     except ImportError:
         logger.error("python-docx not installed. Please install it with: pip install python-docx")
         return ""
@@ -61,12 +73,13 @@ def extract_text_from_docx(file_path: str) -> str:
         logger.error(f"Error reading DOCX file {file_path}: {str(e)}")
         return ""
 
-def extract_text_from_doc(file_path: str) -> str:
+def extract_text_from_doc(file_path: str, max_chars: Optional[int] = None) -> str:
     """
     从DOC文件中提取文本内容（使用python-docx2txt作为备选方案）
     
     Args:
         file_path (str): DOC文件路径
+        max_chars (Optional[int]): 只保留前该数量的字符（docx2txt 一次返回全文，无法提前停止）
         
     Returns:
         str: 提取的文本内容
@@ -74,6 +87,8 @@ def extract_text_from_doc(file_path: str) -> str:
     try:
         import docx2txt
         text = docx2txt.process(file_path)
+        if text and max_chars is not None:
+            text = text[:max_chars]
         return text.strip() if text else ""
     except ImportError:
         logger.error("docx2txt not installed. Please install it with: pip install docx2txt")
@@ -82,13 +97,14 @@ def extract_text_from_doc(file_path: str) -> str:
         logger.error(f"Error reading DOC file {file_path}: {str(e)}")
         return ""
 
-def parse_local_file(file_path: str, file_type: int) -> Dict[str, Any]:
+def parse_local_file(file_path: str, file_type: int, max_chars: Optional[int] = None) -> Dict[str, Any]:
     """
     解析本地文件
     
     Args:
         file_path (str): 文件路径
         file_type (int): 文件类型 1-开题报告 2-实验设计 3-论文模板 4-论文材料
+        max_chars (Optional[int]): 正文读取到该字符数后停止（PDF按页、DOCX按段落，可能略超出；DOC读取全文后截断）
         
     Returns:
         Dict[str, Any]: 解析结果
@@ -101,11 +117,11 @@ def parse_local_file(file_path: str, file_type: int) -> Dict[str, Any]:
     text_content = ""
     
     if file_extension == '.pdf':
-        text_content = extract_text_from_pdf(file_path)
+        text_content = extract_text_from_pdf(file_path, max_chars)
     elif file_extension == '.docx':
-        text_content = extract_text_from_docx(file_path)
+        text_content = extract_text_from_docx(file_path, max_chars)
     elif file_extension == '.doc':
-        text_content = extract_text_from_doc(file_path)
+        text_content = extract_text_from_doc(file_path, max_chars)
     else:
         logger.error(f"Unsupported file format: {file_extension}")
         return {}
@@ -168,19 +184,44 @@ def extract_paper_metadata(text: str) -> tuple:
     
     return title[:200], abstract[:500]  # 限制长度
 
-def parse_material_files(file_paths: List[str]) -> List[Dict[str, Any]]:
+def infer_file_type(file_name: str) -> int:
+    """
+    根据文件名推断文件类型
+    
+    Args:
+        file_name (str): 文件名或文件路径
+        
+    Returns:
+        int: 文件类型 1-开题报告 2-实验设计 4-论文材料
+    """
+    filename = os.path.basename(file_name).lower()
+    if '开题' in filename or 'proposal' in filename:
+        return 1
+    elif '实验' in filename or 'experiment' in filename:
+        return 2
+    else:
+        return 4  # 默认为论文材料
+
+def parse_material_files(file_paths: List[str], max_bytes: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     批量解析材料文件
     
     Args:
         file_paths (List[str]): 文件路径列表
+        max_bytes (Optional[int]): 所有文件正文合计的字节上限（UTF-8），超出部分截断，
+                                   用完后不再解析后续文件；为空时不限制
         
     Returns:
         List[Dict[str, Any]]: 解析结果列表
     """
     results = []
+    budget = ByteBudget(max_bytes) if max_bytes else None
     
-    for file_path in file_paths:
+    for index, file_path in enumerate(file_paths):
+        if budget is not None and budget.exhausted:
+            logger.warning(f"文件正文已达到 {max_bytes} 字节上限，跳过剩余 {len(file_paths) - index} 个文件")
+            break
+
         if isinstance(file_path, dict):
             # 如果传入的是文件信息字典
             path = file_path.get('filePath', file_path.get('fileKey', ''))
@@ -188,18 +229,14 @@ def parse_material_files(file_paths: List[str]) -> List[Dict[str, Any]]:
         else:
             # 如果传入的是文件路径字符串
             path = file_path
-            # 根据文件名推断类型
-            filename = os.path.basename(path).lower()
-            if '开题' in filename or 'proposal' in filename:
-                file_type = 1
-            elif '实验' in filename or 'experiment' in filename:
-                file_type = 2
-            else:
-                file_type = 4  # 默认为论文材料
+            file_type = infer_file_type(path)
         
         if path:
-            result = parse_local_file(path, file_type)
+            # 字符数不超过字节数，按剩余字节数停止读取足以保证截断后的内容完整
+            result = parse_local_file(path, file_type, budget.remaining() if budget is not None else None)
             if result:
+                if budget is not None:
+                    result['fileContent'] = budget.take(result['fileContent'])
                 results.append(result)
     
     return results 
\ No newline at end of file
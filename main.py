@@ -2,29 +2,30 @@ import json
 import re
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+from config import settings
+from config.api_config import TASK_EXTRACT, TASK_SHORT_GENERATE, TASK_LONG_GENERATE
 from file_parser import parse_material_files
-from api.simple_api import call_llm
+from api.simple_api import call_llm, stream_llm
 from tool.deep_research import search_zhihu
+from tool.dedup import NearDuplicateFilter
+from tool.research_records import ArxivEntry, ByteBudget, ZhihuPage, encode_for_prompt, records_to_dicts
+from tool.retrieval import build_file_context
+from tool.keyword_stream import iter_json_list
+from tool.local_keywords import extract_local_keywords
+from tool.revision import fingerprint_files, plan_revision
+from utils.deadline import DeadlineExceeded, deadline_scope, run_with_context, sleep_within_deadline
+from utils.resilience import retry_call
+from utils.log_pipeline import log_stage, setup_logging
+from utils.metrics import metrics
 from api.arxiv import query_arxiv
+from api.search_cache import cached_search, normalize_keyword_group
+from utils.report_store import get_report_store
 
 # ================================ 配置日志 ================================
 
 logger = logging.getLogger('generate_academic_report')
-logger.setLevel(logging.INFO)
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-file_handler = logging.FileHandler('generate_academic_report.log', encoding='utf-8')
-file_handler.setLevel(logging.INFO)
-
-log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(log_format)
-file_handler.setFormatter(log_format)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
 
 # ================================ 辅助函数 ================================
 
@@ -60,6 +61,16 @@ def extract_jsonList_fromStr(content: str) -> List:
             if isinstance(keywords, list):
                 return keywords
             
+        # 查找最外层的JSON数组格式，兼容嵌套列表和对象
+        json_match = re.search(r'\[.*\]', content, re.DOTALL)
+        if json_match:
+            try:
+                keywords = json.loads(json_match.group(0))
+                if isinstance(keywords, list):
+                    return keywords
+            except json.JSONDecodeError:
+                pass
+            
         # 查找普通的JSON数组格式 [...]
         json_match = re.search(r'\[(.*?)\]', content, re.DOTALL)
         if json_match:
@@ -111,32 +122,226 @@ def extract_markdown_content(text: str) -> str:
         return text
     
 
-# ================================ 主要生成函数 ================================
+# ================================ 关键词搜索 ================================
 
 
-def generate_academic_report(
-    title: str, 
-    details: str, 
-    academic_level: str, 
-    country: str, 
-    material_file_paths: Optional[List[str]] = None
-) -> Dict[str, Any]:
+def _keyword_key(keyword: Any) -> Any:
+    """关键词去重键：忽略大小写和首尾空白，关键词组忽略顺序"""
+    if isinstance(keyword, list):
+        return tuple(sorted(str(k).strip().lower() for k in keyword))
+    return str(keyword).strip().lower()
+
+
+def iter_llm_keywords(prompt: str, timeout: Optional[float] = None) -> Iterator[Any]:
     """
-    学术报告生成函数：生成开题报告和实验设计
+    逐个产出大模型生成的关键词
+    
+    开启 STREAM_KEYWORDS 时流式解析，每个关键词闭合即产出；
+    否则等待完整响应后用 extract_jsonList_fromStr 解析。
+    """
+    if settings.STREAM_KEYWORDS:
+        yield from iter_json_list(stream_llm(prompt, "auto", timeout, task=TASK_EXTRACT))
+    else:
+        yield from extract_jsonList_fromStr(call_llm(prompt, "auto", timeout, task=TASK_EXTRACT))
+
+
+def search_with_keywords(
+    prompt: str,
+    search_func: Callable[[Any], Any],
+    max_workers: int,
+    local_keywords: Optional[List[Any]] = None,
+    keyword_mode: str = "llm",
+    timeout: Optional[float] = None
+) -> Tuple[List[Any], List[Any]]:
+    """
+    获取搜索关键词并执行搜索，每得到一个关键词就立即提交搜索
+    
+    keyword_mode:
+        llm    只使用大模型生成的关键词（流式时与生成过程重叠）
+        local  只使用本地提取的关键词，不调用大模型
+        hybrid 先用本地关键词立即搜索，大模型关键词到达后补充搜索新增部分并合并
     
     Args:
-        title (str): 论文标题
-        details (str): 初步研究方案
-        academic_level (str): 学术层次（本科/硕士/博士）
-        country (str): 就读国家
-        material_file_paths (Optional[List[str]]): 材料文件路径列表
+        prompt (str): 关键词生成提示
+        search_func (Callable): 针对单个关键词的搜索函数
+        max_workers (int): 搜索并行数
+        local_keywords (Optional[List[Any]]): 本地提取的关键词
+        keyword_mode (str): 关键词来源模式
+        timeout (Optional[float]): 关键词生成超时时间，默认使用 extract 分级的超时
+        
+    Returns:
+        Tuple[List[Any], List[Any]]: (关键词列表, 与关键词一一对应的搜索结果，失败项为None)
+    """
+    keywords = []
+    futures = []
+    seen = set()
+    
+    def submit(keyword):
+        if not keyword or _keyword_key(keyword) in seen:
+            return
+        seen.add(_keyword_key(keyword))
+        logger.info(f"收到关键词，立即开始搜索: {keyword}")
+        keywords.append(keyword)
+        futures.append(executor.submit(run_with_context(search_func), keyword))
     
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if keyword_mode in ("local", "hybrid"):
+            for keyword in local_keywords or []:
+                submit(keyword)
+        
+        if keyword_mode != "local":
+            try:
+                for keyword in iter_llm_keywords(prompt, timeout):
+                    submit(keyword)
+            except Exception as e:
+                # 已得到的关键词照常完成搜索
+                if not keywords:
+                    raise
+                logger.warning(f"关键词生成中断，使用已得到的 {len(keywords)} 个关键词: {str(e)}")
+        
+        results = []
+        for keyword, future in zip(keywords, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f"关键词 {keyword} 搜索失败: {str(e)}")
+                results.append(None)
+    
+    return keywords, results
+
+
+# ================================ 分段生成开题报告 ================================
+
+def generate_proposal_outline(context: str, academic_level: str, country: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    通过一次简短调用生成开题报告的章节提纲
+    
+    Args:
+        context (str): 学术背景、参考文献等上下文
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        
     Returns:
-        Dict[str, Any]: 生成结果，包含开题报告和实验设计
+        Optional[List[Dict[str, Any]]]: 章节列表，每项包含 title 和 points；提纲生成失败或无法解析时为None
     """
-    logger.info("开始生成论文开题报告和实验设计")
+    prompt_outline = f"""
+请基于以下信息，为一份{academic_level}学位开题报告设计章节提纲：
+
+{context}
+
+要求：
+1. 章节依次覆盖研究背景、文献综述、研究目标、研究方法、预期成果
+2. 每个章节给出2-4个要点，每个要点不超过30字
+3. 体现{country}学术规范
+
+请只返回JSON格式：
+[{{"title": "章节标题", "points": ["要点1", "要点2"]}}]
+"""
+    try:
+        outline_response = call_llm(prompt_outline, "auto", task=TASK_EXTRACT)
+        outline = extract_jsonList_fromStr(outline_response)
+    except Exception as e:
+        logger.warning(f"提纲生成失败: {str(e)}")
+        return None
+
+    sections = []
+    for item in outline:
+        if isinstance(item, dict) and item.get("title"):
+            points = item.get("points") or []
+            sections.append({
+                "title": str(item["title"]).strip(),
+                "points": [str(p) for p in points] if isinstance(points, list) else [str(points)]
+            })
+        elif isinstance(item, str) and item.strip():
+            sections.append({"title": item.strip(), "points": []})
+
+    if not sections:
+        logger.warning("提纲解析结果为空")
+        return None
+    return sections
+
+
+def generate_proposal_by_sections(
+    title: str,
+    context: str,
+    academic_level: str,
+    country: str
+) -> Optional[str]:
+    """
+    先生成提纲，再并行生成各章节，最后按提纲顺序拼接成完整开题报告
     
-    result = {
+    各章节轮流分配到 settings.PROPOSAL_SECTION_PROVIDERS 中的模型，
+    指定模型失败时回退到自动备用策略。
+    
+    Args:
+        title (str): 论文标题
+        context (str): 学术背景、参考文献、知乎资料等上下文
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        
+    Returns:
+        Optional[str]: Markdown格式的开题报告；没有得到可用的提纲时为None，由调用方改用单次生成
+    """
+    sections = generate_proposal_outline(context, academic_level, country)
+    if not sections:
+        return None
+    logger.info(f"开题报告提纲: {[s['title'] for s in sections]}")
+
+    outline_str = "\n".join(
+        f"{i + 1}. {s['title']}" for i, s in enumerate(sections)
+    )
+    providers = settings.PROPOSAL_SECTION_PROVIDERS or ["auto"]
+
+    def write_section(index: int) -> str:
+        section = sections[index]
+        points_str = "\n".join(f"- {p}" for p in section["points"]) or "（自行确定）"
+        prompt_section = f"""
+请为开题报告撰写其中一个章节：
+
+{context}
+
+完整提纲：
+{outline_str}
+
+当前章节：{section['title']}
+章节要点：
+{points_str}
+
+要求：
+1. 只撰写当前章节，不要重复其他章节的内容
+2. 符合{academic_level}学位论文标准，体现{country}学术规范
+3. 以二级标题 "## {section['title']}" 开头，输出Markdown格式
+
+请直接输出该章节内容。
+"""
+        provider = providers[index % len(providers)]
+        try:
+            response = call_llm(prompt_section, provider, task=TASK_SHORT_GENERATE)
+        except Exception as e:
+            if provider == "auto":
+                raise
+            logger.warning(f"章节 {section['title']} 使用 {provider} 生成失败，改用自动策略: {str(e)}")
+            response = call_llm(prompt_section, "auto", task=TASK_SHORT_GENERATE)
+
+        content = extract_markdown_content(response).strip()
+        if not content.startswith("#"):
+            content = f"## {section['title']}\n\n{content}"
+        return content
+
+    workers = max(1, min(settings.PROPOSAL_SECTION_WORKERS, len(sections)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map 按提交顺序返回结果，保证拼接顺序与提纲一致
+        contents = list(executor.map(run_with_context(write_section), range(len(sections))))
+
+    header = f"# {title}开题报告\n\n" if title else ""
+    return header + "\n\n".join(contents) + "\n"
+
+
+# ================================ 主要生成函数 ================================
+
+
+def _new_result() -> Dict[str, Any]:
+    return {
         "proposal": "",
         "experiment_design": "",
         "zhihu_research": [],
@@ -144,34 +349,113 @@ def generate_academic_report(
         "status": "success",
         "message": ""
     }
-    
-    try:
-        input_dict = {"学术层次": academic_level, "就读国家": country}
-        
-        # ================================ 解析上传文件 ================================
-        
-        parsed_files = []
-        if material_file_paths:
-            logger.info(f"开始解析 {len(material_file_paths)} 个本地文件")
-            parsed_files = parse_material_files(material_file_paths)
-            logger.info(f"成功解析 {len(parsed_files)} 个文件")
-        
-        # 分类解析的文件
-        proposal_files = [f for f in parsed_files if f.get('fileBizType') == 1]
-        experiment_files = [f for f in parsed_files if f.get('fileBizType') == 2]
-        paper_files = [f for f in parsed_files if f.get('fileBizType') == 4]
 
-        # ================================ 搜索补充材料 ================================
-        
-        logger.info("开始搜索知乎补充材料")
-        zhihu_result = []
-        
-        if title and details:
-            input_dict["学位论文标题"] = title
-            input_dict["初步研究方案"] = details
-            
-            # 生成搜索关键词
-            prompt_search_keywords = f"""
+
+def _mark_failed(result: Dict[str, Any], message: str, error: Exception) -> Dict[str, Any]:
+    """把结果标记为失败；因截止时间到达而失败时 deadline_exceeded 为True，接口据此返回504"""
+    result["status"] = "error"
+    result["message"] = message
+    result["deadline_exceeded"] = isinstance(error, DeadlineExceeded)
+    return result
+
+
+def _research_snapshot(research: Dict[str, Any]) -> Dict[str, Any]:
+    """随报告保存的研究阶段信息，供下一次增量生成比对和复用"""
+    return {
+        "keywords": research["keywords"],
+        "paper_keywords": research["paper_keywords"],
+        "files": research["files"],
+    }
+
+
+def load_previous_report(previous_report_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    """读取增量生成的上一次报告，不存在或读取失败时返回None（退回完整生成）"""
+    if not previous_report_id:
+        return None
+    try:
+        previous = get_report_store().load(previous_report_id)
+    except Exception as e:
+        logger.warning(f"读取上一次的报告失败: {str(e)}")
+        return None
+    if previous is None:
+        logger.warning(f"上一次的报告不存在: {previous_report_id}，完整生成")
+    return previous
+
+
+@log_stage("research")
+def run_research_stage(
+    title: str,
+    details: str,
+    academic_level: str,
+    material_file_paths: Optional[List[str]] = None,
+    keyword_mode: Optional[str] = None,
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    研究阶段：解析上传文件，搜索知乎补充材料和arXiv参考文献
+    
+    结果与就读国家无关（学术层次只用于调整知乎搜索关键词），可被多个生成变体共享。
+    提供上一次的报告时，标题和方案变化不大的搜索直接复用上一次的关键词和结果。
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        academic_level (str): 学术层次
+        material_file_paths (Optional[List[str]]): 材料文件路径列表
+        keyword_mode (Optional[str]): 搜索关键词来源 llm/local/hybrid，默认读取配置
+        previous (Optional[Dict[str, Any]]): 上一次的报告，用于增量生成
+    
+    Returns:
+        Dict[str, Any]: proposal_files/experiment_files（上传的开题报告和实验设计）、
+                        zhihu_result/paper_info（用于提示的资料）、zhihu_result_str/paper_info_str
+                        （编码后放入提示的资料，各阶段和变体共用）、keywords/paper_keywords（搜索关键词）、
+                        zhihu_research/arxiv_papers（返回给调用方的搜索结果，ZhihuPage/ArxivEntry 记录）、
+                        files（上传文件指纹）、previous（上一次的报告）
+    """
+    research = {"keywords": [], "paper_keywords": [], "zhihu_research": [], "arxiv_papers": []}
+    
+    # ================================ 解析上传文件 ================================
+
+    parsed_files = []
+    if material_file_paths:
+        logger.info(f"开始解析 {len(material_file_paths)} 个本地文件")
+        parsed_files = parse_material_files(material_file_paths, settings.REQUEST_FILE_TEXT_MAX_BYTES)
+        logger.info(f"成功解析 {len(parsed_files)} 个文件")
+
+    # 分类解析的文件
+    proposal_files = [f for f in parsed_files if f.get('fileBizType') == 1]
+    experiment_files = [f for f in parsed_files if f.get('fileBizType') == 2]
+    paper_files = [f for f in parsed_files if f.get('fileBizType') == 4]
+    research["files"] = {
+        "proposal": fingerprint_files(proposal_files),
+        "experiment": fingerprint_files(experiment_files),
+        "paper": fingerprint_files(paper_files),
+    }
+    research["previous"] = previous
+    reuse = plan_revision(previous, title, details, academic_level, "", research["files"]) if previous else {}
+
+    # ================================ 搜索补充材料 ================================
+
+    logger.info("开始搜索知乎补充材料")
+    zhihu_result = []
+
+    # 本地提取关键词只需几毫秒，llm 模式下不使用
+    mode_of_keywords = keyword_mode or settings.KEYWORD_MODE
+    local_keywords = {"zhihu": [], "arxiv": []}
+    if mode_of_keywords in ("local", "hybrid"):
+        local_keywords = extract_local_keywords(title, details)
+        logger.info(f"本地提取的关键词: {local_keywords}")
+
+    if reuse.get("zhihu"):
+        # 标题和方案只有小幅修改，复用上一次的关键词和搜索结果
+        zhihu_result = [ZhihuPage.from_dict(page) for page in previous["zhihu_research"]]
+        research["keywords"] = previous["research"]["keywords"]
+        research["zhihu_research"] = zhihu_result
+        metrics.increment("revision_reuse", {"stage": "zhihu"})
+        logger.info(f"复用上一次的知乎搜索结果 {len(zhihu_result)} 条")
+    elif title and details:
+        # 生成搜索关键词
+        prompt_search_keywords = f"""
 根据以下信息生成3个最适合在知乎搜索的关键词，用于收集相关技术资料：
 
 论文标题：{title}
@@ -186,27 +470,56 @@ def generate_academic_report(
 请只返回JSON格式的关键词列表：
 ["关键词1", "关键词2", "关键词3"]
 """
-            
-            try:
-                keywords_response = call_llm(prompt_search_keywords, "auto", 60)
-                keywords = extract_jsonList_fromStr(keywords_response)
-                
-                if keywords:
-                    logger.info(f"生成的搜索关键词: {keywords}")
-                    zhihu_result = search_zhihu(keywords, 3)  # 每个关键词搜索3个结果
-                    result["zhihu_research"] = zhihu_result
-                    logger.info(f"知乎搜索完成，获得 {len(zhihu_result)} 条结果")
-            except Exception as e:
-                logger.error(f"知乎搜索失败: {str(e)}")
-        
-        # ================================ 搜索参考文献 ================================
-        
-        logger.info("开始搜索arXiv参考文献")
-        paper_info = []
+    
+        # 转载和引用的回答内容几乎相同，各关键词的搜索线程共用一个近重复过滤器
+        dedup = NearDuplicateFilter(settings.ZHIHU_DEDUP_MAX_DISTANCE) if settings.ZHIHU_DEDUP_ENABLED else None
+        # 抓取的正文按单页和整个请求的字节上限截断，各关键词的搜索线程共用一个预算
+        scraped_budget = ByteBudget(settings.REQUEST_SCRAPED_MAX_BYTES, settings.ZHIHU_PAGE_MAX_BYTES)
+    
+        try:
+            # 每个关键词搜索3个结果，关键词一出现就开始搜索
+            keywords, zhihu_pages = search_with_keywords(
+                prompt_search_keywords,
+                lambda keyword: search_zhihu([keyword], 3, dedup, scraped_budget),
+                max_workers=3,
+                local_keywords=local_keywords["zhihu"],
+                keyword_mode=mode_of_keywords
+            )
+            for pages in zhihu_pages:
+                zhihu_result.extend(pages or [])
         
-        if not paper_files and title and details:
-            # 生成论文搜索关键词组合
-            prompt_paper_keywords = f"""
+            if keywords:
+                logger.info(f"生成的搜索关键词: {keywords}")
+                research["keywords"] = keywords
+                research["zhihu_research"] = zhihu_result
+                logger.info(f"知乎搜索完成，获得 {len(zhihu_result)} 条结果")
+            if dedup is not None:
+                dedup_stats = dedup.stats()
+                metrics.observe("zhihu_dedup_bytes_saved", dedup_stats["bytes_saved"])
+                metrics.observe("zhihu_dedup_tokens_saved", dedup_stats["tokens_saved"])
+                logger.info(
+                    f"知乎近重复页面去重：丢弃 {dedup_stats['dropped']} 个页面，"
+                    f"节省 {dedup_stats['bytes_saved']} 字节、约 {dedup_stats['tokens_saved']} tokens"
+                )
+            if scraped_budget.truncated_chars:
+                logger.info(f"知乎页面正文超过字节上限，截断 {scraped_budget.truncated_chars} 个字符")
+        except Exception as e:
+            logger.error(f"知乎搜索失败: {str(e)}")
+
+    # ================================ 搜索参考文献 ================================
+
+    logger.info("开始搜索arXiv参考文献")
+    paper_info = []
+
+    if reuse.get("arxiv"):
+        paper_info = [ArxivEntry.from_dict(entry) for entry in previous["arxiv_papers"]]
+        research["paper_keywords"] = previous["research"]["paper_keywords"]
+        research["arxiv_papers"] = paper_info
+        metrics.increment("revision_reuse", {"stage": "arxiv"})
+        logger.info(f"复用上一次的arXiv搜索结果 {len(paper_info)} 篇")
+    elif not paper_files and title and details:
+        # 生成论文搜索关键词组合
+        prompt_paper_keywords = f"""
 根据以下信息生成2组英文关键词组合，用于在arXiv搜索相关论文：
 
 论文标题：{title}
@@ -220,45 +533,105 @@ def generate_academic_report(
 请只返回JSON格式：
 [["keyword1", "keyword2"], ["keyword3", "keyword4"]]
 """
-            
-            try:
-                paper_keywords_response = call_llm(prompt_paper_keywords, "auto", 60)
-                paper_keywords = extract_jsonList_fromStr(paper_keywords_response)
-                
-                if paper_keywords:
-                    logger.info(f"生成的论文搜索关键词: {paper_keywords}")
-                    
-                    for keyword_group in paper_keywords:
-                        try:
-                            arxiv_result = query_arxiv(keyword_group)
-                            if arxiv_result and "entries" in arxiv_result:
-                                paper_info.extend(arxiv_result["entries"])
-                                time.sleep(2)  # 避免频繁请求
-                        except Exception as e:
-                            logger.warning(f"arXiv搜索失败: {str(e)}")
-                    
-                    result["arxiv_papers"] = paper_info
-                    logger.info(f"arXiv搜索完成，获得 {len(paper_info)} 篇论文")
-            except Exception as e:
-                logger.error(f"arXiv搜索失败: {str(e)}")
-        else:
-            # 使用上传的论文文件
-            paper_info = paper_files
     
-        # ================================ 生成开题报告 ================================
-        
-        logger.info("开始生成开题报告")
-        
-        # 准备输入数据
-        input_dict_str = json.dumps(input_dict, ensure_ascii=False, indent=4)
-        paper_info_str = json.dumps(paper_info, ensure_ascii=False, indent=4)
-        zhihu_result_str = json.dumps(zhihu_result, ensure_ascii=False, indent=4)
+        def search_arxiv_group(keyword_group):
+            if isinstance(keyword_group, str):
+                keyword_group = [keyword_group]
+            fetched = []
+
+            def fetch():
+                fetched.append(True)
+                return retry_call("arxiv", query_arxiv, (keyword_group,))
+
+            # 关键词组与顺序无关，归一化后作为缓存键；命中缓存时无需等待请求间隔
+            arxiv_result = cached_search("arxiv", list(normalize_keyword_group(keyword_group)), fetch)
+            if fetched:
+                sleep_within_deadline(2)  # 避免频繁请求
+            return arxiv_result
+    
+        try:
+            # 单线程依次查询，保持arXiv请求间隔，同时与关键词生成重叠
+            paper_keywords, arxiv_results = search_with_keywords(
+                prompt_paper_keywords,
+                search_arxiv_group,
+                max_workers=1,
+                local_keywords=local_keywords["arxiv"],
+                keyword_mode=mode_of_keywords
+            )
         
-        if proposal_files:
-            # 如果有上传的开题报告，进行润色优化
-            proposal_str = json.dumps(proposal_files, ensure_ascii=False, indent=None)
+            if paper_keywords:
+                logger.info(f"生成的论文搜索关键词: {paper_keywords}")
             
-            prompt_proposal = f"""
+                # 不同关键词组可能命中同一篇论文，按id去重
+                seen_papers = set()
+                for arxiv_result in arxiv_results:
+                    if arxiv_result and "entries" in arxiv_result:
+                        for entry in arxiv_result["entries"]:
+                            if entry.get("id") not in seen_papers:
+                                seen_papers.add(entry.get("id"))
+                                paper_info.append(ArxivEntry.from_dict(entry))
+            
+                research["paper_keywords"] = paper_keywords
+                research["arxiv_papers"] = paper_info
+                logger.info(f"arXiv搜索完成，获得 {len(paper_info)} 篇论文")
+        except Exception as e:
+            logger.error(f"arXiv搜索失败: {str(e)}")
+    else:
+        # 使用上传的论文文件，过长时只保留与题目相关的段落
+        paper_info = build_file_context(paper_files, f"{title} {details}")
+
+    research.update({
+        "proposal_files": proposal_files,
+        "experiment_files": experiment_files,
+        "zhihu_result": zhihu_result,
+        "paper_info": paper_info,
+        # 提示中的资料只编码一次，开题报告、实验设计和各变体共用
+        "zhihu_result_str": encode_for_prompt(zhihu_result),
+        "paper_info_str": encode_for_prompt(paper_info),
+    })
+    return research
+
+
+@log_stage("proposal")
+def generate_proposal_stage(
+    title: str,
+    details: str,
+    academic_level: str,
+    country: str,
+    research: Dict[str, Any],
+    proposal_mode: Optional[str] = None
+) -> str:
+    """
+    生成（或润色上传的）开题报告
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        research (Dict[str, Any]): run_research_stage 的返回值
+        proposal_mode (Optional[str]): 开题报告生成模式 single/sections，默认读取配置
+    
+    Returns:
+        str: Markdown格式的开题报告
+    """
+    # 准备输入数据
+    input_dict = {"学术层次": academic_level, "就读国家": country}
+    if title and details:
+        input_dict["学位论文标题"] = title
+        input_dict["初步研究方案"] = details
+    proposal_files = research["proposal_files"]
+    input_dict_str = json.dumps(input_dict, ensure_ascii=False, indent=4)
+    paper_info_str = research["paper_info_str"]
+    zhihu_result_str = research["zhihu_result_str"]
+
+    if proposal_files:
+        # 如果有上传的开题报告，进行润色优化
+        # 长文档只放入与题目、方案和开题各章节相关的段落，提示长度有上限
+        proposal_context = build_file_context(proposal_files, f"{title} {details} 研究背景 研究目标 研究内容 研究方法")
+        proposal_str = json.dumps(proposal_context, ensure_ascii=False, indent=None)
+    
+        prompt_proposal = f"""
 请基于以下信息，对现有开题报告进行专业润色和完善：
 
 学术背景：{input_dict_str}
@@ -274,9 +647,9 @@ def generate_academic_report(
 
 请直接输出润色后的开题报告，无需解释过程。
 """
-        else:
-            # 从头生成开题报告
-            prompt_proposal = f"""
+    else:
+        # 从头生成开题报告
+        prompt_proposal = f"""
 请基于以下信息生成一份专业的学术开题报告：
 
 学术背景：{input_dict_str}
@@ -292,27 +665,43 @@ def generate_academic_report(
 
 请直接输出完整的开题报告。
 """
-        
-        try:
-            proposal_response = call_llm(prompt_proposal, "auto", 120)
-            proposal = extract_markdown_content(proposal_response)
-            result["proposal"] = proposal
-            logger.info("开题报告生成完成")
-        except Exception as e:
-            logger.error(f"开题报告生成失败: {str(e)}")
-            result["status"] = "error"
-            result["message"] = f"开题报告生成失败: {str(e)}"
-            return result
-        
-        # ================================ 生成实验设计 ================================
-        
-        logger.info("开始生成实验设计")
-        
-        if experiment_files:
-            # 如果有上传的实验设计，进行优化
-            experiment_str = json.dumps(experiment_files, ensure_ascii=False, indent=None)
-            
-            prompt_experiment = f"""
+
+    mode = proposal_mode or settings.PROPOSAL_GENERATION_MODE
+
+    if mode == "sections" and not proposal_files:
+        # 先提纲后分段并行生成，耗时接近最长章节
+        context = f"学术背景：{input_dict_str}\n参考文献：{paper_info_str}\n知乎技术资料：{zhihu_result_str}"
+        proposal = generate_proposal_by_sections(title, context, academic_level, country)
+        if proposal is not None:
+            return proposal
+        logger.warning("没有可用的提纲，改用单次生成开题报告")
+    proposal_response = call_llm(prompt_proposal, "auto", task=TASK_LONG_GENERATE)
+    return extract_markdown_content(proposal_response)
+
+
+@log_stage("experiment")
+def generate_experiment_stage(title: str, details: str, proposal: str, research: Dict[str, Any]) -> str:
+    """
+    基于开题报告生成（或优化上传的）实验设计
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        proposal (str): 开题报告
+        research (Dict[str, Any]): run_research_stage 的返回值
+    
+    Returns:
+        str: Markdown格式的实验设计
+    """
+    experiment_files = research["experiment_files"]
+    zhihu_result_str = research["zhihu_result_str"]
+
+    if experiment_files:
+        # 如果有上传的实验设计，进行优化
+        experiment_context = build_file_context(experiment_files, f"{title} {details} 实验设计 实验步骤 数据收集 分析方法")
+        experiment_str = json.dumps(experiment_context, ensure_ascii=False, indent=None)
+    
+        prompt_experiment = f"""
 请基于以下开题报告和现有实验设计，进行优化和完善：
 
 开题报告：{proposal}
@@ -326,9 +715,9 @@ def generate_academic_report(
 
 请直接输出优化后的实验设计。
 """
-        else:
-            # 从头生成实验设计
-            prompt_experiment = f"""
+    else:
+        # 从头生成实验设计
+        prompt_experiment = f"""
 请基于以下开题报告生成详细的实验设计方案：
 
 开题报告：{proposal}
@@ -343,26 +732,211 @@ def generate_academic_report(
 
 请直接输出完整的实验设计方案。
 """
-        
+
+    experiment_response = call_llm(prompt_experiment, "auto", task=TASK_LONG_GENERATE)
+    return extract_markdown_content(experiment_response)
+
+
+def run_generation_stage(
+    title: str,
+    details: str,
+    academic_level: str,
+    country: str,
+    research: Dict[str, Any],
+    proposal_mode: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    生成阶段：基于研究阶段的结果生成开题报告和实验设计
+    
+    研究阶段带有上一次的报告时，输入未变化的开题报告和实验设计直接复用。
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        research (Dict[str, Any]): run_research_stage 的返回值
+        proposal_mode (Optional[str]): 开题报告生成模式 single/sections，默认读取配置
+    
+    Returns:
+        Dict[str, Any]: 生成结果，包含开题报告和实验设计；搜索结果（zhihu_research/arxiv_papers）
+                        由调用方转换一次后填入，多个变体不重复转换
+    """
+    result = _new_result()
+    result["research"] = _research_snapshot(research)
+    
+    previous = research.get("previous")
+    reuse = plan_revision(previous, title, details, academic_level, country, research["files"]) if previous else {}
+    result["reused_stages"] = [stage for stage, reused in reuse.items() if reused]
+    
+    # ================================ 生成开题报告 ================================
+
+    if reuse.get("proposal"):
+        result["proposal"] = proposal = previous["proposal"]
+        metrics.increment("revision_reuse", {"stage": "proposal"})
+        logger.info("输入未变化，复用上一次的开题报告")
+    else:
+        logger.info("开始生成开题报告")
         try:
-            experiment_response = call_llm(prompt_experiment, "auto", 120)
-            experiment_design = extract_markdown_content(experiment_response)
-            result["experiment_design"] = experiment_design
+            proposal = generate_proposal_stage(title, details, academic_level, country, research, proposal_mode)
+            result["proposal"] = proposal
+            logger.info("开题报告生成完成")
+        except Exception as e:
+            logger.error(f"开题报告生成失败: {str(e)}")
+            return _mark_failed(result, f"开题报告生成失败: {str(e)}", e)
+
+    # ================================ 生成实验设计 ================================
+
+    if reuse.get("experiment"):
+        result["experiment_design"] = previous["experiment_design"]
+        metrics.increment("revision_reuse", {"stage": "experiment"})
+        logger.info("输入未变化，复用上一次的实验设计")
+    else:
+        logger.info("开始生成实验设计")
+        try:
+            result["experiment_design"] = generate_experiment_stage(title, details, proposal, research)
             logger.info("实验设计生成完成")
         except Exception as e:
             logger.error(f"实验设计生成失败: {str(e)}")
-            result["status"] = "error"
-            result["message"] = f"实验设计生成失败: {str(e)}"
+            return _mark_failed(result, f"实验设计生成失败: {str(e)}", e)
+
+    return result
+
+
+def generate_academic_report(
+    title: str, 
+    details: str, 
+    academic_level: str, 
+    country: str, 
+    material_file_paths: Optional[List[str]] = None,
+    proposal_mode: Optional[str] = None,
+    keyword_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    previous_report_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    学术报告生成函数：生成开题报告和实验设计
+    
+    提供上一次的报告ID时增量生成：只重新执行输入发生变化的阶段，结果中的 reused_stages 列出复用的阶段。
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        academic_level (str): 学术层次（本科/硕士/博士）
+        country (str): 就读国家
+        material_file_paths (Optional[List[str]]): 材料文件路径列表
+        proposal_mode (Optional[str]): 开题报告生成模式 single/sections，默认读取配置
+        keyword_mode (Optional[str]): 搜索关键词来源 llm/local/hybrid，默认读取配置
+        deadline_seconds (Optional[float]): 整个流程的截止时间（秒），默认读取配置
+        previous_report_id (Optional[str]): 上一次生成的报告ID（可选）
+    
+    Returns:
+        Dict[str, Any]: 生成结果，包含开题报告和实验设计
+    """
+    logger.info("开始生成论文开题报告和实验设计")
+    
+    # 整个流程共用一个截止时间，各阶段和上游调用从中扣减
+    with deadline_scope(deadline_seconds or settings.REQUEST_DEADLINE_SECONDS):
+        try:
+            previous = load_previous_report(previous_report_id)
+            research = run_research_stage(title, details, academic_level, material_file_paths, keyword_mode, previous)
+            result = run_generation_stage(title, details, academic_level, country, research, proposal_mode)
+            result["zhihu_research"] = records_to_dicts(research["zhihu_research"])
+            result["arxiv_papers"] = records_to_dicts(research["arxiv_papers"])
+            if result["status"] == "success":
+                logger.info("论文生成流程全部完成")
             return result
         
-        logger.info("论文生成流程全部完成")
-        return result
+        except Exception as e:
+            logger.error(f"生成过程中出现错误: {str(e)}")
+            return _mark_failed(_new_result(), f"生成失败: {str(e)}", e)
+
+
+def variant_key(academic_level: str, country: str) -> str:
+    """生成变体的标识，如 "硕士/中国" """
+    return f"{academic_level}/{country}"
+
+
+def split_variant_key(key: str) -> Tuple[str, str]:
+    """variant_key 的逆操作：返回 (学术层次, 就读国家)"""
+    academic_level, country = key.split("/", 1)
+    return academic_level, country
+
+
+def generate_academic_report_variants(
+    title: str,
+    details: str,
+    variants: List[Tuple[str, str]],
+    material_file_paths: Optional[List[str]] = None,
+    proposal_mode: Optional[str] = None,
+    keyword_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    previous_report_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    同一题目按多个 (学术层次, 就读国家) 组合生成
+    
+    文件解析和搜索只做一次（关键词按第一个变体的学术层次生成），各变体的开题报告和实验设计并行生成，
+    耗时接近单次生成。
+    
+    Args:
+        title (str): 论文标题
+        details (str): 初步研究方案
+        variants (List[Tuple[str, str]]): (学术层次, 就读国家) 列表
+        material_file_paths (Optional[List[str]]): 材料文件路径列表
+        proposal_mode (Optional[str]): 开题报告生成模式 single/sections
+        keyword_mode (Optional[str]): 搜索关键词来源 llm/local/hybrid
+        deadline_seconds (Optional[float]): 整个流程的截止时间（秒）
+        previous_report_id (Optional[str]): 上一次生成的报告ID，与之输入相同的变体复用上一次的结果
+    
+    Returns:
+        Dict[str, Any]: status（success/partial/error）、message、zhihu_research、arxiv_papers、research，
+                        以及 variants：{"硕士/中国": {status, message, proposal, experiment_design, reused_stages}}
+    """
+    # 去掉重复的组合，保持顺序
+    variants = list(dict.fromkeys(variants))
+    output = {"status": "success", "message": "", "zhihu_research": [], "arxiv_papers": [], "variants": {}}
+    logger.info(f"开始按 {len(variants)} 个变体生成: {[variant_key(*v) for v in variants]}")
+    
+    with deadline_scope(deadline_seconds or settings.REQUEST_DEADLINE_SECONDS):
+        try:
+            previous = load_previous_report(previous_report_id)
+            research = run_research_stage(title, details, variants[0][0], material_file_paths, keyword_mode, previous)
+        except Exception as e:
+            logger.error(f"研究阶段出现错误: {str(e)}")
+            return _mark_failed(output, f"生成失败: {str(e)}", e)
+        output["zhihu_research"] = records_to_dicts(research["zhihu_research"])
+        output["arxiv_papers"] = records_to_dicts(research["arxiv_papers"])
+        output["research"] = _research_snapshot(research)
         
-    except Exception as e:
-        logger.error(f"生成过程中出现错误: {str(e)}")
-        result["status"] = "error"
-        result["message"] = f"生成失败: {str(e)}"
-        return result
+        def generate_variant(variant: Tuple[str, str]) -> Dict[str, Any]:
+            try:
+                return run_generation_stage(title, details, variant[0], variant[1], research, proposal_mode)
+            except Exception as e:
+                logger.error(f"变体 {variant_key(*variant)} 生成失败: {str(e)}")
+                return _mark_failed(_new_result(), f"生成失败: {str(e)}", e)
+        
+        workers = max(1, min(settings.VARIANT_WORKERS, len(variants)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_with_context(generate_variant), variants))
+    
+    for variant, result in zip(variants, results):
+        output["variants"][variant_key(*variant)] = {
+            "status": result["status"],
+            "message": result["message"],
+            "proposal": result["proposal"],
+            "experiment_design": result["experiment_design"],
+            "reused_stages": result.get("reused_stages", [])
+        }
+    
+    failed = [key for key, value in output["variants"].items() if value["status"] != "success"]
+    if failed:
+        output["status"] = "partial" if len(failed) < len(variants) else "error"
+        output["message"] = f"以下变体生成失败: {', '.join(failed)}"
+        # 所有变体都因截止时间失败时，整体按超时处理
+        output["deadline_exceeded"] = all(result.get("deadline_exceeded") for result in results)
+    logger.info(f"多变体生成完成，失败 {len(failed)} 个")
+    return output
 
 # ================================ 简化的API接口函数 ================================
 
@@ -371,7 +945,12 @@ def generate_academic_report_api(
     details: str = "", 
     academic_level: str = "硕士", 
     country: str = "中国",
-    material_files: Optional[List[str]] = None
+    material_files: Optional[List[str]] = None,
+    proposal_mode: Optional[str] = None,
+    keyword_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    variants: Optional[List[Tuple[str, str]]] = None,
+    previous_report_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     学术报告生成API接口函数
@@ -382,9 +961,15 @@ def generate_academic_report_api(
         academic_level (str): 学术层次
         country (str): 就读国家
         material_files (Optional[List[str]]): 本地文件路径列表
+        proposal_mode (Optional[str]): 开题报告生成模式 single/sections
+        keyword_mode (Optional[str]): 搜索关键词来源 llm/local/hybrid
+        deadline_seconds (Optional[float]): 整个流程的截止时间（秒）
+        variants (Optional[List[Tuple[str, str]]]): (学术层次, 就读国家) 列表，提供时忽略
+            academic_level/country，共享一次研究阶段生成所有变体
+        previous_report_id (Optional[str]): 上一次生成的报告ID，提供时增量生成
         
     Returns:
-        Dict[str, Any]: 生成结果
+        Dict[str, Any]: 生成结果；多变体时见 generate_academic_report_variants
     """
     if not title and not details:
         return {
@@ -394,9 +979,16 @@ def generate_academic_report_api(
             "experiment_design": ""
         }
     
-    return generate_academic_report(title, details, academic_level, country, material_files)
+    if variants:
+        return generate_academic_report_variants(
+            title, details, variants, material_files, proposal_mode, keyword_mode, deadline_seconds, previous_report_id
+        )
+    return generate_academic_report(
+        title, details, academic_level, country, material_files, proposal_mode, keyword_mode, deadline_seconds, previous_report_id
+    )
 
 if __name__ == "__main__":
+    setup_logging()
     # 测试函数
     test_result = generate_academic_report_api(
         title="基于深度学习的智能问答系统研究",
@@ -0,0 +1,256 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import time
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# 导入接口；未安装 Flask 时跳过
+sys.path.insert(0, str(Path(__file__).parent))
+try:
+    import flask  # noqa: F401
+except ImportError:
+    flask = None
+
+if flask is not None:
+    from config import settings
+    # 导入 app 时会配置日志，写到临时目录，不在仓库中留下日志文件
+    with mock.patch.object(settings, "LOG_FILE", os.path.join(tempfile.mkdtemp(), "app.log")):
+        import app as app_module
+    from api import warmup as warmup_module
+    from utils import report_store as report_store_module
+    from utils.report_store import ReportStore
+    from utils.upload_store import UploadStore
+
+
+@unittest.skipIf(flask is None, "未安装 Flask")
+class AppTestCase(unittest.TestCase):
+    """接口测试基类：每个测试使用独立的预热状态、上传存储和报告存储"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, True)
+        self.warmup = warmup_module.Warmup()
+        self.upload_store = UploadStore(os.path.join(self.tmpdir, "uploads"), 1024, [".pdf", ".docx"])
+        self.report_store = ReportStore(os.path.join(self.tmpdir, "reports"), codec="gzip")
+        for patcher in (
+            mock.patch.object(app_module, "get_warmup", lambda: self.warmup),
+            # 不在测试中对真实上游预热
+            mock.patch.object(self.warmup, "start", return_value=False),
+            mock.patch.object(app_module, "get_upload_store", lambda: self.upload_store),
+            mock.patch.object(report_store_module, "_report_store", self.report_store),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+
+class TestWarmupStart(AppTestCase):
+
+    def test_import_does_not_start_warmup(self):
+        """导入 app 不启动预热，第一个请求到达时才开始"""
+        self.assertEqual(warmup_module.get_warmup().status, "pending")
+        with mock.patch.object(self.warmup, "start") as start:
+            self.client.get('/health')
+            self.assertEqual(start.call_count, 1)
+
+
+class TestReady(AppTestCase):
+
+    def test_ready_after_warmup(self):
+        """预热完成前返回503，完成后返回200和各步骤耗时"""
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()["data"]["ready"])
+
+        self.warmup.run([("ok", lambda: "连接已建立"), ("fail", lambda: 1 / 0)], timeout=1)
+        response = self.client.get('/ready')
+        self.assertEqual(response.status_code, 200)
+        steps = response.get_json()["data"]["steps"]
+        self.assertEqual(steps["ok"]["status"], "ok")
+        self.assertEqual(steps["fail"]["status"], "error")
+
+    def test_ready_when_disabled(self):
+        with mock.patch.object(app_module.settings, "WARMUP_ON_STARTUP", False):
+            warmup_module.Warmup.start(self.warmup)
+        self.assertEqual(self.client.get('/ready').status_code, 200)
+
+
+class TestUploads(AppTestCase):
+
+    def _parts(self):
+        return [name for name in os.listdir(self.upload_store.tmp_dir) if name.endswith(".part")]
+
+    def test_multipart_upload(self):
+        """multipart 上传直接写入存储，返回按内容寻址的文件ID"""
+        response = self.client.post('/uploads', data={
+            "a": (io.BytesIO(b"x" * 500), "开题报告.pdf"),
+            "b": (io.BytesIO(b"y" * 100), "实验.docx"),
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        files = response.get_json()["data"]["files"]
+        self.assertEqual(sorted(f["size"] for f in files), [100, 500])
+        self.assertIsNotNone(self.upload_store.get(files[0]["fileId"]))
+        self.assertEqual(self._parts(), [])
+
+    def test_oversized_multipart_leaves_no_part_file(self):
+        """文件超过大小限制时返回413，解析中途打开的临时文件在请求结束时删除"""
+        response = self.client.post('/uploads', data={
+            "a": (io.BytesIO(b"x" * 100), "a.pdf"),
+            "b": (io.BytesIO(b"y" * 5000), "b.pdf"),
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self._parts(), [])
+
+    def test_raw_body_upload(self):
+        response = self.client.post('/uploads?filename=a.pdf', data=b"z" * 800, content_type='application/pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["data"]["files"][0]["size"], 800)
+        response = self.client.post('/uploads', data=b"z", content_type='application/pdf')
+        self.assertEqual(response.status_code, 400)
+
+
+class TestReports(AppTestCase):
+
+    REPORT = {"proposal": "# 开题报告\n" + "研究内容" * 500, "experiment_design": "# 实验设计"}
+
+    def test_encoding_and_etag(self):
+        """可接受gzip时直接返回压缩存储的字节，ETag 区分编码，带 If-None-Match 时返回304"""
+        report_id = self.report_store.save(self.REPORT)
+        response = self.client.get(f'/reports/{report_id}', headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.data)), self.REPORT)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        etag = response.headers["ETag"]
+
+        identity = self.client.get(f'/reports/{report_id}')
+        self.assertNotIn("Content-Encoding", identity.headers)
+        self.assertEqual(identity.get_json(), self.REPORT)
+        self.assertNotEqual(identity.headers["ETag"], etag)
+
+        cached = self.client.get(f'/reports/{report_id}', headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+    def test_range(self):
+        report_id = self.report_store.save(self.REPORT)
+        full = self.client.get(f'/reports/{report_id}').data
+        response = self.client.get(f'/reports/{report_id}', headers={"Range": "bytes=10-109"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, full[10:110])
+        self.assertEqual(response.headers["Content-Range"], f"bytes 10-109/{len(full)}")
+        self.assertEqual(response.headers["Accept-Ranges"], "bytes")
+
+    def test_missing_report(self):
+        self.assertEqual(self.client.get('/reports/' + "0" * 32).status_code, 404)
+        self.assertEqual(self.client.get('/reports/not-an-id').status_code, 404)
+
+
+class TestProfiling(AppTestCase):
+
+    def _generate(self, **kwargs):
+        time.sleep(0.05)
+        return {"status": "success", "proposal": "# 开题报告", "experiment_design": "# 实验设计"}
+
+    def test_profile_requires_token_and_is_served(self):
+        """X-Profile 需要管理令牌；开启后响应头带 X-Profile-Id，可通过 /profiles 获取结果"""
+        body = {"title": "题目", "details": "方案"}
+        with mock.patch.object(app_module, "generate_academic_report_api", self._generate), \
+                mock.patch.multiple(app_module.settings, PROFILE_ADMIN_TOKEN="secret",
+                                    PROFILE_DIR=os.path.join(self.tmpdir, "profiles"), PROFILE_SAMPLE_INTERVAL=0.001):
+            denied = self.client.post('/generate_academic_report', json=body, headers={"X-Profile": "1"})
+            self.assertEqual(denied.status_code, 403)
+
+            response = self.client.post('/generate_academic_report', json=body,
+                                        headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+            self.assertEqual(response.status_code, 200)
+            profile_id = response.headers["X-Profile-Id"]
+
+            self.assertEqual(self.client.get(f'/profiles/{profile_id}').status_code, 403)
+            summary = self.client.get(f'/profiles/{profile_id}', headers={"X-Admin-Token": "secret"})
+            self.assertEqual(summary.status_code, 200)
+            self.assertIsInstance(summary.get_json()["data"], dict)
+            collapsed = self.client.get(f'/profiles/{profile_id}?format=collapsed', headers={"X-Admin-Token": "secret"})
+            self.assertEqual(collapsed.mimetype, "text/plain")
+            self.assertEqual(self.client.get('/profiles/' + "0" * 32, headers={"X-Admin-Token": "secret"}).status_code, 404)
+
+            plain = self.client.post('/generate_academic_report', json=body)
+            self.assertNotIn("X-Profile-Id", plain.headers)
+
+
+class TestDetailedStreaming(AppTestCase):
+
+    RESULT = {
+        "status": "success",
+        "proposal": "# 开题报告",
+        "experiment_design": "# 实验设计",
+        "zhihu_research": [
+            {"keyword": "图神经网络", "zhihu_link": f"https://zhuanlan.zhihu.com/p/{i}", "content": "知乎回答正文" * 2000}
+            for i in range(20)
+        ],
+        "arxiv_papers": [],
+    }
+
+    def _post(self, headers=None):
+        with mock.patch.object(app_module, "generate_academic_report_api", lambda **kwargs: self.RESULT):
+            return self.client.post('/generate_academic_report_detailed', json={"title": "题目", "details": "方案"},
+                                    headers=headers or {}, buffered=False)
+
+    def test_chunked_response_saves_report_after_first_chunk(self):
+        """详细结果分块输出、不带 Content-Length；报告在前面的内容发出后才保存，reportId 可用于获取报告"""
+        saved = []
+        save_report = app_module.save_report
+        with mock.patch.object(app_module, "save_report", lambda *args: saved.append(True) or save_report(*args)):
+            response = self._post()
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_streamed)
+            self.assertNotIn("Content-Length", response.headers)
+            chunks = response.iter_encoded()
+            first = next(chunks)
+            self.assertEqual(saved, [])
+            body = first + b"".join(chunks)
+        self.assertEqual(saved, [True])
+
+        data = json.loads(body)["data"]
+        self.assertEqual(data["zhihu_research"], self.RESULT["zhihu_research"])
+        self.assertEqual(self.client.get(f'/reports/{data["reportId"]}').get_json()["proposal"], "# 开题报告")
+
+    def test_gzip_response(self):
+        response = self._post({"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        body = b"".join(response.iter_encoded())
+        self.assertLess(len(body), 20000)
+        self.assertEqual(json.loads(gzip.decompress(body))["data"]["zhihu_research"], self.RESULT["zhihu_research"])
+
+
+class TestDeadlineStatus(AppTestCase):
+
+    def test_deadline_maps_to_504(self):
+        """因截止时间失败返回504，其他失败返回500"""
+        body = {"title": "题目", "details": "方案", "deadlineSeconds": 5}
+        for exceeded, status in ((True, 504), (False, 500)):
+            result = {"status": "error", "message": "生成失败", "deadline_exceeded": exceeded}
+            with mock.patch.object(app_module, "generate_academic_report_api", lambda **kwargs: result):
+                for path in ('/generate_academic_report', '/generate_academic_report_detailed'):
+                    response = self.client.post(path, json=body)
+                    self.assertEqual(response.status_code, status, path)
+                    self.assertEqual(response.get_json()["code"], status)
+
+    def test_uncaught_deadline_maps_to_504(self):
+        def expired(**kwargs):
+            raise app_module.DeadlineExceeded("请求已超过截止时间")
+
+        with mock.patch.object(app_module, "generate_academic_report_api", expired):
+            response = self.client.post('/generate_academic_report', json={"title": "题目", "details": "方案"})
+        self.assertEqual(response.status_code, 504)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# 导入批量生成
+sys.path.insert(0, str(Path(__file__).parent))
+import batch
+
+ITEM = {"title": "图神经网络分子性质预测", "details": "使用GNN预测分子性质", "academicLevel": "硕士", "country": "中国"}
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.calls = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+        for patcher in (
+            mock.patch.object(batch, "generate_academic_report_api", self._generate),
+            mock.patch.object(batch, "save_report", lambda *args: "report-id"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _generate(self, **params):
+        self.calls.append(params)
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("429 Too Many Requests")
+        return {"status": "success", "proposal": f"# {params['title']}", "experiment_design": "# 实验设计"}
+
+    def _write_input(self, lines):
+        path = os.path.join(self.tmp.name, "input.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(line if isinstance(line, str) else json.dumps(line, ensure_ascii=False) for line in lines) + "\n")
+        return path
+
+    def _read_output(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return {record["line"]: record for record in map(json.loads, f)}
+
+    def test_resume_after_truncated_line(self):
+        """崩溃时写了一半的最后一行被截掉并重新生成，已完成的行跳过"""
+        input_path = self._write_input([ITEM, dict(ITEM, title="第二条"), dict(ITEM, title="第三条")])
+        output_path = os.path.join(self.tmp.name, "output.jsonl")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"line": 1, "status": "success"}) + "\n" + '{"line": 2, "sta')
+
+        stats = batch.run_batch(input_path, output_path, concurrency=2)
+
+        self.assertEqual(stats, {"total": 3, "skipped": 1, "succeeded": 2, "failed": 0})
+        self.assertEqual(sorted(call["title"] for call in self.calls), ["第三条", "第二条"])
+        self.assertEqual(sorted(self._read_output(output_path)), [1, 2, 3])
+        self.assertEqual(batch.load_completed(output_path), {1, 2, 3})
+
+    def test_identical_items_share_generation(self):
+        """参数相同的条目只生成一次，结果写到每一行"""
+        input_path = self._write_input([ITEM, ITEM, dict(ITEM, country="英国")])
+        output_path = os.path.join(self.tmp.name, "output.jsonl")
+
+        stats = batch.run_batch(input_path, output_path, concurrency=2)
+
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(stats["succeeded"], 3)
+        records = self._read_output(output_path)
+        self.assertEqual(records[1]["proposal"], records[2]["proposal"])
+
+    def test_invalid_lines_written_as_errors(self):
+        input_path = self._write_input(["不是JSON", {"title": "", "details": ""}, ITEM])
+        output_path = os.path.join(self.tmp.name, "output.jsonl")
+
+        stats = batch.run_batch(input_path, output_path)
+
+        self.assertEqual(stats, {"total": 3, "skipped": 0, "succeeded": 1, "failed": 2})
+        records = self._read_output(output_path)
+        self.assertEqual(records[1]["status"], "error")
+        self.assertEqual(records[2]["message"], "请提供论文标题或研究方案")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_failed_line_retried_on_rerun(self):
+        """第一次运行上游失败，重新运行时重试失败的行，任务状态只保留最新结果"""
+        self.fail = True
+        manager = batch.BatchJobManager(os.path.join(self.tmp.name, "jobs"))
+        job_id = manager.submit([ITEM, dict(ITEM, title="第二条")])
+        manager._running[job_id].join(5)
+        status = manager.status(job_id)
+        self.assertEqual(status["failed"], 2)
+        self.assertEqual(batch.load_completed(manager._paths(job_id)[1]), set())
+
+        self.fail = False
+        self.assertTrue(manager.resume(job_id))
+        manager._running[job_id].join(5)
+        status = manager.status(job_id)
+        self.assertEqual(len(self.calls), 4)
+        self.assertEqual((status["completed"], status["failed"]), (2, 0))
+        self.assertEqual([(r["line"], r["status"]) for r in status["results"]], [(1, "success"), (2, "success")])
+        self.assertEqual(batch.load_completed(manager._paths(job_id)[1]), {1, 2})
+
+    def test_resume_refuses_running_job(self):
+        """任务运行中时续跑返回False，结束后可以再次续跑"""
+        manager = batch.BatchJobManager(os.path.join(self.tmp.name, "jobs"))
+        self.release.clear()
+        job_id = manager.submit([ITEM])
+        self.assertTrue(manager.exists(job_id))
+        self.assertFalse(manager.resume(job_id))
+        self.assertTrue(manager.status(job_id)["running"])
+
+        self.release.set()
+        manager._running[job_id].join(5)
+        status = manager.status(job_id)
+        self.assertFalse(status["running"])
+        self.assertEqual(status["completed"], 1)
+        self.assertTrue(manager.resume(job_id))
+        manager._running[job_id].join(5)
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
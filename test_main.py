@@ -0,0 +1,255 @@
+import re
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# 导入主流程
+sys.path.insert(0, str(Path(__file__).parent))
+import file_parser
+import main
+from tool import deep_research
+
+
+class FakeLLM:
+    """记录提示并按顺序返回预设响应的 call_llm 替身"""
+
+    def __init__(self, responses=None, default="[]"):
+        self.prompts = []
+        self.responses = list(responses or [])
+        self.default = default
+
+    def __call__(self, prompt, provider="auto", timeout=None, task=None, **kwargs):
+        self.prompts.append(prompt)
+        return self.responses.pop(0) if self.responses else self.default
+
+
+class TestPrompts(unittest.TestCase):
+
+    def test_prompts_are_flush_left(self):
+        """关键词、开题报告和实验设计的提示每行都没有源码缩进"""
+        llm = FakeLLM()
+        with mock.patch.object(main, "call_llm", llm), mock.patch.object(main.settings, "STREAM_KEYWORDS", False):
+            research = main.run_research_stage("图神经网络分子性质预测", "使用GNN预测分子性质", "硕士", keyword_mode="llm")
+            main.generate_proposal_stage("图神经网络分子性质预测", "使用GNN预测分子性质", "硕士", "中国", research, "single")
+            main.generate_experiment_stage("图神经网络分子性质预测", "使用GNN预测分子性质", "# 开题报告", research)
+
+        self.assertEqual(len(llm.prompts), 4)
+        for prompt in llm.prompts:
+            self.assertTrue(prompt.strip())
+            # 只有嵌入的JSON（学术背景）带缩进，提示正文不应有
+            self.assertIsNone(re.search(r'^ +[^ "{}\[\]]', prompt, re.M), prompt)
+
+    def test_reference_prompt_keeps_full_arxiv_entries(self):
+        """参考文献以 query_arxiv 的完整条目、indent=4 编码放入提示，与记录化之前相同"""
+        entry = {
+            "id": "http://arxiv.org/abs/2101.00001v1",
+            "title": "Graph Neural Networks for Molecules",
+            "summary": "We study message passing.",
+            "published": "2021-01-01T00:00:00Z",
+            "updated": "2021-01-02T00:00:00Z",
+            "authors": [{"name": "Alice"}, {"name": "Bob", "affiliation": "MIT"}],
+            "links": [{"href": "http://arxiv.org/abs/2101.00001v1", "rel": "alternate", "type": "text/html"}],
+            "doi": "10.1000/xyz",
+            "comment": "12 pages",
+            "primary_category": "cs.LG",
+            "categories": ["cs.LG", "stat.ML"],
+        }
+        llm = FakeLLM(responses=["[]", '[["graph neural network"]]'])
+        with mock.patch.object(main, "call_llm", llm), \
+                mock.patch.object(main, "query_arxiv", lambda keyword_group: {"entries": [entry]}), \
+                mock.patch.object(main, "cached_search", lambda source, query, fetch, should_cache=None: fetch()), \
+                mock.patch.object(main, "sleep_within_deadline", lambda seconds: True), \
+                mock.patch.object(main.settings, "STREAM_KEYWORDS", False):
+            research = main.run_research_stage("图神经网络分子性质预测", "使用GNN预测分子性质", "硕士", keyword_mode="llm")
+            main.generate_proposal_stage("图神经网络分子性质预测", "使用GNN预测分子性质", "硕士", "中国", research, "single")
+
+        self.assertIn("参考文献：" + json.dumps([entry], ensure_ascii=False, indent=4) + "\n", llm.prompts[-1])
+
+
+class TestProposalSections(unittest.TestCase):
+
+    RESEARCH = {"proposal_files": [], "paper_info_str": "[]", "zhihu_result_str": "[]"}
+
+    def test_bad_outline_falls_back_to_single_mode(self):
+        """提纲无法解析时改用单次生成完整开题报告"""
+        llm = FakeLLM(responses=["抱歉，无法生成提纲", "# 完整开题报告"])
+        with mock.patch.object(main, "call_llm", llm):
+            proposal = main.generate_proposal_stage("题目", "方案", "硕士", "中国", self.RESEARCH, "sections")
+        self.assertEqual(proposal, "# 完整开题报告")
+        self.assertEqual(len(llm.prompts), 2)
+        self.assertIn("章节提纲", llm.prompts[0])
+        self.assertIn("生成一份专业的学术开题报告", llm.prompts[1])
+
+    def test_sections_stitched_in_outline_order(self):
+        """章节完成顺序与提纲相反时，仍按提纲顺序拼接"""
+        titles = ["研究背景", "文献综述", "研究方法"]
+        finished = []
+
+        def fake_llm(prompt, provider="auto", timeout=None, task=None):
+            if "章节提纲" in prompt:
+                return json.dumps([{"title": t, "points": ["要点"]} for t in titles], ensure_ascii=False)
+            title = re.search(r"当前章节：(.+)", prompt).group(1)
+            # 越靠前的章节完成得越晚
+            time.sleep(0.05 * (len(titles) - titles.index(title)))
+            finished.append(title)
+            return f"## {title}\n\n{title}内容"
+
+        with mock.patch.object(main, "call_llm", fake_llm), \
+                mock.patch.object(main.settings, "PROPOSAL_SECTION_PROVIDERS", ["auto"]), \
+                mock.patch.object(main.settings, "PROPOSAL_SECTION_WORKERS", 3):
+            proposal = main.generate_proposal_by_sections("题目", "上下文", "硕士", "中国")
+
+        self.assertEqual(finished, list(reversed(titles)))
+        self.assertTrue(proposal.startswith("# 题目开题报告\n\n## 研究背景"))
+        positions = [proposal.index(f"## {t}") for t in titles]
+        self.assertEqual(positions, sorted(positions))
+
+
+class TestResearchMemory(unittest.TestCase):
+
+    FILE_CAP, SCRAPED_CAP, PAGE_CAP = 256 * 1024, 128 * 1024, 32 * 1024
+    CHUNK_CHARS, PAGE_CHARS = 16 * 1024, 100 * 1024
+
+    def setUp(self):
+        self.links = 0
+
+    def _extract(self, file_path, max_chars=None):
+        # 模拟PDF逐页提取：每页是新分配的长文本，与真实解析一样读到 max_chars 后停止
+        parts = []
+        length = 0
+        for page in range(200):
+            parts.append(f"{file_path}第{page}页" + "论文材料正文" * (self.CHUNK_CHARS // 6))
+            length += len(parts[-1])
+            if max_chars is not None and length >= max_chars:
+                break
+        return "".join(parts)
+
+    def _search(self, keyword, N, include_raw_content=False, search_depth="advanced", timeout=60):
+        return [{"url": f"https://zhuanlan.zhihu.com/p/{keyword}{i}", "score": 0.9, "raw_content": None} for i in range(N)]
+
+    def _scrape(self, url, includeMarkdown=True, timeout=30):
+        self.links += 1
+        return {"markdown": url + "知乎回答正文" * (self.PAGE_CHARS // 6)}
+
+    def test_research_peak_memory_bounded(self):
+        """上传大文件并抓取大量长页面时，研究阶段的峰值内存受请求上限约束，而不是随原始内容总量增长"""
+        llm = FakeLLM(responses=['["关键词甲", "关键词乙", "关键词丙"]'])
+        tmp_dir = self.tmp_dir()
+        paths = []
+        for index in range(5):
+            path = os.path.join(tmp_dir, f"paper{index}.pdf")
+            open(path, "wb").close()
+            paths.append(path)
+        parsed = []
+
+        def parse_material_files(*args):
+            parsed.extend(parse_files(*args))
+            return parsed
+
+        parse_files = main.parse_material_files
+        with mock.patch.object(main, "call_llm", llm), \
+                mock.patch.object(main, "parse_material_files", parse_material_files), \
+                mock.patch("file_parser.extract_text_from_pdf", self._extract), \
+                mock.patch.object(deep_research, "cached_search", lambda source, query, fetch, should_cache=None: fetch()), \
+                mock.patch.object(deep_research, "search_zhihu_pages", self._search), \
+                mock.patch.object(deep_research, "query_singleWebsite", self._scrape), \
+                mock.patch.multiple(main.settings, STREAM_KEYWORDS=False, ZHIHU_DEDUP_ENABLED=False,
+                                    ZHIHU_SEARCH_TIERS=["advanced"], REQUEST_FILE_TEXT_MAX_BYTES=self.FILE_CAP,
+                                    REQUEST_SCRAPED_MAX_BYTES=self.SCRAPED_CAP, ZHIHU_PAGE_MAX_BYTES=self.PAGE_CAP,
+                                    RETRIEVAL_INDEX_DIR=os.path.join(tmp_dir, "retrieval")):
+            tracemalloc.start()
+            try:
+                research = main.run_research_stage("题目", "方案", "硕士", paths, keyword_mode="llm")
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        self.assertTrue(parsed)
+        self.assertLess(len(parsed), len(paths))
+        self.assertLessEqual(sum(len(f["fileContent"].encode("utf-8")) for f in parsed), self.FILE_CAP)
+        kept_pages = [len(page.content.encode("utf-8")) for page in research["zhihu_research"]]
+        self.assertTrue(research["zhihu_research"])
+        self.assertLessEqual(sum(kept_pages), self.SCRAPED_CAP)
+        self.assertTrue(all(size <= self.PAGE_CAP for size in kept_pages))
+        # 上限用完后不再抓取剩余链接
+        self.assertLess(self.links, 9)
+        # 全部读取需要约 48MB 文件正文和 2.7MB 页面正文；峰值只包含上限内的正文和正在处理的少量页面
+        self.assertLess(peak, 4 * 1024 * 1024)
+
+    def test_doc_text_capped(self):
+        """DOC 文件同样按 max_chars 截断"""
+        docx2txt = mock.Mock(process=lambda path: "正文" * 1000)
+        with mock.patch.dict(sys.modules, {"docx2txt": docx2txt}):
+            self.assertEqual(file_parser.extract_text_from_doc("a.doc", 10), "正文" * 5)
+            self.assertEqual(len(file_parser.extract_text_from_doc("a.doc")), 2000)
+
+    def tmp_dir(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return tmp.name
+
+
+class TestDeadlineFailure(unittest.TestCase):
+
+    def test_deadline_failure_marked(self):
+        """截止时间到达导致的失败带 deadline_exceeded 标记，其他错误不带"""
+        def expired(prompt, *args, **kwargs):
+            raise main.DeadlineExceeded("请求已超过截止时间")
+
+        def broken(prompt, *args, **kwargs):
+            raise RuntimeError("模型不可用")
+
+        for llm, exceeded in ((expired, True), (broken, False)):
+            with mock.patch.object(main, "call_llm", llm), mock.patch.object(main.settings, "STREAM_KEYWORDS", False):
+                result = main.generate_academic_report("题目", "方案", "硕士", "中国", keyword_mode="llm")
+                variants = main.generate_academic_report_variants(
+                    "题目", "方案", [("硕士", "中国"), ("博士", "英国")], keyword_mode="llm"
+                )
+            self.assertEqual(result["status"], "error")
+            self.assertIs(result["deadline_exceeded"], exceeded)
+            self.assertEqual(variants["status"], "error")
+            self.assertIs(variants["deadline_exceeded"], exceeded)
+
+
+class TestVariants(unittest.TestCase):
+
+    def test_research_once_and_failures_isolated(self):
+        """搜索只做一次；一个变体失败时其余变体照常返回，整体状态为 partial"""
+
+        class FailingForUK(FakeLLM):
+            def __call__(self, prompt, *args, **kwargs):
+                if "英国" in prompt:
+                    raise RuntimeError("模型不可用")
+                return super().__call__(prompt, *args, **kwargs)
+
+        llm = FailingForUK(default="# 报告")
+        research_stage = mock.Mock(wraps=main.run_research_stage)
+        variants = [("硕士", "中国"), ("博士", "英国"), ("硕士", "中国")]
+        with mock.patch.object(main, "call_llm", llm), mock.patch.object(main, "run_research_stage", research_stage), \
+                mock.patch.object(main.settings, "STREAM_KEYWORDS", False):
+            output = main.generate_academic_report_variants(
+                "图神经网络分子性质预测", "使用GNN预测分子性质", variants, proposal_mode="single", keyword_mode="llm"
+            )
+
+        self.assertEqual(research_stage.call_count, 1)
+        self.assertEqual(output["status"], "partial")
+        self.assertEqual(list(output["variants"]), ["硕士/中国", "博士/英国"])
+        self.assertEqual(output["variants"]["硕士/中国"]["status"], "success")
+        self.assertEqual(output["variants"]["硕士/中国"]["proposal"], "# 报告")
+        self.assertEqual(output["variants"]["博士/英国"]["status"], "error")
+        self.assertIsInstance(output["zhihu_research"], list)
+
+    def test_variant_key_round_trip(self):
+        for level, country in (("硕士", "中国"), ("博士", "澳大利亚")):
+            self.assertEqual(main.split_variant_key(main.variant_key(level, country)), (level, country))
+        self.assertEqual(main.split_variant_key("本科/A/B"), ("本科", "A/B"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import re
+import hashlib
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from utils.tokens import estimate_tokens
+
+# ================================ SimHash ================================
+
+SIMHASH_BITS = 64
+
+# 字符 n-gram 长度，对中文和转载时的少量改动都比较稳定
+SHINGLE_SIZE = 4
+
+_NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+def _features(text: str) -> Counter:
+    """归一化文本（小写、去掉空白和标点）后取字符 n-gram 及其出现次数"""
+    text = _NON_WORD_PATTERN.sub('', text.lower())
+    if len(text) <= SHINGLE_SIZE:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+
+
+def simhash(text: str) -> int:
+    """
+    计算文本的64位SimHash
+
+    按字节累加权重后再展开到位，避免对每个特征逐位循环。
+
+    Args:
+        text (str): 输入文本
+
+    Returns:
+        int: SimHash指纹
+    """
+    byte_count = SIMHASH_BITS // 8
+    # byte_weights[i][v]：第 i 个字节取值为 v 的特征权重之和
+    byte_weights = [[0] * 256 for _ in range(byte_count)]
+    total = 0
+    for feature, weight in _features(text).items():
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=byte_count).digest()
+        for i, value in enumerate(digest):
+            byte_weights[i][value] += weight
+        total += weight
+
+    fingerprint = 0
+    for i, weights in enumerate(byte_weights):
+        for bit in range(8):
+            # 该位为1的特征权重之和超过总权重一半时，指纹该位取1
+            ones = sum(w for value, w in enumerate(weights) if w and value >> bit & 1)
+            if 2 * ones > total:
+                fingerprint |= 1 << (i * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+# ================================ 近重复索引 ================================
+
+
+class SimHashIndex:
+    """
+    内存中的SimHash分段索引
+
+    指纹分为 max_distance + 1 段，海明距离不超过 max_distance 的两个指纹至少有一段完全相同（抽屉原理），
+    因此只需与同段的候选比较。各段位数尽量相等（64位分7段时为 10+9×6），
+    避免出现位数很少的段，使同一个桶里堆积大量候选。
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        base, extra = divmod(SIMHASH_BITS, self.bands)
+        # 每段的 (起始位, 掩码)，前 extra 段多一位
+        self.band_layout: List[Tuple[int, int]] = []
+        shift = 0
+        for i in range(self.bands):
+            bits = base + (1 if i < extra else 0)
+            self.band_layout.append((shift, (1 << bits) - 1))
+            shift += bits
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+
+    def _band_values(self, fingerprint: int):
+        return [(fingerprint >> shift) & mask for shift, mask in self.band_layout]
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """返回一个近重复的已有指纹，没有时返回None"""
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            for candidate in table.get(value, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, fingerprint: int):
+        for table, value in zip(self._tables, self._band_values(fingerprint)):
+            table.setdefault(value, []).append(fingerprint)
+
+
+class NearDuplicateFilter:
+    """
+    流式近重复过滤器
+
+    页面逐个到达时判断是否与已保留页面近似重复，重复的页面直接丢弃，
+    并累计节省的字节数和估计token数。可在多个搜索线程间共享。
+    """
+
+    def __init__(self, max_distance: int = 6):
+        self._index = SimHashIndex(max_distance)
+        self._lock = threading.Lock()
+        self.kept = 0
+        self.dropped = 0
+        self.bytes_saved = 0
+        self.tokens_saved = 0
+
+    def add(self, text: str) -> bool:
+        """
+        登记一个页面
+
+        Args:
+            text (str): 页面正文
+
+        Returns:
+            bool: 新内容返回True；与已保留页面近似重复时返回False
+        """
+        fingerprint = simhash(text)
+        with self._lock:
+            if self._index.find(fingerprint) is not None:
+                self.dropped += 1
+                self.bytes_saved += len(text.encode('utf-8'))
+                self.tokens_saved += estimate_tokens(text)
+                return False
+            self._index.add(fingerprint)
+            self.kept += 1
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "kept": self.kept,
+                "dropped": self.dropped,
+                "bytes_saved": self.bytes_saved,
+                "tokens_saved": self.tokens_saved,
+            }
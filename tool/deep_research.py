@@ -1,44 +1,87 @@
-from tqdm import tqdm
-import time
-from api.tavily_normal import query_zhihu
+import logging
+
+from config import settings
+from api.tavily_normal import search_zhihu_pages
 from api.serper_normal import query_singleWebsite
+from api.search_cache import cached_search, normalize_query
+from tool.research_records import ZhihuPage
+from tool.search_tiers import escalating_search
+from utils.deadline import can_fit
+from utils.metrics import metrics
+from utils.resilience import retry_call
+
+logger = logging.getLogger('deep_research')
+
+# 知乎反爬验证页，抓取到该内容视为失败
+ZHIHU_SECURITY_PAGE = "# 安全验证\n\n## 进入知乎\n\n系统监测到您的网络环境存在异常，为保证您的正常访问，请点击下方验证按钮进行验证。在您验证完成前，该提示将多次出现。"
+
+def _is_valid_content(content):
+    return bool(content) and content.strip() != ZHIHU_SECURITY_PAGE and "系统监测到您的网络环境存在异常" not in content[:500]
+
+def _is_valid_page(page):
+    return bool(page) and _is_valid_content(page.get("markdown"))
+
+def scrape_zhihu_page(zhihu_link):
+    """通过Serper抓取单个知乎页面的markdown，失败时返回None"""
+    tmp_page = {}
+    try:
+        tmp_page = cached_search(
+            "serper",
+            zhihu_link,
+            lambda: retry_call("serper", query_singleWebsite, (zhihu_link,)),
+            should_cache=_is_valid_page
+        )
+    except Exception as e:
+        logger.warning(f"抓取知乎页面失败 {zhihu_link}: {str(e)}")
+    return tmp_page["markdown"] if _is_valid_page(tmp_page) else None
 
-def search_zhihu(keywordsList, K):
-    # 查询知乎
+def search_zhihu(keywordsList, K, dedup=None, budget=None):
+    # 查询知乎；传入 dedup（NearDuplicateFilter）时丢弃与已保留页面近似重复的页面
+    # 传入 budget（ByteBudget）时按单页和整个请求的字节上限截断正文，用完后不再抓取
+    use_raw_content = settings.ZHIHU_TAVILY_RAW_CONTENT
+    tiers = settings.ZHIHU_SEARCH_TIERS
     zhihu_list = []
-    for keyword in tqdm(keywordsList):
-        # 添加3次重试
-        retry_count = 0
-        zhihu_linksList = []
-        while retry_count < 3:
-            try:
-                zhihu_linksList = query_zhihu(keyword, K)
-                break
-            except Exception as e:
-                retry_count += 1
-                if retry_count < 3:
-                    time.sleep(5)
-                else:
-                    print(f"Failed to query_zhihu after 3 retries: {e}")
+    for index, keyword in enumerate(keywordsList, 1):
+        logger.info(f"知乎搜索 {index}/{len(keywordsList)}: {keyword}")
+        # 重试由统一策略控制：指数退避、错误分类、重试预算和截止时间
+        # 结果按归一化关键词缓存，热门主题无需重复请求
+        # 先用 basic 深度搜索，结果不足时才升级到 advanced
+        zhihu_results = []
+        try:
+            zhihu_results = cached_search(
+                "tavily",
+                [normalize_query(keyword), K, use_raw_content, tiers],
+                lambda: escalating_search(
+                    keyword,
+                    K,
+                    lambda depth: retry_call("tavily", search_zhihu_pages, (keyword, K, use_raw_content, depth)),
+                    tiers
+                )
+            )
+        except Exception as e:
+            logger.warning(f"知乎搜索失败 {keyword}: {str(e)}")
         
-        for zhihu_link in zhihu_linksList:
-            # 添加3次重试
-            retry_count = 0
-            tmp_page = {}
-            while retry_count < 3:
-                try:
-                    tmp_page = query_singleWebsite(zhihu_link)
+        for result in zhihu_results:
+            if budget is not None and budget.exhausted:
+                logger.info("抓取内容已达到请求字节上限，停止知乎搜索")
+                return zhihu_list
+            zhihu_link = result["url"]
+            # 优先使用Tavily返回的正文，缺失或被拦截时再用Serper抓取
+            content = result.get("raw_content")
+            if _is_valid_content(content):
+                metrics.increment("zhihu_pages", {"source": "tavily_raw"})
+            else:
+                if not can_fit(0):
                     break
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count < 3:
-                        time.sleep(5)
-                    else:
-                        print(f"Failed to query_singleWebsite after 3 retries: {e}")
+                content = scrape_zhihu_page(zhihu_link)
+                if content:
+                    metrics.increment("zhihu_pages", {"source": "serper"})
             
-            if tmp_page and "markdown" in tmp_page:
-                tmp_markdown = tmp_page["markdown"]
-                # 不清洗, 直接拿来用.
-                if tmp_markdown != "# 安全验证\n\n## 进入知乎\n\n系统监测到您的网络环境存在异常，为保证您的正常访问，请点击下方验证按钮进行验证。在您验证完成前，该提示将多次出现。":
-                    zhihu_list.append({"keyword": keyword, "zhihu_link": zhihu_link, "content": tmp_markdown})
-    return zhihu_list
\ No newline at end of file
+            # 不清洗, 直接拿来用.
+            if content and dedup is not None and not dedup.add(content):
+                continue
+            if content and budget is not None:
+                content = budget.take(content)
+            if content:
+                zhihu_list.append(ZhihuPage(keyword, zhihu_link, content))
+    return zhihu_list
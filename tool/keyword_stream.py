@@ -0,0 +1,190 @@
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+
+# 编号或项目符号开头的行，如 "1. xxx"、"2、xxx"、"- xxx"
+_LIST_LINE_PATTERN = re.compile(r'^\s*(?:\d+\s*[\.\)、]|[-*•])\s*')
+
+
+def _clean_line(line: str) -> str:
+    """清理行首序号、引号及行尾标点，与 extract_jsonList_fromStr 的分行逻辑保持一致"""
+    cleaned = _LIST_LINE_PATTERN.sub('', line.strip())
+    cleaned = re.sub(r'^[\d\.\[\]"\']*\s*', '', cleaned)
+    cleaned = re.sub(r'[,\.\[\]"\']*$', '', cleaned)
+    return cleaned.strip()
+
+
+class IncrementalJsonListExtractor:
+    """
+    增量JSON列表解析器
+
+    逐段接收流式模型输出，一旦顶层数组中的某个元素闭合（字符串引号闭合、
+    子列表或对象括号闭合）就立即返回该元素，无需等待完整响应。
+    兼容 ```json 代码块包裹的数组；只有其后（忽略空白）紧跟引号、方括号的 [ 才视为数组开始，
+    前言中的 "文献[1]" 之类按普通文本处理。若输出中没有数组而是编号列表，
+    则按行返回；两者都没有时在 close() 中取前3行兜底。
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self._mode = None          # None / 'json' / 'lines'
+        self._pending = None       # 遇到 [ 后尚未确定是否为数组开始时缓存的字符
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: List[str] = []
+        self._line: List[str] = []
+        self._text: List[str] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        输入一段增量文本
+
+        Args:
+            chunk (str): 模型输出的增量片段
+
+        Returns:
+            List[Any]: 本次新解析出的顶层元素
+        """
+        new_items: List[Any] = []
+        if self._done or not chunk:
+            return new_items
+
+        self._text.append(chunk)
+        for char in chunk:
+            if self._mode == 'json':
+                self._feed_json_char(char, new_items)
+            else:
+                self._feed_text_char(char, new_items)
+            if self._done:
+                break
+
+        self.items.extend(new_items)
+        return new_items
+
+    def close(self) -> List[Any]:
+        """
+        结束输入，返回剩余可解析的元素
+
+        Returns:
+            List[Any]: 收尾阶段新解析出的元素
+        """
+        new_items: List[Any] = []
+        if self._mode == 'lines' and self._line:
+            self._emit_line(''.join(self._line), new_items)
+            self._line = []
+
+        if not self.items and not new_items:
+            # 兜底：与 extract_jsonList_fromStr 相同，取前3个非空行
+            lines = [line.strip() for line in ''.join(self._text).split('\n') if line.strip()]
+            if len(lines) >= 3 and self._mode != 'json':
+                for line in lines[:3]:
+                    cleaned = _clean_line(line)
+                    if cleaned:
+                        new_items.append(cleaned)
+
+        self._done = True
+        self.items.extend(new_items)
+        return new_items
+
+    # ================================ 内部状态机 ================================
+
+    def _feed_text_char(self, char: str, new_items: List[Any]):
+        if self._pending is not None:
+            if char.isspace():
+                self._pending.append(char)
+                return
+            pending = self._pending
+            self._pending = None
+            if char in '"[]':
+                self._mode = 'json'
+                self._depth = 1
+                self._line = []
+                self._feed_json_char(char, new_items)
+                return
+            # 不是JSON数组（如 "文献[1]"），缓存的字符按普通文本处理
+            self._line.append(pending[0])
+            for pending_char in pending[1:]:
+                self._feed_text_char(pending_char, new_items)
+        elif self._mode is None and char == '[':
+            self._pending = [char]
+            return
+
+        if char == '\n':
+            line = ''.join(self._line)
+            self._line = []
+            if _LIST_LINE_PATTERN.match(line) and '[' not in line:
+                self._mode = 'lines'
+            if self._mode == 'lines':
+                self._emit_line(line, new_items)
+        else:
+            self._line.append(char)
+
+    def _emit_line(self, line: str, new_items: List[Any]):
+        if line.strip().startswith('```'):
+            return
+        cleaned = _clean_line(line)
+        if cleaned:
+            new_items.append(cleaned)
+
+    def _feed_json_char(self, char: str, new_items: List[Any]):
+        if self._in_string:
+            self._element.append(char)
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    self._emit_element(new_items)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._element.append(char)
+        elif char in '[{':
+            self._depth += 1
+            self._element.append(char)
+        elif char in ']}':
+            self._depth -= 1
+            if self._depth == 0:
+                self._emit_element(new_items)
+                self._done = True
+            else:
+                self._element.append(char)
+                if self._depth == 1:
+                    self._emit_element(new_items)
+        elif char == ',' and self._depth == 1:
+            self._emit_element(new_items)
+        else:
+            self._element.append(char)
+
+    def _emit_element(self, new_items: List[Any]):
+        text = ''.join(self._element).strip()
+        self._element = []
+        if not text:
+            return
+        try:
+            new_items.append(json.loads(text))
+        except json.JSONDecodeError:
+            cleaned = text.strip('"\'').strip()
+            if cleaned:
+                new_items.append(cleaned)
+
+
+def iter_json_list(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    从流式文本中逐个产出顶层列表元素
+
+    Args:
+        chunks (Iterable[str]): 模型输出的增量片段
+
+    Yields:
+        Any: 解析出的列表元素（字符串或子列表）
+    """
+    extractor = IncrementalJsonListExtractor()
+    for chunk in chunks:
+        yield from extractor.feed(chunk)
+    yield from extractor.close()
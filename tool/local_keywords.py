@@ -0,0 +1,359 @@
+import re
+import logging
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger('local_keywords')
+
+# ================================ 词典 ================================
+
+# 常见学术术语及其英文表达，用于中文分词和生成arXiv英文关键词
+TERM_DICTIONARY = {
+    "人工智能": "artificial intelligence",
+    "机器学习": "machine learning",
+    "深度学习": "deep learning",
+    "强化学习": "reinforcement learning",
+    "迁移学习": "transfer learning",
+    "联邦学习": "federated learning",
+    "对比学习": "contrastive learning",
+    "元学习": "meta learning",
+    "自监督学习": "self-supervised learning",
+    "神经网络": "neural network",
+    "卷积神经网络": "convolutional neural network",
+    "循环神经网络": "recurrent neural network",
+    "图神经网络": "graph neural network",
+    "生成对抗网络": "generative adversarial network",
+    "扩散模型": "diffusion model",
+    "注意力机制": "attention mechanism",
+    "大语言模型": "large language model",
+    "大模型": "large language model",
+    "语言模型": "language model",
+    "预训练模型": "pre-trained model",
+    "提示学习": "prompt learning",
+    "检索增强生成": "retrieval-augmented generation",
+    "知识蒸馏": "knowledge distillation",
+    "模型压缩": "model compression",
+    "自然语言处理": "natural language processing",
+    "智能问答": "question answering",
+    "问答系统": "question answering",
+    "多轮对话": "multi-turn dialogue",
+    "对话系统": "dialogue system",
+    "知识推理": "knowledge reasoning",
+    "知识图谱": "knowledge graph",
+    "信息抽取": "information extraction",
+    "命名实体识别": "named entity recognition",
+    "关系抽取": "relation extraction",
+    "文本分类": "text classification",
+    "情感分析": "sentiment analysis",
+    "机器翻译": "machine translation",
+    "文本生成": "text generation",
+    "文本摘要": "text summarization",
+    "语音识别": "speech recognition",
+    "语音合成": "speech synthesis",
+    "计算机视觉": "computer vision",
+    "图像识别": "image recognition",
+    "图像分类": "image classification",
+    "图像分割": "image segmentation",
+    "语义分割": "semantic segmentation",
+    "目标检测": "object detection",
+    "目标跟踪": "object tracking",
+    "人脸识别": "face recognition",
+    "姿态估计": "pose estimation",
+    "多模态": "multimodal",
+    "推荐系统": "recommender system",
+    "协同过滤": "collaborative filtering",
+    "数据挖掘": "data mining",
+    "异常检测": "anomaly detection",
+    "时间序列预测": "time series forecasting",
+    "时间序列": "time series",
+    "自动驾驶": "autonomous driving",
+    "机器人": "robotics",
+    "路径规划": "path planning",
+    "边缘计算": "edge computing",
+    "云计算": "cloud computing",
+    "物联网": "internet of things",
+    "区块链": "blockchain",
+    "隐私保护": "privacy preserving",
+    "网络安全": "cybersecurity",
+    "入侵检测": "intrusion detection",
+    "医学影像": "medical imaging",
+    "故障诊断": "fault diagnosis",
+    "优化算法": "optimization algorithm",
+    "遗传算法": "genetic algorithm",
+    "可解释性": "interpretability",
+}
+
+# 中文停用词：虚词及开题报告中常见但不具区分度的词
+CHINESE_STOPWORDS = {
+    "的", "了", "和", "与", "及", "或", "在", "对", "中", "等", "是", "将", "把", "被", "从", "以", "为",
+    "于", "其", "并", "而", "更", "很", "也", "都", "又", "之", "个", "这", "那", "一种", "一个",
+    "基于", "面向", "针对", "关于", "通过", "利用", "使用", "采用", "如何", "怎样", "进行", "实现",
+    "研究", "分析", "设计", "构建", "探索", "探讨", "提出", "提升", "提高", "改进", "解决", "重点",
+    "问题", "方法", "方案", "技术", "应用", "相关", "主要", "具有", "能够", "可以", "以及", "准确",
+    "自然", "有效", "高效", "新型", "初步", "本文", "论文", "领域", "背景", "目标", "上", "下",
+    "验证", "实验", "数据集", "重要", "意义",
+}
+
+ENGLISH_STOPWORDS = {
+    "a", "an", "the", "of", "for", "and", "or", "in", "on", "to", "with", "by", "based", "using",
+    "via", "study", "research", "towards", "toward", "approach", "method", "analysis",
+}
+
+_MAX_TERM_LENGTH = max(len(term) for term in list(TERM_DICTIONARY) + list(CHINESE_STOPWORDS))
+
+# 分段：连续的中文、连续的英文/数字，其余字符视为分隔
+_SEGMENT_PATTERN = re.compile(r'[一-鿿]+|[A-Za-z][A-Za-z0-9\-\+\.]*[A-Za-z0-9\+]|[A-Za-z]')
+
+_jieba = None
+_jieba_checked = False
+
+
+def _get_jieba():
+    """按需加载jieba分词（可选依赖），不可用时返回None"""
+    global _jieba, _jieba_checked
+    if not _jieba_checked:
+        _jieba_checked = True
+        try:
+            import jieba
+            for term in TERM_DICTIONARY:
+                jieba.add_word(term)
+            _jieba = jieba
+        except ImportError:
+            logger.info("jieba not installed, using dictionary-based segmentation")
+    return _jieba
+
+
+# ================================ 分词 ================================
+
+
+def _segment_chinese(run: str) -> List[str]:
+    """
+    对连续中文做分词，返回词列表，None表示分隔（停用词位置）
+
+    优先使用jieba；不可用时对词典和停用词做正向最大匹配，
+    未登录的连续字符作为一个词。
+    """
+    jieba = _get_jieba()
+    if jieba is not None:
+        return [None if word in CHINESE_STOPWORDS else word for word in jieba.lcut(run)]
+
+    tokens = []
+    unknown = []
+
+    def flush_unknown():
+        if unknown:
+            tokens.append(''.join(unknown))
+            unknown.clear()
+
+    i = 0
+    while i < len(run):
+        matched = None
+        for length in range(min(_MAX_TERM_LENGTH, len(run) - i), 0, -1):
+            word = run[i:i + length]
+            if word in TERM_DICTIONARY or word in CHINESE_STOPWORDS:
+                matched = word
+                break
+        if matched is None:
+            unknown.append(run[i])
+            i += 1
+            continue
+        flush_unknown()
+        tokens.append(None if matched in CHINESE_STOPWORDS else matched)
+        i += len(matched)
+    flush_unknown()
+    return tokens
+
+
+def tokenize(text: str) -> List[List[str]]:
+    """
+    把文本切分为候选短语，每个短语是相邻实词的列表
+
+    Args:
+        text (str): 输入文本
+
+    Returns:
+        List[List[str]]: 候选短语列表
+    """
+    phrases: List[List[str]] = []
+    current: List[str] = []
+    last_end = 0
+
+    def close_phrase():
+        if current:
+            phrases.append(list(current))
+            current.clear()
+
+    for match in _SEGMENT_PATTERN.finditer(text):
+        # 段与段之间出现标点等字符时断开短语
+        if text[last_end:match.start()].strip():
+            close_phrase()
+        last_end = match.end()
+        segment = match.group(0)
+
+        if segment[0].isascii():
+            if segment.lower() in ENGLISH_STOPWORDS:
+                close_phrase()
+            else:
+                current.append(segment)
+            continue
+
+        for token in _segment_chinese(segment):
+            if token is None or len(token) < 2:
+                close_phrase()
+            else:
+                current.append(token)
+    close_phrase()
+    return phrases
+
+
+# ================================ TextRank 打分 ================================
+
+
+def _textrank(phrases: List[List[str]], window: int = 3, iterations: int = 30, damping: float = 0.85) -> Dict[str, float]:
+    """在词共现图上运行TextRank，返回每个词的得分"""
+    sequence = [token for phrase in phrases for token in phrase]
+    neighbors = defaultdict(set)
+    for i, token in enumerate(sequence):
+        for other in sequence[i + 1:i + window]:
+            if other != token:
+                neighbors[token].add(other)
+                neighbors[other].add(token)
+
+    scores = {token: 1.0 for token in sequence}
+    for _ in range(iterations):
+        scores = {
+            token: (1 - damping) + damping * sum(
+                scores[other] / len(neighbors[other]) for other in neighbors[token]
+            )
+            for token in scores
+        }
+    return scores
+
+
+def rank_phrases(title: str, details: str, max_length: int = 10) -> List[Tuple[str, float]]:
+    """
+    对标题和研究方案中的候选短语打分排序
+
+    Args:
+        title (str): 论文标题
+        details (str): 研究方案
+        max_length (int): 短语最大字符数
+
+    Returns:
+        List[Tuple[str, float]]: (短语, 得分) 列表，按得分降序
+    """
+    title_phrases = tokenize(title or "")
+    phrases = title_phrases + tokenize(details or "")
+    token_scores = _textrank(phrases)
+    title_tokens = {token for phrase in title_phrases for token in phrase}
+
+    phrase_scores: Dict[str, float] = {}
+    for phrase in phrases:
+        # 过长短语截取前若干词，保证不超过长度限制
+        while phrase and len(_join_tokens(phrase)) > max_length:
+            phrase = phrase[:-1]
+        if not phrase:
+            continue
+        text = _join_tokens(phrase)
+        score = sum(token_scores.get(token, 0.0) for token in phrase)
+        if any(token in title_tokens for token in phrase):
+            score *= 1.5
+        if any(token in TERM_DICTIONARY for token in phrase):
+            score *= 1.2
+        phrase_scores[text] = phrase_scores.get(text, 0.0) + score
+
+    return sorted(phrase_scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _join_tokens(tokens: List[str]) -> str:
+    """拼接词：英文词之间保留空格，中文直接相连"""
+    text = ""
+    for token in tokens:
+        if text and text[-1].isascii() and token[0].isascii():
+            text += " "
+        text += token
+    return text
+
+
+# ================================ 关键词提取 ================================
+
+
+def extract_zhihu_keywords(title: str, details: str, count: int = 3) -> List[str]:
+    """
+    提取知乎搜索关键词
+
+    Args:
+        title (str): 论文标题
+        details (str): 研究方案
+        count (int): 关键词数量
+
+    Returns:
+        List[str]: 关键词列表，每个不超过10个字
+    """
+    keywords: List[str] = []
+    for phrase, _ in rank_phrases(title, details, max_length=10):
+        # 跳过与已选关键词互相包含的短语
+        if any(phrase in chosen or chosen in phrase for chosen in keywords):
+            continue
+        keywords.append(phrase)
+        if len(keywords) >= count:
+            break
+    return keywords
+
+
+def extract_arxiv_keywords(title: str, details: str, groups: int = 2, group_size: int = 2) -> List[List[str]]:
+    """
+    提取arXiv英文关键词组合
+
+    中文术语通过 TERM_DICTIONARY 映射为英文，原文中的英文术语直接使用。
+
+    Args:
+        title (str): 论文标题
+        details (str): 研究方案
+        groups (int): 关键词组数
+        group_size (int): 每组关键词个数
+
+    Returns:
+        List[List[str]]: 关键词组列表，无法得到英文术语时返回空列表
+    """
+    phrases = tokenize(title or "") + tokenize(details or "")
+    token_scores = _textrank(phrases)
+
+    terms: List[str] = []
+    for token, _ in sorted(token_scores.items(), key=lambda item: (-item[1], item[0])):
+        if token in TERM_DICTIONARY:
+            term = TERM_DICTIONARY[token]
+        elif token.isascii() and len(token) > 1:
+            term = token
+        else:
+            continue
+        if term.lower() not in (t.lower() for t in terms):
+            terms.append(term)
+
+    terms = terms[:groups * group_size]
+    if not terms:
+        return []
+    if len(terms) >= groups * group_size:
+        return [terms[i * group_size:(i + 1) * group_size] for i in range(groups)]
+    if len(terms) > group_size:
+        # 术语不足时，每组都以最重要的术语为核心
+        return [[terms[0]] + terms[1 + i * (group_size - 1):1 + (i + 1) * (group_size - 1)]
+                for i in range(groups) if terms[1 + i * (group_size - 1):1 + (i + 1) * (group_size - 1)]]
+    return [[term] for term in terms]
+
+
+def extract_local_keywords(title: str, details: str) -> Dict[str, List]:
+    """
+    本地提取知乎和arXiv两组搜索关键词，不调用大模型
+
+    Args:
+        title (str): 论文标题
+        details (str): 研究方案
+
+    Returns:
+        Dict[str, List]: {"zhihu": [...], "arxiv": [[...], [...]]}
+    """
+    return {
+        "zhihu": extract_zhihu_keywords(title, details),
+        "arxiv": extract_arxiv_keywords(title, details),
+    }
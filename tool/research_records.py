@@ -0,0 +1,209 @@
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ================================ 字节上限 ================================
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """
+    把文本截断到UTF-8编码不超过 max_bytes 字节，不会截断半个字符
+
+    只编码前 max_bytes 个字符，临时占用与上限成正比，与原文长度无关。
+    """
+    if max_bytes <= 0:
+        return ""
+    if len(text) * 4 <= max_bytes:
+        return text
+    head = text[:max_bytes]
+    encoded = head.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return head
+    return encoded[:max_bytes].decode('utf-8', 'ignore')
+
+
+class ByteBudget:
+    """
+    单个请求内某类文本（上传文件正文、抓取的网页内容）的总字节上限
+
+    多个搜索线程可共用同一个预算；预算用完后 take 返回空字符串，调用方据此停止抓取。
+    """
+
+    def __init__(self, max_bytes: int, item_max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.item_max_bytes = item_max_bytes
+        self.used = 0
+        # 被截断丢弃的字符数（按字符统计，避免为统计再编码一遍原文）
+        self.truncated_chars = 0
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.max_bytes
+
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.max_bytes - self.used)
+
+    def take(self, text: str) -> str:
+        """按单条上限和剩余预算截断文本并扣减预算"""
+        if not text:
+            return text
+        with self._lock:
+            limit = self.max_bytes - self.used
+            if self.item_max_bytes is not None:
+                limit = min(limit, self.item_max_bytes)
+            kept = truncate_utf8(text, limit)
+            # kept 不超过 limit 字节，编码开销与上限成正比
+            self.used += len(kept.encode('utf-8'))
+            if kept is not text:
+                self.truncated_chars += len(text) - len(kept)
+        return kept
+
+
+# ================================ 搜索结果记录 ================================
+
+
+class ZhihuPage:
+    """知乎页面：搜索关键词、链接和正文"""
+
+    __slots__ = ("keyword", "link", "content")
+
+    def __init__(self, keyword: str, link: str, content: str):
+        self.keyword = keyword
+        self.link = link
+        self.content = content
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ZhihuPage":
+        return cls(data.get("keyword", ""), data.get("zhihu_link", ""), data.get("content", ""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """接口和报告存储使用的格式"""
+        return {"keyword": self.keyword, "zhihu_link": self.link, "content": self.content}
+
+
+class ArxivEntry:
+    """
+    arXiv论文
+
+    作者和链接保存为字符串元组，不再为每位作者、每个链接各建一个字典；
+    to_dict 还原为 query_arxiv 的条目格式。
+    """
+
+    __slots__ = (
+        "id", "title", "summary", "published", "updated", "authors", "affiliations", "links",
+        "categories", "primary_category", "doi", "comment", "journal_ref",
+    )
+
+    # 链接元组中各位置对应的字段
+    LINK_FIELDS = ("href", "rel", "type", "title")
+
+    # 可选字段，不存在时 to_dict 不输出
+    OPTIONAL_FIELDS = ("doi", "comment", "journal_ref", "primary_category")
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        summary: str,
+        published: Optional[str] = None,
+        updated: Optional[str] = None,
+        authors: Tuple[str, ...] = (),
+        affiliations: Optional[Tuple[Optional[str], ...]] = None,
+        links: Tuple[Tuple[Optional[str], ...], ...] = (),
+        categories: Optional[Tuple[str, ...]] = None,
+        primary_category: Optional[str] = None,
+        doi: Optional[str] = None,
+        comment: Optional[str] = None,
+        journal_ref: Optional[str] = None
+    ):
+        self.id = id
+        self.title = title
+        self.summary = summary
+        self.published = published
+        self.updated = updated
+        self.authors = authors
+        self.affiliations = affiliations
+        self.links = links
+        self.categories = categories
+        self.primary_category = primary_category
+        self.doi = doi
+        self.comment = comment
+        self.journal_ref = journal_ref
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArxivEntry":
+        """从 query_arxiv 的条目（或报告中保存的条目）构造"""
+        authors = data.get("authors") or []
+        affiliations = tuple(a.get("affiliation") for a in authors)
+        links = tuple(tuple(link.get(field) for field in cls.LINK_FIELDS) for link in data.get("links") or [])
+        categories = data.get("categories")
+        return cls(
+            data.get("id"),
+            data.get("title"),
+            data.get("summary"),
+            data.get("published"),
+            data.get("updated"),
+            tuple(a.get("name") for a in authors),
+            affiliations if any(affiliations) else None,
+            links,
+            tuple(categories) if categories else None,
+            data.get("primary_category"),
+            data.get("doi"),
+            data.get("comment"),
+            data.get("journal_ref"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """接口和报告存储使用的格式，与 query_arxiv 的条目相同"""
+        authors = []
+        for index, name in enumerate(self.authors):
+            author = {"name": name}
+            if self.affiliations and self.affiliations[index] is not None:
+                author["affiliation"] = self.affiliations[index]
+            authors.append(author)
+        links = []
+        for link in self.links:
+            link_data = dict(zip(self.LINK_FIELDS[:3], link[:3]))
+            if link[3] is not None:
+                link_data["title"] = link[3]
+            links.append(link_data)
+        data = {
+            "id": self.id,
+            "title": self.title,
+            "summary": self.summary,
+            "published": self.published,
+            "updated": self.updated,
+            "authors": authors,
+            "links": links,
+        }
+        for field in self.OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        if self.categories:
+            data["categories"] = list(self.categories)
+        return data
+
+
+# ================================ 提示上下文 ================================
+
+
+def encode_for_prompt(items: Iterable[Any]) -> str:
+    """
+    把记录（或上传文件等普通字典）编码为放入提示的JSON数组
+
+    记录还原为 to_dict 的完整字段，编码格式与原先直接编码搜索结果相同，提示内容不变。
+    研究阶段对每类资料只编码一次，开题报告、实验设计和各生成变体共用同一个字符串。
+    """
+    return json.dumps(
+        [item.to_dict() if hasattr(item, "to_dict") else item for item in items],
+        ensure_ascii=False,
+        indent=4
+    )
+
+
+def records_to_dicts(records: Iterable[Any]) -> List[Dict[str, Any]]:
+    """把记录转换为接口返回和报告存储使用的字典列表"""
+    return [record.to_dict() for record in records]
@@ -0,0 +1,272 @@
+import os
+import re
+import json
+import math
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger('retrieval')
+
+# 索引文件格式版本，分段或分词方式变化时递增
+INDEX_VERSION = 1
+
+# 分段时优先在这些字符之后断开
+_BOUNDARIES = ('\n', '。', '！', '？', '；', '.', '!', '?', ';')
+
+_TERM_PATTERN = re.compile(r'[a-z0-9]+|[一-鿿]+')
+
+# ================================ 分段与分词 ================================
+
+
+def split_passages(text: str, size: int, overlap: int) -> List[str]:
+    """
+    把文档切分为相互重叠的段落
+
+    每段不超过 size 个字符，尽量在换行或句末断开；相邻两段重叠约 overlap 个字符，
+    避免关键信息恰好被切断。
+
+    Args:
+        text (str): 文档全文
+        size (int): 每段最大字符数
+        overlap (int): 相邻段落重叠的字符数
+
+    Returns:
+        List[str]: 段落列表
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+
+    passages = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            # 在后半段寻找最后一个断句位置
+            boundary = max(text.rfind(char, start + size // 2, end) for char in _BOUNDARIES)
+            if boundary != -1:
+                end = boundary + 1
+        passage = text[start:end].strip()
+        if passage:
+            passages.append(passage)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return passages
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """检索用分词：英文按单词（小写），中文按相邻两字（单字词保留单字）"""
+    terms = []
+    for run in _TERM_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+# ================================ BM25 索引 ================================
+
+
+class BM25Index:
+    """单个文档的段落级BM25索引"""
+
+    def __init__(self, passages: List[str], term_freqs: Optional[List[Dict[str, int]]] = None, k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.term_freqs = term_freqs if term_freqs is not None else [dict(Counter(tokenize_terms(p))) for p in passages]
+        self.k1 = k1
+        self.b = b
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        doc_freqs = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(passages)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def score(self, query: str) -> List[float]:
+        """每个段落对查询的BM25得分"""
+        query_terms = set(tokenize_terms(query))
+        scores = []
+        for tf, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """返回得分最高的 top_k 个 (段落序号, 得分)"""
+        ranked = sorted(enumerate(self.score(query)), key=lambda item: item[1], reverse=True)
+        return ranked[:top_k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "passages": self.passages, "term_freqs": self.term_freqs}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BM25Index":
+        return cls(data["passages"], data["term_freqs"])
+
+
+def prune_index_dir(index_dir: str, max_bytes: int, keep: Optional[str] = None) -> int:
+    """
+    索引目录超过总字节上限时，按修改时间（加载时会更新，即最近使用时间）从旧到新删除索引
+
+    Args:
+        index_dir (str): 索引目录
+        max_bytes (int): 总字节上限
+        keep (Optional[str]): 不删除的索引文件路径（刚写入的索引）
+
+    Returns:
+        int: 删除的文件数
+    """
+    entries = []
+    total = 0
+    for name in os.listdir(index_dir):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(index_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    for _, file_size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= file_size
+        removed += 1
+    if removed:
+        logger.info(f"检索索引超过 {max_bytes} 字节上限，删除最久未使用的 {removed} 个索引")
+    return removed
+
+
+def get_file_index(
+    content: str,
+    index_dir: Optional[str] = None,
+    size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> BM25Index:
+    """
+    获取文档的BM25索引，按内容哈希持久化，同一文件再次上传时直接加载
+
+    索引目录按最近使用时间淘汰，总大小不超过 max_bytes。
+
+    Args:
+        content (str): 文档全文（file_parser 解析出的 fileContent）
+        index_dir (Optional[str]): 索引目录，默认读取配置
+        size (Optional[int]): 段落最大字符数，默认读取配置
+        overlap (Optional[int]): 段落重叠字符数，默认读取配置
+        max_bytes (Optional[int]): 索引目录的总字节上限，默认读取配置
+
+    Returns:
+        BM25Index: 段落索引
+    """
+    index_dir = index_dir or settings.RETRIEVAL_INDEX_DIR
+    size = size or settings.RETRIEVAL_PASSAGE_CHARS
+    overlap = overlap if overlap is not None else settings.RETRIEVAL_PASSAGE_OVERLAP
+    max_bytes = max_bytes if max_bytes is not None else settings.RETRIEVAL_INDEX_MAX_BYTES
+
+    digest = hashlib.sha256(f"{INDEX_VERSION}:{size}:{overlap}:{content}".encode('utf-8')).hexdigest()
+    path = os.path.join(index_dir, f"{digest}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = BM25Index.from_dict(json.load(f))
+        # 更新修改时间，淘汰时视为最近使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return index
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"加载检索索引失败，重新构建: {str(e)}")
+
+    index = BM25Index(split_passages(content, size, overlap))
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        prune_index_dir(index_dir, max_bytes, keep=path)
+    except Exception as e:
+        logger.warning(f"保存检索索引失败: {str(e)}")
+    return index
+
+
+# ================================ 构造提示上下文 ================================
+
+
+def build_file_context(files: List[Dict[str, Any]], query: str, max_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    为上传文件构造长度有界的提示上下文
+
+    所有文件正文总长不超过 max_chars 时原样返回；否则把每个文件的 fileContent 替换为
+    各文件开头段落加上与查询最相关的段落（按原文顺序，以省略号分隔），总长不超过 max_chars。
+
+    Args:
+        files (List[Dict[str, Any]]): file_parser 的解析结果
+        query (str): 检索查询，如论文标题、研究方案和当前章节
+        max_chars (Optional[int]): 正文总字符数上限，默认读取配置
+
+    Returns:
+        List[Dict[str, Any]]: 与输入结构相同的文件列表（不修改输入）
+    """
+    max_chars = max_chars or settings.RETRIEVAL_MAX_PROMPT_CHARS
+    total_chars = sum(len(f.get('fileContent') or '') for f in files)
+    if total_chars <= max_chars:
+        return files
+
+    indexes = [get_file_index(f.get('fileContent') or '') for f in files]
+
+    # 候选段落：各文件开头段落优先（通常包含题目和摘要），其余按BM25得分排序
+    candidates = []
+    for file_index, index in enumerate(indexes):
+        for passage_index, score in enumerate(index.score(query)):
+            priority = float('inf') if passage_index == 0 else score
+            candidates.append((priority, file_index, passage_index))
+    candidates.sort(key=lambda item: item[0], reverse=True)
+
+    selected: Dict[int, List[int]] = {i: [] for i in range(len(files))}
+    used = 0
+    for priority, file_index, passage_index in candidates:
+        length = len(indexes[file_index].passages[passage_index])
+        if used + length > max_chars:
+            continue
+        if priority <= 0 and passage_index != 0:
+            break
+        selected[file_index].append(passage_index)
+        used += length
+
+    contexts = []
+    for file_index, file in enumerate(files):
+        passages = indexes[file_index].passages
+        chosen = sorted(selected[file_index])
+        context = dict(file)
+        context['fileContent'] = "\n……\n".join(passages[i] for i in chosen)
+        contexts.append(context)
+
+    logger.info(f"上传文件检索：{total_chars} 字符压缩到 {used} 字符")
+    return contexts
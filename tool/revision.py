@@ -0,0 +1,104 @@
+import json
+import hashlib
+import difflib
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from api.search_cache import normalize_query
+
+# ================================ 输入比对 ================================
+
+
+def text_similarity(old: str, new: str, threshold: Optional[float] = None) -> float:
+    """
+    两段文本归一化（全角、大小写、标点、空白）后的相似度，取值 0~1
+
+    先用 quick_ratio 的上界快速排除差异很大的文本（此时返回上界），再计算精确的匹配比例。
+
+    Args:
+        old (str): 原文本
+        new (str): 新文本
+        threshold (Optional[float]): 关心的最低相似度，默认读取配置
+
+    Returns:
+        float: 相似度；低于 threshold 时为近似值
+    """
+    threshold = threshold if threshold is not None else settings.REVISION_SIMILARITY_THRESHOLD
+    old, new = normalize_query(old), normalize_query(new)
+    if old == new:
+        return 1.0
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    upper_bound = matcher.quick_ratio()
+    if upper_bound < threshold:
+        return upper_bound
+    return matcher.ratio()
+
+
+def fingerprint_files(files: List[Dict[str, Any]]) -> str:
+    """上传文件解析结果的内容指纹，没有文件时为空字符串"""
+    if not files:
+        return ""
+    contents = sorted(f.get('fileContent') or '' for f in files)
+    return hashlib.sha256(json.dumps(contents, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+
+
+def plan_revision(
+    previous: Dict[str, Any],
+    title: str,
+    details: str,
+    academic_level: str,
+    country: str,
+    files: Dict[str, str],
+    threshold: Optional[float] = None
+) -> Dict[str, bool]:
+    """
+    对比上一次生成的输入，决定哪些阶段可以直接复用上次的结果
+
+    - 知乎搜索：标题和方案相似、学术层次相同（关键词提示包含学术层次）
+    - arXiv搜索：标题和方案相似、没有上传论文文件
+    - 开题报告：标题和方案归一化后完全相同，学术层次、国家、上传的开题报告和参考资料都未变化
+    - 实验设计：开题报告可复用且上传的实验设计未变化
+
+    Args:
+        previous (Dict[str, Any]): 上一次的报告（报告存储中的内容）
+        title (str): 新的论文标题
+        details (str): 新的研究方案
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        files (Dict[str, str]): 新上传文件的指纹 {"proposal", "experiment", "paper"}
+        threshold (Optional[float]): 判定为相似的最低相似度，默认读取配置
+
+    Returns:
+        Dict[str, bool]: {"zhihu", "arxiv", "proposal", "experiment"} 各阶段是否复用
+    """
+    threshold = threshold if threshold is not None else settings.REVISION_SIMILARITY_THRESHOLD
+    previous_input = previous.get('input') or {}
+    previous_research = previous.get('research') or {}
+    previous_files = previous_research.get('files') or {}
+
+    def file_unchanged(kind: str) -> bool:
+        return (files.get(kind) or "") == (previous_files.get(kind) or "")
+
+    old_text = f"{previous_input.get('title', '')}\n{previous_input.get('details', '')}"
+    new_text = f"{title}\n{details}"
+    similarity = text_similarity(old_text, new_text, threshold)
+    same_level = previous_input.get('academicLevel') == academic_level
+
+    zhihu = similarity >= threshold and same_level and bool(previous_research.get('keywords'))
+    arxiv = (
+        similarity >= threshold
+        and not files.get('paper')
+        and file_unchanged('paper')
+        and bool(previous_research.get('paper_keywords'))
+    )
+    references_unchanged = arxiv or (bool(files.get('paper')) and file_unchanged('paper'))
+    proposal = (
+        similarity == 1.0
+        and zhihu
+        and references_unchanged
+        and previous_input.get('country') == country
+        and file_unchanged('proposal')
+        and bool(previous.get('proposal'))
+    )
+    experiment = proposal and file_unchanged('experiment') and bool(previous.get('experiment_design'))
+    return {"zhihu": zhihu, "arxiv": arxiv, "proposal": proposal, "experiment": experiment}
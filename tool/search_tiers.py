@@ -0,0 +1,122 @@
+import math
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+from tool.local_keywords import tokenize
+from utils.metrics import metrics
+
+logger = logging.getLogger('search_tiers')
+
+# ================================ 结果充分性 ================================
+
+
+def keyword_terms(keyword: str) -> List[str]:
+    """关键词切分后的检索词（小写）"""
+    return [token.lower() for phrase in tokenize(keyword) for token in phrase]
+
+
+def result_relevance(terms: List[str], result: Dict[str, Any]) -> float:
+    """
+    单条搜索结果与关键词的相关度（0~1）
+
+    取Tavily返回的相关度分数与检索词在标题和摘要中覆盖率的较大值。
+    """
+    score = result.get("score") or 0.0
+    if not terms:
+        return score
+    text = f"{result.get('title') or ''} {result.get('content') or ''}".lower()
+    coverage = sum(1 for term in terms if term in text) / len(terms)
+    return max(score, coverage)
+
+
+def is_sufficient(
+    keyword: str,
+    results: List[Dict[str, Any]],
+    max_results: int,
+    min_relevance: Optional[float] = None,
+    sufficient_ratio: Optional[float] = None
+) -> bool:
+    """
+    判断一次搜索的结果是否足够
+
+    相关度不低于 min_relevance 的结果数达到 max_results * sufficient_ratio（向上取整）时视为足够。
+
+    Args:
+        keyword (str): 搜索关键词
+        results (List[Dict[str, Any]]): 搜索结果，含 title/content/score
+        max_results (int): 请求的结果数
+        min_relevance (Optional[float]): 相关结果的最低相关度，默认读取配置
+        sufficient_ratio (Optional[float]): 相关结果占请求数的比例，默认读取配置
+
+    Returns:
+        bool: 结果是否足够
+    """
+    if min_relevance is None:
+        min_relevance = settings.ZHIHU_MIN_RELEVANCE
+    if sufficient_ratio is None:
+        sufficient_ratio = settings.ZHIHU_SUFFICIENT_RATIO
+    terms = keyword_terms(keyword)
+    relevant = sum(1 for result in results if result_relevance(terms, result) >= min_relevance)
+    return relevant >= max(1, math.ceil(max_results * sufficient_ratio))
+
+
+# ================================ 逐级搜索 ================================
+
+
+def escalating_search(
+    keyword: str,
+    max_results: int,
+    search_at_depth: Callable[[str], List[Dict[str, Any]]],
+    tiers: Optional[List[str]] = None,
+    upstream: str = "tavily"
+) -> List[Dict[str, Any]]:
+    """
+    从最便宜的搜索深度开始，结果不足时才升级到下一档
+
+    升级后合并各档结果，按链接去重、按相关度排序后取前 max_results 条。
+    每档的耗时和是否足够记录到指标 search_tier_latency_seconds / search_tier。
+
+    Args:
+        keyword (str): 搜索关键词
+        max_results (int): 需要的结果数
+        search_at_depth (Callable[[str], List]): 按给定深度执行搜索的函数
+        tiers (Optional[List[str]]): 搜索深度，从低到高，默认读取配置
+        upstream (str): 上游名称，用于指标标签
+
+    Returns:
+        List[Dict[str, Any]]: 搜索结果
+
+    Raises:
+        Exception: 所有档位都失败时抛出最后一次的异常
+    """
+    tiers = tiers or settings.ZHIHU_SEARCH_TIERS
+    terms = keyword_terms(keyword)
+    merged: Dict[str, Dict[str, Any]] = {}
+    last_error = None
+
+    for index, depth in enumerate(tiers):
+        start = time.monotonic()
+        try:
+            results = search_at_depth(depth)
+        except Exception as e:
+            # 低档失败时继续尝试高档
+            last_error = e
+            logger.warning(f"{upstream} {depth} 搜索失败: {str(e)}")
+            continue
+        finally:
+            metrics.observe("search_tier_latency_seconds", time.monotonic() - start, {"upstream": upstream, "depth": depth})
+
+        for result in results:
+            merged.setdefault(result["url"], result)
+        sufficient = is_sufficient(keyword, list(merged.values()), max_results)
+        metrics.increment("search_tier", {"upstream": upstream, "depth": depth, "sufficient": sufficient})
+        if sufficient or index == len(tiers) - 1:
+            break
+        logger.info(f"关键词 {keyword} 的 {depth} 搜索结果不足，升级到 {tiers[index + 1]}")
+
+    if not merged and last_error is not None:
+        raise last_error
+    ranked = sorted(merged.values(), key=lambda r: result_relevance(terms, r), reverse=True)
+    return ranked[:max_results]
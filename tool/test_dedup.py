@@ -0,0 +1,63 @@
+import random
+import unittest
+import sys
+from pathlib import Path
+
+# 导入近重复过滤
+sys.path.insert(0, str(Path(__file__).parent))
+from dedup import SIMHASH_BITS, NearDuplicateFilter, SimHashIndex, hamming_distance, simhash
+
+ANSWER = (
+    "图神经网络通过消息传递聚合邻居节点的特征，在分子性质预测中可以直接把原子看作节点、化学键看作边。"
+    "实践中常用的模型包括GCN、GAT和MPNN，训练时需要注意过平滑问题，层数一般不超过四层。"
+    "数据集方面推荐先在MoleculeNet上验证，再迁移到自己的任务。"
+) * 3
+OTHER = (
+    "强化学习中的策略梯度方法直接优化期望回报，PPO通过裁剪概率比来限制每次更新的幅度，"
+    "在机器人控制和游戏任务中表现稳定，调参时重点关注学习率和优势函数的归一化。"
+) * 3
+
+
+class TestDedup(unittest.TestCase):
+
+    def test_simhash_near_duplicates(self):
+        """转载时的少量改动和格式差异，指纹距离很小；不同内容距离很大"""
+        reposted = "转载自知乎：\n\n" + ANSWER.replace("推荐", "建议") + "\n\n（完）"
+        self.assertEqual(simhash(ANSWER), simhash("  " + ANSWER.upper() + "  "))
+        self.assertLessEqual(hamming_distance(simhash(ANSWER), simhash(reposted)), 6)
+        self.assertGreater(hamming_distance(simhash(ANSWER), simhash(OTHER)), 10)
+
+    def test_filter_drops_and_reports(self):
+        """重复页面被丢弃并统计节省的字节和token"""
+        dedup = NearDuplicateFilter(max_distance=6)
+        self.assertTrue(dedup.add(ANSWER))
+        self.assertFalse(dedup.add("转载：" + ANSWER))
+        self.assertTrue(dedup.add(OTHER))
+        stats = dedup.stats()
+        self.assertEqual(stats["kept"], 2)
+        self.assertEqual(stats["dropped"], 1)
+        self.assertGreater(stats["bytes_saved"], len(ANSWER))
+        self.assertGreater(stats["tokens_saved"], 100)
+
+    def test_index_bands_balanced(self):
+        """各段位数相差不超过1且覆盖全部64位；距离不超过上限的指纹总能找到"""
+        for max_distance in (3, 6, 10):
+            index = SimHashIndex(max_distance)
+            widths = [bin(mask).count('1') for _, mask in index.band_layout]
+            self.assertEqual(sum(widths), SIMHASH_BITS)
+            self.assertLessEqual(max(widths) - min(widths), 1)
+        self.assertEqual(sorted(bin(mask).count('1') for _, mask in SimHashIndex(6).band_layout), [9] * 6 + [10])
+
+        rng = random.Random(0)
+        index = SimHashIndex(6)
+        for _ in range(200):
+            fingerprint = rng.getrandbits(SIMHASH_BITS)
+            index.add(fingerprint)
+            flipped = fingerprint
+            for bit in rng.sample(range(SIMHASH_BITS), 6):
+                flipped ^= 1 << bit
+            self.assertIsNotNone(index.find(flipped))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+from pathlib import Path
+from unittest import mock
+
+# 导入知乎搜索
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from tool import deep_research
+
+PAGE = "图神经网络在分子性质预测中的应用" * 20
+
+
+def _no_cache(source, query, fetch, should_cache=None):
+    # 跳过搜索缓存，每次都执行真实（替身）请求
+    return fetch()
+
+
+class TestSearchZhihu(unittest.TestCase):
+
+    def setUp(self):
+        self.results = []
+        self.scraped = []
+        self.searches = []
+        for patcher in (
+            mock.patch.object(deep_research, "cached_search", _no_cache),
+            mock.patch.object(deep_research, "search_zhihu_pages", self._search),
+            mock.patch.object(deep_research, "query_singleWebsite", self._scrape),
+            mock.patch.object(deep_research.settings, "ZHIHU_SEARCH_TIERS", ["advanced"]),
+            mock.patch.object(deep_research.settings, "ZHIHU_TAVILY_RAW_CONTENT", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _search(self, keyword, N, include_raw_content=False, search_depth="advanced", timeout=60):
+        self.searches.append(include_raw_content)
+        return self.results
+
+    def _scrape(self, url, includeMarkdown=True, timeout=30):
+        self.scraped.append(url)
+        return {"markdown": f"Serper:{url}"}
+
+    def _result(self, url, raw_content):
+        return {"url": url, "title": "", "content": "", "score": 0.9, "raw_content": raw_content}
+
+    def test_raw_content_used_directly(self):
+        """Tavily 返回了正文时直接使用，不调用 Serper"""
+        self.results = [self._result("https://zhuanlan.zhihu.com/p/1", PAGE)]
+        pages = deep_research.search_zhihu(["图神经网络"], 1)
+        self.assertEqual(self.searches, [True])
+        self.assertEqual(self.scraped, [])
+        self.assertEqual([(p.link, p.content) for p in pages], [("https://zhuanlan.zhihu.com/p/1", PAGE)])
+
+    def test_missing_or_blocked_content_falls_back_to_serper(self):
+        """正文缺失或是知乎安全验证页时改用 Serper 抓取"""
+        self.results = [
+            self._result("https://zhuanlan.zhihu.com/p/1", None),
+            self._result("https://zhuanlan.zhihu.com/p/2", deep_research.ZHIHU_SECURITY_PAGE),
+            self._result("https://zhuanlan.zhihu.com/p/3", PAGE),
+        ]
+        pages = deep_research.search_zhihu(["图神经网络"], 3)
+        self.assertEqual(self.scraped, ["https://zhuanlan.zhihu.com/p/1", "https://zhuanlan.zhihu.com/p/2"])
+        self.assertEqual(
+            [p.content for p in pages],
+            ["Serper:https://zhuanlan.zhihu.com/p/1", "Serper:https://zhuanlan.zhihu.com/p/2", PAGE]
+        )
+
+    def test_blocked_serper_page_dropped(self):
+        """Serper 抓到的也是安全验证页时丢弃该链接"""
+        self.results = [self._result("https://zhuanlan.zhihu.com/p/1", "")]
+        with mock.patch.object(deep_research, "query_singleWebsite",
+                               lambda url, **kwargs: {"markdown": deep_research.ZHIHU_SECURITY_PAGE}):
+            self.assertEqual(deep_research.search_zhihu(["图神经网络"], 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+from pathlib import Path
+
+# 导入增量解析器
+sys.path.insert(0, str(Path(__file__).parent))
+from keyword_stream import IncrementalJsonListExtractor, iter_json_list
+
+
+def split_chunks(text, size=3):
+    """把文本切成固定长度的片段，模拟流式输出"""
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalJsonListExtractor(unittest.TestCase):
+
+    def test_yield_when_string_closes(self):
+        """字符串闭合时立即返回，无需等待整个数组结束"""
+        extractor = IncrementalJsonListExtractor()
+        self.assertEqual(extractor.feed('["深度学习", "问'), ["深度学习"])
+        self.assertEqual(extractor.feed('答系统"'), ["问答系统"])
+        self.assertEqual(extractor.feed(', "知识'), [])
+        self.assertEqual(extractor.feed('推理"]'), ["知识推理"])
+        self.assertEqual(extractor.close(), [])
+        self.assertEqual(extractor.items, ["深度学习", "问答系统", "知识推理"])
+
+    def test_code_fence(self):
+        """兼容 ```json 代码块"""
+        text = '好的，关键词如下：\n```json\n["a", "b\\"c", "d"]\n```\n以上。'
+        self.assertEqual(list(iter_json_list(split_chunks(text))), ["a", 'b"c', "d"])
+
+    def test_bracket_in_preamble(self):
+        """前言中的引用编号 [1] 不会被当作关键词数组"""
+        text = '根据文献[1]和[ 2 ]，关键词如下: ["图神经网络", "分子性质预测"]'
+        self.assertEqual(list(iter_json_list(split_chunks(text))), ["图神经网络", "分子性质预测"])
+        text = '参考[1]:\n[\n  "a",\n  "b"\n]'
+        self.assertEqual(list(iter_json_list(split_chunks(text, 1))), ["a", "b"])
+
+    def test_nested_groups(self):
+        """arXiv关键词组：子列表闭合时返回"""
+        extractor = IncrementalJsonListExtractor()
+        self.assertEqual(extractor.feed('[["question answering", "LLM"], ["know'), [["question answering", "LLM"]])
+        self.assertEqual(extractor.feed('ledge graph"]]'), [["knowledge graph"]])
+
+    def test_numbered_list(self):
+        """编号列表格式按行返回"""
+        text = '1. "深度学习"\n2. 问答系统\n3、知识推理'
+        extractor = IncrementalJsonListExtractor()
+        items = []
+        for chunk in split_chunks(text):
+            items.extend(extractor.feed(chunk))
+        self.assertEqual(items, ["深度学习", "问答系统"])
+        self.assertEqual(extractor.close(), ["知识推理"])
+
+    def test_plain_lines_fallback(self):
+        """既无数组也无编号时，取前3行兜底"""
+        text = '深度学习\n问答系统\n知识推理\n多轮对话'
+        self.assertEqual(list(iter_json_list(split_chunks(text))), ["深度学习", "问答系统", "知识推理"])
+
+
+if __name__ == "__main__":
+    unittest.main()
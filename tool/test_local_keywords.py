@@ -0,0 +1,57 @@
+import time
+import unittest
+import sys
+from pathlib import Path
+
+# 导入本地关键词提取
+sys.path.insert(0, str(Path(__file__).parent))
+from local_keywords import extract_local_keywords, extract_zhihu_keywords, tokenize
+
+TITLE = "基于深度学习的智能问答系统研究"
+DETAILS = "研究如何利用大语言模型构建更准确、更自然的智能问答系统，重点解决多轮对话和知识推理问题。"
+
+
+class TestLocalKeywords(unittest.TestCase):
+
+    def test_tokenize_removes_stopwords(self):
+        """停用词和标点断开短语"""
+        phrases = tokenize(TITLE)
+        self.assertIn(["深度学习"], phrases)
+        for phrase in phrases:
+            self.assertNotIn("研究", phrase)
+            self.assertNotIn("基于", phrase)
+
+    def test_zhihu_keywords(self):
+        """知乎关键词：3个、不超过10个字、互不包含"""
+        keywords = extract_zhihu_keywords(TITLE, DETAILS)
+        self.assertEqual(len(keywords), 3)
+        self.assertIn("智能问答系统", keywords)
+        for keyword in keywords:
+            self.assertLessEqual(len(keyword), 10)
+            others = [k for k in keywords if k != keyword]
+            self.assertFalse(any(keyword in other for other in others))
+
+    def test_arxiv_keywords(self):
+        """arXiv关键词：中文术语映射为英文，分为2组"""
+        groups = extract_local_keywords(TITLE, DETAILS)["arxiv"]
+        self.assertEqual(len(groups), 2)
+        terms = [term for group in groups for term in group]
+        self.assertIn("question answering", terms)
+        self.assertTrue(all(term.isascii() for term in terms))
+
+    def test_english_terms_kept(self):
+        """原文中的英文术语直接作为arXiv关键词"""
+        groups = extract_local_keywords("基于Transformer的目标检测", "")["arxiv"]
+        terms = [term for group in groups for term in group]
+        self.assertIn("Transformer", terms)
+        self.assertIn("object detection", terms)
+
+    def test_fast(self):
+        """本地提取应在毫秒级完成"""
+        start = time.perf_counter()
+        extract_local_keywords(TITLE, DETAILS * 5)
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# 导入搜索结果记录
+sys.path.insert(0, str(Path(__file__).parent))
+from research_records import ArxivEntry, ZhihuPage, encode_for_prompt, records_to_dicts, truncate_utf8
+
+ENTRY = {
+    "id": "http://arxiv.org/abs/2101.00001v1",
+    "title": "Graph Neural Networks for Molecules",
+    "summary": "We study message passing.",
+    "published": "2021-01-01T00:00:00Z",
+    "updated": "2021-01-02T00:00:00Z",
+    "authors": [{"name": "Alice"}, {"name": "Bob", "affiliation": "MIT"}],
+    "links": [
+        {"href": "http://arxiv.org/abs/2101.00001v1", "rel": "alternate", "type": "text/html"},
+        {"href": "http://arxiv.org/pdf/2101.00001v1", "rel": "related", "type": "application/pdf", "title": "pdf"},
+    ],
+    "doi": "10.1000/xyz",
+    "primary_category": "cs.LG",
+    "categories": ["cs.LG", "stat.ML"],
+}
+
+
+class TestResearchRecords(unittest.TestCase):
+
+    def test_truncate_utf8(self):
+        """按字节截断不会留下半个汉字"""
+        text = "图神经网络" * 10
+        self.assertIs(truncate_utf8(text, 1000), text)
+        self.assertEqual(truncate_utf8(text, 7), "图神")
+        self.assertEqual(truncate_utf8("abc", 0), "")
+
+    def test_records_round_trip(self):
+        """记录没有实例字典，转换回字典与原始条目相同；提示编码与直接编码原始条目相同"""
+        entry = ArxivEntry.from_dict(ENTRY)
+        page = ZhihuPage("图神经网络", "https://zhuanlan.zhihu.com/p/1", "正文")
+        self.assertFalse(hasattr(entry, "__dict__"))
+        self.assertFalse(hasattr(page, "__dict__"))
+        self.assertEqual(records_to_dicts([entry]), [ENTRY])
+        self.assertEqual(ZhihuPage.from_dict(page.to_dict()).to_dict(), page.to_dict())
+
+        self.assertEqual(encode_for_prompt([entry]), json.dumps([ENTRY], ensure_ascii=False, indent=4))
+        self.assertEqual(json.loads(encode_for_prompt([{"fileName": "a.pdf"}])), [{"fileName": "a.pdf"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
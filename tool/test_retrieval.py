@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# 导入检索索引
+sys.path.insert(0, str(Path(__file__).parent))
+from retrieval import BM25Index, build_file_context, get_file_index, split_passages
+
+FILLER = "本章介绍论文的整体结构和写作安排，并对相关术语进行说明。" * 20
+TARGET = "实验采用对照组设计，使用准确率和召回率评估图神经网络模型在药物分子数据集上的效果。"
+
+
+class TestRetrieval(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_split_passages_overlap(self):
+        """段落长度有上限，相邻段落有重叠，覆盖全文"""
+        text = FILLER * 3
+        passages = split_passages(text, 200, 40)
+        self.assertTrue(all(len(p) <= 200 for p in passages))
+        self.assertTrue(passages[0][-20:] in passages[1])
+        self.assertTrue(text.endswith(passages[-1]))
+
+    def test_bm25_ranks_relevant_passage(self):
+        """与查询相关的段落得分最高"""
+        index = BM25Index([FILLER, TARGET, FILLER[:100]])
+        self.assertEqual(index.search("图神经网络 实验 评估", 1)[0][0], 1)
+
+    def test_index_persisted_by_hash(self):
+        """索引按内容哈希保存，再次获取时从文件加载"""
+        content = FILLER + TARGET + FILLER
+        index = get_file_index(content, self.tmpdir, 200, 40)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+        loaded = get_file_index(content, self.tmpdir, 200, 40)
+        self.assertEqual(loaded.passages, index.passages)
+        self.assertEqual(loaded.score(TARGET), index.score(TARGET))
+
+    def test_index_dir_capped_lru(self):
+        """索引目录超过上限时删除最久未使用的索引，刚使用过的保留"""
+        contents = [f"{i}{FILLER}{TARGET}" for i in range(3)]
+        paths = []
+        for i, content in enumerate(contents):
+            get_file_index(content, self.tmpdir, 200, 40, max_bytes=10 ** 9)
+            path = max((os.path.join(self.tmpdir, name) for name in os.listdir(self.tmpdir)), key=os.path.getmtime)
+            os.utime(path, (1000 + i, 1000 + i))
+            paths.append(path)
+        file_size = os.path.getsize(paths[0])
+
+        # 再次使用第一个索引，它变为最近使用
+        get_file_index(contents[0], self.tmpdir, 200, 40, max_bytes=10 ** 9)
+        get_file_index(f"新文件{FILLER}", self.tmpdir, 200, 40, max_bytes=file_size * 3)
+
+        remaining = os.listdir(self.tmpdir)
+        self.assertEqual(len(remaining), 3)
+        self.assertNotIn(os.path.basename(paths[1]), remaining)
+        self.assertIn(os.path.basename(paths[0]), remaining)
+
+    def test_build_file_context_bounded(self):
+        """长文档压缩到字符上限内，并保留相关段落"""
+        files = [{"fileName": "开题报告.docx", "fileBizType": 1, "fileContent": FILLER * 10 + TARGET + FILLER * 10}]
+        from config import settings
+        original = settings.RETRIEVAL_INDEX_DIR
+        settings.RETRIEVAL_INDEX_DIR = self.tmpdir
+        try:
+            contexts = build_file_context(files, "图神经网络 药物 实验", max_chars=2000)
+        finally:
+            settings.RETRIEVAL_INDEX_DIR = original
+        self.assertLessEqual(len(contexts[0]["fileContent"]), 2000 + 10)
+        self.assertIn("图神经网络模型", contexts[0]["fileContent"])
+        self.assertEqual(contexts[0]["fileName"], "开题报告.docx")
+        self.assertGreater(len(files[0]["fileContent"]), 10000)
+
+    def test_short_files_unchanged(self):
+        files = [{"fileName": "a.pdf", "fileBizType": 2, "fileContent": TARGET}]
+        self.assertIs(build_file_context(files, "实验", max_chars=2000), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+from pathlib import Path
+
+# 导入增量生成比对
+sys.path.insert(0, str(Path(__file__).parent))
+from revision import fingerprint_files, plan_revision, text_similarity
+
+TITLE = "基于图神经网络的分子性质预测研究"
+DETAILS = (
+    "研究如何利用图神经网络对分子结构进行建模，预测溶解度、毒性等性质。"
+    "计划在MoleculeNet数据集上比较GCN、GAT和MPNN，并引入预训练策略缓解标注数据不足的问题。"
+)
+NO_FILES = {"proposal": "", "experiment": "", "paper": ""}
+
+
+def make_previous(**overrides):
+    previous = {
+        "input": {"title": TITLE, "details": DETAILS, "academicLevel": "硕士", "country": "中国"},
+        "proposal": "# 开题报告",
+        "experiment_design": "# 实验设计",
+        "zhihu_research": [{"link": "https://zhuanlan.zhihu.com/p/1"}],
+        "arxiv_papers": [{"id": "1"}],
+        "research": {"keywords": ["图神经网络"], "paper_keywords": [["graph neural network"]], "files": dict(NO_FILES)},
+    }
+    previous.update(overrides)
+    return previous
+
+
+class TestRevision(unittest.TestCase):
+
+    def test_text_similarity(self):
+        """只改标点和大小写视为相同，改一句话仍然相似，换题目不相似"""
+        self.assertEqual(text_similarity("GNN，分子预测！", "gnn 分子预测"), 1.0)
+        edited = DETAILS.replace("缓解标注数据不足的问题", "缓解标注数据稀缺")
+        self.assertGreater(text_similarity(DETAILS, edited), 0.85)
+        self.assertLess(text_similarity(DETAILS, "研究强化学习在机器人控制中的应用"), 0.5)
+
+    def test_unchanged_inputs_reuse_everything(self):
+        plan = plan_revision(make_previous(), TITLE, DETAILS, "硕士", "中国", NO_FILES)
+        self.assertEqual(plan, {"zhihu": True, "arxiv": True, "proposal": True, "experiment": True})
+
+    def test_small_edit_reuses_research_only(self):
+        """方案小幅修改：复用搜索，重新生成开题报告和实验设计"""
+        edited = DETAILS.replace("缓解标注数据不足的问题", "缓解标注数据稀缺")
+        plan = plan_revision(make_previous(), TITLE, edited, "硕士", "中国", NO_FILES)
+        self.assertEqual(plan, {"zhihu": True, "arxiv": True, "proposal": False, "experiment": False})
+
+    def test_level_and_country_changes(self):
+        """学术层次影响知乎关键词，国家只影响生成阶段"""
+        plan = plan_revision(make_previous(), TITLE, DETAILS, "博士", "中国", NO_FILES)
+        self.assertEqual(plan, {"zhihu": False, "arxiv": True, "proposal": False, "experiment": False})
+        plan = plan_revision(make_previous(), TITLE, DETAILS, "硕士", "英国", NO_FILES)
+        self.assertEqual(plan, {"zhihu": True, "arxiv": True, "proposal": False, "experiment": False})
+
+    def test_new_experiment_file_regenerates_experiment_only(self):
+        files = dict(NO_FILES, experiment=fingerprint_files([{"fileContent": "实验步骤"}]))
+        plan = plan_revision(make_previous(), TITLE, DETAILS, "硕士", "中国", files)
+        self.assertEqual(plan, {"zhihu": True, "arxiv": True, "proposal": True, "experiment": False})
+
+    def test_failed_previous_search_not_reused(self):
+        """上一次搜索没有结果（如超时）时重新搜索"""
+        previous = make_previous(research={"keywords": [], "paper_keywords": [], "files": dict(NO_FILES)})
+        plan = plan_revision(previous, TITLE, DETAILS, "硕士", "中国", NO_FILES)
+        self.assertFalse(any(plan.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
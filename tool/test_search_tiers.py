@@ -0,0 +1,65 @@
+import unittest
+import sys
+from pathlib import Path
+
+# 导入逐级搜索
+sys.path.insert(0, str(Path(__file__).parent))
+from search_tiers import escalating_search, is_sufficient
+
+KEYWORD = "图神经网络 药物发现"
+
+
+def make_result(url, title="", score=0.0):
+    return {"url": url, "title": title, "content": "", "score": score}
+
+
+class TestSearchTiers(unittest.TestCase):
+
+    def test_is_sufficient(self):
+        """相关结果数达到比例要求才算足够"""
+        relevant = [make_result(f"u{i}", "图神经网络在药物发现中的应用") for i in range(2)]
+        irrelevant = [make_result("x", "今天吃什么")]
+        self.assertTrue(is_sufficient(KEYWORD, relevant + irrelevant, 3, 0.5, 0.6))
+        self.assertFalse(is_sufficient(KEYWORD, relevant[:1] + irrelevant, 3, 0.5, 0.6))
+        self.assertTrue(is_sufficient(KEYWORD, [make_result("y", score=0.9)] * 2, 3, 0.5, 0.6))
+
+    def test_basic_enough_no_escalation(self):
+        """basic 结果足够时不调用 advanced"""
+        depths = []
+
+        def search(depth):
+            depths.append(depth)
+            return [make_result(f"u{i}", score=0.9) for i in range(3)]
+
+        results = escalating_search(KEYWORD, 3, search, ["basic", "advanced"])
+        self.assertEqual(depths, ["basic"])
+        self.assertEqual(len(results), 3)
+
+    def test_escalates_and_merges(self):
+        """basic 结果不足时升级，合并去重后按相关度取前N条"""
+        def search(depth):
+            if depth == "basic":
+                return [make_result("a", score=0.2), make_result("b", score=0.6)]
+            return [make_result("b", score=0.6), make_result("c", score=0.9), make_result("d", score=0.8)]
+
+        results = escalating_search(KEYWORD, 3, search, ["basic", "advanced"])
+        self.assertEqual([r["url"] for r in results], ["c", "d", "b"])
+
+    def test_basic_failure_escalates(self):
+        """basic 失败时继续尝试 advanced，全部失败时抛出异常"""
+        def search(depth):
+            if depth == "basic":
+                raise ConnectionError("basic down")
+            return [make_result("c", score=0.9)]
+
+        self.assertEqual(len(escalating_search(KEYWORD, 3, search, ["basic", "advanced"])), 1)
+
+        def fail(depth):
+            raise ConnectionError(depth)
+
+        with self.assertRaises(ConnectionError):
+            escalating_search(KEYWORD, 3, fail, ["basic", "advanced"])
+
+
+if __name__ == "__main__":
+    unittest.main()
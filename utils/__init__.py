@@ -0,0 +1,23 @@
+from .deadline import (
+    Deadline,
+    DeadlineExceeded,
+    deadline_scope,
+    current_deadline,
+    remaining_time,
+    cap_timeout,
+    can_fit,
+    sleep_within_deadline,
+    run_with_context,
+)
+
+__all__ = [
+    'Deadline',
+    'DeadlineExceeded',
+    'deadline_scope',
+    'current_deadline',
+    'remaining_time',
+    'cap_timeout',
+    'can_fit',
+    'sleep_within_deadline',
+    'run_with_context',
+]
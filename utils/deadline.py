@@ -0,0 +1,142 @@
+import time
+import contextvars
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from utils.profiling import current_thread_stage, track_thread
+
+
+class DeadlineExceeded(TimeoutError):
+    """请求整体截止时间已到"""
+
+
+class Deadline:
+    """
+    请求级截止时间
+
+    使用单调时钟计算剩余预算，各阶段、各次上游调用从同一个截止时间中扣减。
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """剩余秒数，已过期时为0"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str = ""):
+        """已过期时抛出 DeadlineExceeded"""
+        if self.expired():
+            where = f"（{stage}）" if stage else ""
+            raise DeadlineExceeded(f"请求已超过截止时间 {self.seconds} 秒{where}")
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    'current_deadline', default=None
+)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    在当前上下文中设置截止时间
+
+    已存在更早的截止时间时保留更早的那个；seconds 为空时不做任何限制。
+
+    Args:
+        seconds (Optional[float]): 从现在起的预算秒数
+    """
+    outer = _current_deadline.get()
+    deadline = Deadline(seconds) if seconds else None
+    if outer is not None and (deadline is None or outer.expires_at <= deadline.expires_at):
+        deadline = outer
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """当前上下文的截止时间，未设置时返回None"""
+    return _current_deadline.get()
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """当前截止时间的剩余秒数，未设置截止时间时返回 default"""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else default
+
+
+def cap_timeout(timeout: float, stage: str = "") -> float:
+    """
+    用剩余预算截断单次调用的超时时间
+
+    Args:
+        timeout (float): 调用方期望的超时时间
+        stage (str): 阶段名称，用于错误信息
+
+    Returns:
+        float: 不超过剩余预算的超时时间
+
+    Raises:
+        DeadlineExceeded: 截止时间已到
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return timeout
+    deadline.check(stage)
+    return min(timeout, deadline.remaining())
+
+
+def can_fit(seconds: float) -> bool:
+    """剩余预算是否还能容纳指定耗时，can_fit(0) 可用于判断是否已过期"""
+    remaining = remaining_time()
+    return remaining is None or remaining > seconds
+
+
+def sleep_within_deadline(seconds: float) -> bool:
+    """
+    在截止时间允许的情况下休眠
+
+    Args:
+        seconds (float): 休眠秒数
+
+    Returns:
+        bool: 剩余预算不足以完成休眠时返回False且不休眠
+    """
+    if not can_fit(seconds):
+        return False
+    time.sleep(seconds)
+    return True
+
+
+def run_with_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    把函数绑定到当前上下文，使提交到线程池后仍能读取截止时间等上下文变量
+
+    Args:
+        func (Callable): 待提交的函数
+
+    Returns:
+        Callable: 在当前上下文副本中执行的函数
+    """
+    context = contextvars.copy_context()
+    # 开启性能分析时，任务线程的采样归入提交者所在的阶段
+    stage = current_thread_stage()
+
+    def tracked(*args, **kwargs):
+        with track_thread(stage):
+            return func(*args, **kwargs)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # 同一个Context不能被多个线程同时进入，每次调用使用独立副本
+        return context.copy().run(tracked, *args, **kwargs)
+    return wrapper
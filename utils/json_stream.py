@@ -0,0 +1,101 @@
+import json
+import zlib
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from config import settings
+from utils.metrics import metrics
+
+# ================================ 流式JSON编码 ================================
+
+
+class Deferred:
+    """
+    延迟计算的值：编码到该位置时才调用函数
+
+    放在响应的最后一个键，前面的内容先发送给客户端，耗时的计算（如保存报告）不计入首字节时间。
+    """
+
+    def __init__(self, func: Callable[[], Any]):
+        self.func = func
+
+    def resolve(self) -> Any:
+        return self.func()
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Deferred):
+        return obj.resolve()
+    return str(obj)
+
+
+# 与 report_store 一致：中文直接输出，不转义为 \uXXXX
+_encoder = json.JSONEncoder(ensure_ascii=False, default=_default)
+
+
+def iter_json(obj: Any, chunk_bytes: Optional[int] = None, encoder: Optional[json.JSONEncoder] = None) -> Iterator[bytes]:
+    """
+    把对象逐段编码为UTF-8 JSON
+
+    iterencode 按键和元素逐个产出片段，这里攒到约 chunk_bytes 字节后输出一块，
+    内存中只保留当前这一块，不会生成完整的响应字符串。Deferred 值在编码到它时才计算。
+
+    Args:
+        obj (Any): 要编码的对象
+        chunk_bytes (Optional[int]): 每块的大致字节数，默认读取配置
+        encoder (Optional[json.JSONEncoder]): 编码器，默认为响应使用的编码器
+
+    Yields:
+        bytes: JSON文本的连续片段，拼接后即完整的JSON
+    """
+    chunk_bytes = chunk_bytes or settings.STREAM_JSON_CHUNK_BYTES
+    encoder = encoder or _encoder
+    parts = []
+    size = 0
+    for fragment in encoder.iterencode(obj):
+        parts.append(fragment)
+        # 按字符数估算，中文每个字符最多3字节，块大小只是近似值
+        size += len(fragment)
+        if size >= chunk_bytes:
+            yield "".join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts).encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: Optional[int] = None) -> Iterator[bytes]:
+    """
+    把字节块逐块压缩为gzip流
+
+    每块压缩后同步刷新，客户端可以边接收边解压，首字节不必等到全部压缩完成。
+
+    Args:
+        chunks (Iterable[bytes]): 原始字节块
+        level (Optional[int]): 压缩级别 1-9，默认读取配置
+    """
+    level = settings.STREAM_GZIP_LEVEL if level is None else level
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    raw_bytes = 0
+    sent_bytes = 0
+    for chunk in chunks:
+        raw_bytes += len(chunk)
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        sent_bytes += len(data)
+        if data:
+            yield data
+    data = compressor.flush()
+    sent_bytes += len(data)
+    yield data
+    metrics.observe("stream_gzip_bytes_saved", raw_bytes - sent_bytes)
+
+
+def stream_json(obj: Any, gzip: bool = False) -> Iterator[bytes]:
+    """
+    流式响应体：逐块编码的JSON，gzip 为True时逐块压缩
+
+    Args:
+        obj (Any): 响应对象
+        gzip (bool): 是否压缩（调用方根据 Accept-Encoding 和配置决定）
+    """
+    chunks = iter_json(obj)
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,43 @@
+import time
+import logging
+import importlib
+import threading
+from types import ModuleType
+from typing import Dict
+
+from utils.metrics import metrics
+
+logger = logging.getLogger('lazy_import')
+
+_modules: Dict[str, ModuleType] = {}
+_lock = threading.Lock()
+
+
+def load_module(module_name: str) -> ModuleType:
+    """
+    首次使用时才导入模块（如各家SDK），之后直接返回已导入的模块
+
+    导入耗时记录在 module_import_seconds 指标中。
+
+    Args:
+        module_name (str): 模块名，如 "google.generativeai"
+
+    Returns:
+        ModuleType: 已导入的模块
+
+    Raises:
+        ImportError: 模块未安装
+    """
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+    with _lock:
+        module = _modules.get(module_name)
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            elapsed = time.perf_counter() - start
+            metrics.observe("module_import_seconds", elapsed, {"module": module_name})
+            logger.info(f"导入 {module_name} 耗时 {elapsed:.2f} 秒")
+            _modules[module_name] = module
+    return module
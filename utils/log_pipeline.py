@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import functools
+import threading
+import contextvars
+import logging.handlers
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO
+
+from config import settings
+from utils.metrics import metrics
+from utils.profiling import track_thread
+
+# ================================ 日志上下文 ================================
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('log_request_id', default=None)
+_stage: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('log_stage', default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def current_stage() -> Optional[str]:
+    return _stage.get()
+
+
+@contextmanager
+def log_context(request_id: Optional[str] = None, stage: Optional[str] = None) -> Iterator[None]:
+    """
+    在当前上下文中设置日志携带的请求ID和阶段，未提供的字段保持外层的值
+
+    通过 run_with_context 提交到线程池的任务同样能读取到这些字段。
+    """
+    tokens = []
+    if request_id is not None:
+        tokens.append((_request_id, _request_id.set(request_id)))
+    if stage is not None:
+        tokens.append((_stage, _stage.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def log_stage(stage: str) -> Callable:
+    """装饰器：函数执行期间的日志标记为指定阶段，开启性能分析时采样也归入该阶段"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with log_context(stage=stage), track_thread(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ================================ 格式化 ================================
+
+# LogRecord 自带的属性，其余属性视为通过 extra 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id', 'stage', 'context'}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON：时间、级别、模块、消息、请求ID、阶段，以及 extra 传入的字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("request_id", "stage"):
+            value = getattr(record, field, None)
+            if value:
+                data[field] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """原有的文本格式，带请求ID和阶段"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(context)s%(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        context = " ".join(v for v in (getattr(record, "request_id", None), getattr(record, "stage", None)) if v)
+        record.context = f"[{context}] " if context else ""
+        return super().format(record)
+
+
+# ================================ 异步日志管道 ================================
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    在调用线程中补充上下文字段后放入队列，由后台线程完成格式化和写入
+
+    队列已满时丢弃该条日志并计数，不阻塞请求线程。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = _request_id.get()
+        record.stage = _stage.get()
+        # 参数和异常在入队前格式化为文本，避免跨线程持有可变对象和栈帧
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.increment("log_records_dropped")
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[ContextQueueHandler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    log_file: Optional[str] = None,
+    fmt: Optional[str] = None,
+    stream: Optional[TextIO] = None
+) -> logging.handlers.QueueListener:
+    """
+    配置根日志：所有模块的日志先进入内存队列，由后台线程写到标准错误和按大小轮转的日志文件
+
+    重复调用时先停止原有的后台线程，再按新参数配置。
+
+    Args:
+        level (Optional[str]): 日志级别，默认读取配置
+        log_file (Optional[str]): 日志文件路径，默认读取配置；为空字符串时只输出到 stream
+        fmt (Optional[str]): json 或 text，默认读取配置
+        stream (Optional[TextIO]): 控制台输出，默认标准错误
+
+    Returns:
+        QueueListener: 后台写入线程
+    """
+    global _listener, _queue_handler
+    level = (level or settings.LOG_LEVEL).upper()
+    log_file = settings.LOG_FILE if log_file is None else log_file
+    formatter = JsonFormatter() if (fmt or settings.LOG_FORMAT) == "json" else TextFormatter()
+
+    handlers = [logging.StreamHandler(stream or sys.stderr)]
+    if log_file:
+        if os.path.dirname(log_file):
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding='utf-8'
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    with _setup_lock:
+        shutdown_logging()
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        _queue_handler = ContextQueueHandler(log_queue)
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止后台线程"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
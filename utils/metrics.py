@@ -0,0 +1,78 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+# 指标标识：(名称, 排序后的标签元组)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Optional[Dict[str, Any]]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表
+
+    counter 用于计数（调用次数、重试次数等），observe 用于记录耗时等数值分布，
+    snapshot() 输出可直接序列化为JSON的当前值。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = defaultdict(float)
+        self._observations: Dict[MetricKey, Dict[str, float]] = {}
+
+    def increment(self, name: str, labels: Optional[Dict[str, Any]] = None, value: float = 1):
+        """计数器加 value"""
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None):
+        """记录一次观测值，累计 count/sum/min/max"""
+        key = _key(name, labels)
+        with self._lock:
+            stats = self._observations.get(key)
+            if stats is None:
+                self._observations[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                stats["count"] += 1
+                stats["sum"] += value
+                stats["min"] = min(stats["min"], value)
+                stats["max"] = max(stats["max"], value)
+
+    def get_counter(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前所有指标
+
+        Returns:
+            Dict[str, Any]: {"counters": [...], "observations": [...]}，每项含 name、labels 和取值
+        """
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            observations = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    **stats,
+                    "avg": stats["sum"] / stats["count"] if stats["count"] else 0,
+                }
+                for (name, labels), stats in sorted(self._observations.items())
+            ]
+        return {"counters": counters, "observations": observations}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from types import CodeType
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger('profiling')
+
+# 采样时每个线程最多记录的栈深度
+MAX_STACK_DEPTH = 128
+
+# 未进入任何阶段的时间（如请求线程解析参数、保存报告）
+UNSTAGED = "request"
+
+# ================================ 采样分析器 ================================
+
+
+def _frame_label(code: CodeType) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    单个请求的采样分析器
+
+    后台线程每隔 interval 秒读取一次属于该请求的线程的调用栈（包括通过 run_with_context
+    提交到线程池的任务），按 "阶段;调用栈" 聚合采样次数，输出 flamegraph.pl / speedscope
+    可直接读取的折叠栈格式。阶段耗时按线程累计，多个线程并行时总和会超过墙钟时间。
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        # 线程ID -> 当前阶段；只有登记过的线程会被采样
+        self.threads: Dict[int, Optional[str]] = {}
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # 保存后的文件路径
+        self.paths: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.finished_at = time.monotonic()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """记录一次所有登记线程的调用栈"""
+        frames = sys._current_frames()
+        with self._lock:
+            threads = list(self.threads.items())
+        for ident, stage in threads:
+            frame = frames.get(ident)
+            stack: List[str] = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                stack.append(stage or UNSTAGED)
+                self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """折叠栈格式：每行 "帧1;帧2;... 采样次数"，第一帧为阶段"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        """
+        各阶段的线程耗时和自身耗时最多的函数
+
+        Returns:
+            Dict[str, Any]: wall_seconds、samples、stages（阶段 -> 秒）、top_functions
+        """
+        stages: Counter = Counter()
+        self_time: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            stages[frames[0]] += count
+            self_time[frames[-1]] += count
+        end = self.finished_at or time.monotonic()
+        return {
+            "wall_seconds": round(end - (self.started_at or end), 3),
+            "samples": self.samples,
+            "interval": self.interval,
+            "stages": {stage: round(count * self.interval, 3) for stage, count in stages.most_common()},
+            "top_functions": [
+                {"function": name, "self_seconds": round(count * self.interval, 3)}
+                for name, count in self_time.most_common(top)
+            ],
+        }
+
+    def save(self, directory: str) -> Dict[str, str]:
+        """保存折叠栈（profile.collapsed）和摘要（profile.json），返回文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        paths = {
+            "collapsed": os.path.join(directory, "profile.collapsed"),
+            "summary": os.path.join(directory, "profile.json"),
+        }
+        with open(paths["collapsed"], 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        with open(paths["summary"], 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return paths
+
+
+# ================================ 请求级开关 ================================
+
+_active_profiler: contextvars.ContextVar[Optional[SamplingProfiler]] = contextvars.ContextVar(
+    'active_profiler', default=None
+)
+
+
+def current_thread_stage() -> Optional[str]:
+    """当前线程在活动分析器中登记的阶段，未开启分析时为None"""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return None
+    return profiler.threads.get(threading.get_ident())
+
+
+@contextmanager
+def track_thread(stage: Optional[str] = None) -> Iterator[None]:
+    """
+    把当前线程登记到本请求的分析器中，退出时恢复原来的登记
+
+    未开启分析时只读取一次上下文变量，没有其他开销。
+
+    Args:
+        stage (Optional[str]): 阶段名，为空时沿用当前线程已登记的阶段
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield
+        return
+    ident = threading.get_ident()
+    with profiler._lock:
+        registered = ident in profiler.threads
+        previous = profiler.threads.get(ident)
+        profiler.threads[ident] = stage if stage is not None else previous
+    try:
+        yield
+    finally:
+        with profiler._lock:
+            if registered:
+                profiler.threads[ident] = previous
+            else:
+                profiler.threads.pop(ident, None)
+
+
+@contextmanager
+def profile_scope(directory: Optional[str], interval: float) -> Iterator[Optional[SamplingProfiler]]:
+    """
+    在采样分析下执行一段流程，结束后把结果保存到 directory
+
+    Args:
+        directory (Optional[str]): 保存目录，为空时不开启分析（直接执行）
+        interval (float): 采样间隔（秒）
+
+    Yields:
+        Optional[SamplingProfiler]: 分析器；未开启时为None
+    """
+    if not directory:
+        yield None
+        return
+    profiler = SamplingProfiler(interval)
+    token = _active_profiler.set(profiler)
+    profiler.start()
+    try:
+        with track_thread():
+            yield profiler
+    finally:
+        profiler.stop()
+        _active_profiler.reset(token)
+        try:
+            profiler.paths = profiler.save(directory)
+            metrics.increment("profiles_saved")
+            logger.info(f"性能分析已保存到 {directory}，共 {profiler.samples} 次采样")
+        except OSError as e:
+            logger.warning(f"保存性能分析失败: {str(e)}")
@@ -0,0 +1,213 @@
+import os
+import re
+import gzip
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+
+from config import settings
+from utils.json_stream import iter_json
+
+logger = logging.getLogger('report_store')
+
+# 报告ID：规范化JSON内容sha256的前32位十六进制
+REPORT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# 存储编码对应的文件扩展名
+_CODEC_EXTENSIONS = {"zstd": ".json.zst", "gzip": ".json.gz"}
+
+# 规范化JSON：键排序、无多余空白，相同内容得到相同字节
+_canonical_encoder = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+# 保存时每次编码、哈希和压缩的字节数
+SAVE_CHUNK_BYTES = 64 * 1024
+
+
+def _get_zstd():
+    """zstandard 为可选依赖，未安装时返回None"""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _get_zstd().ZstdCompressor(level=10).compress(data)
+    if codec == "gzip":
+        # 固定 mtime，相同内容得到相同字节
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    return data
+
+
+def open_compressed_writer(f: BinaryIO, codec: str) -> BinaryIO:
+    """在文件对象外包一层逐块压缩的写入器，关闭写入器时写完压缩流（不关闭底层文件）"""
+    if codec == "zstd":
+        return _get_zstd().ZstdCompressor(level=10).stream_writer(f, closefd=False)
+    if codec == "gzip":
+        # 固定 mtime、不写文件名，相同内容得到相同字节
+        return gzip.GzipFile(filename='', mode='wb', compresslevel=6, fileobj=f, mtime=0)
+    return f
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        # 逐块压缩的帧头里没有原始大小，需要用流式解压
+        return _get_zstd().ZstdDecompressor().decompressobj().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+class ReportStore:
+    """
+    按内容寻址的报告存储
+
+    生成结果序列化为规范化JSON，以其哈希作为报告ID，压缩后写入磁盘；
+    相同结果只保存一份，读取时可直接返回压缩后的字节。
+    """
+
+    def __init__(self, root: str, codec: str = "auto"):
+        self.root = root
+        if codec == "auto":
+            codec = "zstd" if _get_zstd() is not None else "gzip"
+        if codec == "zstd" and _get_zstd() is None:
+            logger.warning("未安装 zstandard，报告改用 gzip 压缩存储")
+            codec = "gzip"
+        self.codec = codec
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, report_id: str, codec: str) -> str:
+        return os.path.join(self.root, f"{report_id}{_CODEC_EXTENSIONS[codec]}")
+
+    def save(self, report: Dict[str, Any]) -> str:
+        """
+        保存报告
+
+        Args:
+            report (Dict[str, Any]): 可JSON序列化的报告内容
+
+        规范化JSON逐块编码，边计算哈希边压缩写入临时文件，写完后按哈希重命名；
+        内存中只保留当前一块，不生成完整的JSON字符串。
+
+        Returns:
+            str: 报告ID
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, f"{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                writer = open_compressed_writer(f, self.codec)
+                for chunk in iter_json(report, SAVE_CHUNK_BYTES, _canonical_encoder):
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    writer.write(chunk)
+                if writer is not f:
+                    writer.close()
+            report_id = sha256.hexdigest()[:32]
+            with self._lock:
+                if self.find(report_id) is not None:
+                    return report_id
+                path = self._path(report_id, self.codec)
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        logger.info(f"报告已保存 {report_id}（{size} 字节，{self.codec} 压缩后 {os.path.getsize(path)} 字节）")
+        return report_id
+
+    def find(self, report_id: str) -> Optional[str]:
+        """返回报告的存储编码，不存在时返回None"""
+        if not REPORT_ID_PATTERN.match(report_id or ''):
+            return None
+        for codec in _CODEC_EXTENSIONS:
+            if os.path.exists(self._path(report_id, codec)):
+                return codec
+        return None
+
+    def load(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """读取并解析报告，不存在时返回None"""
+        representation = self.get_representation(report_id, ())
+        if representation is None:
+            return None
+        return json.loads(representation[0].decode('utf-8'))
+
+    def get_representation(self, report_id: str, accepted_encodings: Iterable[str]) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        按客户端可接受的编码返回报告字节
+
+        存储编码可被接受时直接返回磁盘上的压缩字节；否则在可接受时转为gzip，最后退回未压缩。
+
+        Args:
+            report_id (str): 报告ID
+            accepted_encodings (Iterable[str]): 客户端可接受的编码，如 ["zstd", "gzip"]
+
+        Returns:
+            Optional[Tuple[bytes, Optional[str]]]: (字节, Content-Encoding)，未压缩时编码为None；报告不存在时返回None
+        """
+        codec = self.find(report_id)
+        if codec is None:
+            return None
+        with open(self._path(report_id, codec), 'rb') as f:
+            stored = f.read()
+
+        accepted = set(accepted_encodings)
+        if codec in accepted:
+            return stored, codec
+        data = decompress(stored, codec)
+        if "gzip" in accepted:
+            return compress(data, "gzip"), "gzip"
+        return data, None
+
+
+_report_store: Optional[ReportStore] = None
+_report_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """获取全局报告存储"""
+    global _report_store
+    if _report_store is None:
+        with _report_store_lock:
+            if _report_store is None:
+                _report_store = ReportStore(settings.REPORT_STORE_DIR, settings.REPORT_STORE_CODEC)
+    return _report_store
+
+
+def save_report(title: str, details: str, academic_level: str, country: str, result: Dict[str, Any]) -> Optional[str]:
+    """
+    保存一次生成的结果，返回报告ID；保存失败不影响调用方
+
+    Args:
+        title (str): 论文标题
+        details (str): 研究方案
+        academic_level (str): 学术层次
+        country (str): 就读国家
+        result (Dict[str, Any]): generate_academic_report 的返回值（research 为增量生成所需的关键词和文件指纹）
+
+    Returns:
+        Optional[str]: 报告ID，保存失败时为None
+    """
+    try:
+        return get_report_store().save({
+            'input': {
+                'title': title,
+                'details': details,
+                'academicLevel': academic_level,
+                'country': country
+            },
+            'proposal': result['proposal'],
+            'experiment_design': result['experiment_design'],
+            'zhihu_research': result.get('zhihu_research', []),
+            'arxiv_papers': result.get('arxiv_papers', []),
+            'research': result.get('research')
+        })
+    except Exception as e:
+        logger.warning(f"保存报告失败: {str(e)}")
+        return None
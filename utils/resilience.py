@@ -0,0 +1,215 @@
+import time
+import random
+import socket
+import logging
+import threading
+import http.client
+import urllib.error
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+from utils.deadline import DeadlineExceeded, can_fit
+from utils.metrics import metrics
+
+logger = logging.getLogger('resilience')
+
+# 可重试的HTTP状态码：请求超时、限流、服务端错误
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# SDK异常类名中出现这些片段时视为可重试 / 不可重试
+_RETRYABLE_NAME_HINTS = ("Timeout", "Connection", "RateLimit", "ServiceUnavailable", "InternalServer", "Overloaded")
+_FATAL_NAME_HINTS = ("Authentication", "PermissionDenied", "BadRequest", "NotFound", "InvalidArgument", "Unprocessable")
+
+
+class RetryPolicy:
+    """
+    指数退避 + 随机抖动的重试策略
+
+    第 n 次重试前等待 uniform(0, min(max_delay, base_delay * multiplier ** n)) 秒（full jitter），
+    避免大量请求在上游故障时同步重试。
+    """
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        multiplier: float = 2.0
+    ):
+        self.max_attempts = max_attempts if max_attempts is not None else settings.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else settings.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else settings.RETRY_MAX_DELAY
+        self.multiplier = multiplier
+
+    def backoff(self, retry_index: int) -> float:
+        """第 retry_index 次重试（从0开始）前的等待秒数"""
+        ceiling = min(self.max_delay, self.base_delay * (self.multiplier ** retry_index))
+        return random.uniform(0, ceiling)
+
+
+class RetryBudget:
+    """
+    令牌桶重试预算
+
+    每次请求存入 ratio 个令牌，每次重试消耗1个令牌，桶容量为 burst。
+    长期来看重试次数不超过请求数的 ratio 倍，上游故障时不会成倍放大流量。
+    """
+
+    def __init__(self, ratio: Optional[float] = None, burst: Optional[float] = None):
+        self.ratio = ratio if ratio is not None else settings.RETRY_BUDGET_RATIO
+        self.burst = burst if burst is not None else settings.RETRY_BUDGET_BURST
+        self._tokens = self.burst
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """尝试为一次重试扣除令牌，预算不足时返回False"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+_budgets: Dict[str, RetryBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_retry_budget(upstream: str) -> RetryBudget:
+    """获取某个上游的重试预算（进程内共享）"""
+    with _budgets_lock:
+        budget = _budgets.get(upstream)
+        if budget is None:
+            budget = _budgets[upstream] = RetryBudget()
+        return budget
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """从各类HTTP/SDK异常中取出状态码"""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """是否为上游限流（HTTP 429 或SDK的RateLimit异常）"""
+    name = type(exc).__name__
+    return _status_code(exc) == 429 or "RateLimit" in name or "ResourceExhausted" in name
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    判断异常是否值得重试
+
+    截止时间已到、参数/鉴权类错误、4xx（408/429除外）不重试；
+    超时、连接错误、限流和5xx重试；无法识别的异常保持原有行为，按可重试处理。
+    """
+    if isinstance(exc, DeadlineExceeded):
+        return False
+
+    status = _status_code(exc)
+    if status is not None and 100 <= status < 600:
+        return status in RETRYABLE_STATUS_CODES
+
+    if isinstance(exc, (TimeoutError, socket.timeout, ConnectionError, http.client.HTTPException, urllib.error.URLError)):
+        return True
+    if isinstance(exc, (ValueError, TypeError, KeyError, AttributeError)):
+        return False
+
+    name = type(exc).__name__
+    if any(hint in name for hint in _FATAL_NAME_HINTS):
+        return False
+    if any(hint in name for hint in _RETRYABLE_NAME_HINTS):
+        return True
+    return True
+
+
+def allow_retry(upstream: str, exc: BaseException, delay: float) -> bool:
+    """
+    综合错误类型、截止时间和重试预算，判断是否进行一次重试，并记录指标
+
+    Args:
+        upstream (str): 上游名称
+        exc (BaseException): 本次失败的异常
+        delay (float): 重试前需要等待的秒数
+
+    Returns:
+        bool: 允许重试时返回True（已扣除预算）
+    """
+    if not is_retryable(exc):
+        metrics.increment("upstream_retries_denied", {"upstream": upstream, "reason": "not_retryable"})
+        return False
+    if not can_fit(delay):
+        metrics.increment("upstream_retries_denied", {"upstream": upstream, "reason": "deadline"})
+        return False
+    if not get_retry_budget(upstream).try_withdraw():
+        metrics.increment("upstream_retries_denied", {"upstream": upstream, "reason": "budget"})
+        logger.warning(f"{upstream} 重试预算已耗尽，放弃重试")
+        return False
+    metrics.increment("upstream_retries", {"upstream": upstream})
+    return True
+
+
+def record_attempt(upstream: str, success: bool, elapsed: float):
+    """记录一次上游调用（首次或重试）的结果和耗时"""
+    outcome = "success" if success else "failure"
+    metrics.increment("upstream_calls", {"upstream": upstream, "outcome": outcome})
+    metrics.observe("upstream_latency_seconds", elapsed, {"upstream": upstream})
+
+
+def retry_call(
+    upstream: str,
+    func: Callable[..., Any],
+    args: tuple = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+    policy: Optional[RetryPolicy] = None
+) -> Any:
+    """
+    按统一策略调用上游，失败时指数退避重试
+
+    Args:
+        upstream (str): 上游名称，如 tavily/serper/arxiv/gemini，用于重试预算和指标
+        func (Callable): 调用函数
+        args (tuple): 位置参数
+        kwargs (Optional[Dict[str, Any]]): 关键字参数
+        policy (Optional[RetryPolicy]): 重试策略，默认读取配置
+
+    Returns:
+        Any: 调用结果
+
+    Raises:
+        Exception: 不可重试、次数用尽、预算耗尽或截止时间不足时抛出最后一次的异常
+    """
+    policy = policy or RetryPolicy()
+    kwargs = kwargs or {}
+    get_retry_budget(upstream).record_request()
+
+    attempt = 0
+    while True:
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+            record_attempt(upstream, True, time.monotonic() - start)
+            return result
+        except Exception as e:
+            record_attempt(upstream, False, time.monotonic() - start)
+            attempt += 1
+            if attempt >= policy.max_attempts:
+                raise
+            delay = policy.backoff(attempt - 1)
+            if not allow_retry(upstream, e, delay):
+                raise
+            logger.info(f"{upstream} 调用失败，{delay:.2f} 秒后第 {attempt} 次重试: {str(e)}")
+            time.sleep(delay)
@@ -0,0 +1,124 @@
+import time
+import unittest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+# 导入截止时间
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.api_config import TASK_EXTRACT
+from utils.deadline import (
+    Deadline, DeadlineExceeded, can_fit, cap_timeout, current_deadline, deadline_scope,
+    remaining_time, run_with_context, sleep_within_deadline
+)
+from api import simple_api
+
+
+class _Lease:
+    tokens = 0
+
+
+@contextmanager
+def _free_slot(*args, **kwargs):
+    # 不经过调度器和跨进程配额
+    yield _Lease()
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_deadline_remaining_and_check(self):
+        deadline = Deadline(0.05)
+        self.assertGreater(deadline.remaining(), 0)
+        self.assertFalse(deadline.expired())
+        time.sleep(0.06)
+        self.assertEqual(deadline.remaining(), 0)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.check("测试")
+
+    def test_nested_scope_keeps_earlier_deadline(self):
+        """内层更宽松的预算不会延长外层截止时间，更严格的预算在内层生效"""
+        self.assertIsNone(current_deadline())
+        with deadline_scope(10) as outer:
+            with deadline_scope(100) as inner:
+                self.assertIs(inner, outer)
+            with deadline_scope(None) as inner:
+                self.assertIs(inner, outer)
+            with deadline_scope(1) as inner:
+                self.assertIsNot(inner, outer)
+                self.assertLessEqual(remaining_time(), 1)
+            self.assertIs(current_deadline(), outer)
+        self.assertIsNone(current_deadline())
+
+    def test_cap_timeout_and_can_fit(self):
+        self.assertEqual(cap_timeout(60), 60)
+        self.assertTrue(can_fit(1000))
+        with deadline_scope(2):
+            self.assertLessEqual(cap_timeout(60), 2)
+            self.assertEqual(cap_timeout(0.5), 0.5)
+            self.assertTrue(can_fit(1))
+            self.assertFalse(can_fit(5))
+        with deadline_scope(0.01):
+            time.sleep(0.02)
+            self.assertFalse(can_fit(0))
+            with self.assertRaises(DeadlineExceeded):
+                cap_timeout(60)
+
+    def test_sleep_within_deadline_stops_early(self):
+        """剩余预算不足时立即返回False，不休眠"""
+        with deadline_scope(0.2):
+            start = time.monotonic()
+            self.assertFalse(sleep_within_deadline(5))
+            self.assertLess(time.monotonic() - start, 0.1)
+            self.assertTrue(sleep_within_deadline(0.01))
+
+    def test_deadline_reaches_worker_threads(self):
+        """通过 run_with_context 提交的任务能读取提交者的截止时间，直接提交的不能"""
+        with deadline_scope(30) as deadline, ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertIs(executor.submit(run_with_context(current_deadline)).result(), deadline)
+            self.assertIsNone(executor.submit(current_deadline).result())
+
+
+class TestCallLLMDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.fail_slowly = 0.0
+        patches = [
+            mock.patch.object(simple_api, "is_configured", lambda provider: True),
+            mock.patch.object(simple_api, "provider_slot", _free_slot),
+        ]
+        for provider in ("gemini", "openai", "siliconflow", "qwen", "claude"):
+            patches.append(mock.patch.object(simple_api.api_client, f"call_{provider}", self._fake(provider)))
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _fake(self, provider):
+        def call(prompt, timeout=None, **kwargs):
+            self.calls.append((provider, timeout))
+            if self.fail_slowly:
+                time.sleep(self.fail_slowly)
+                raise ConnectionError(f"{provider} 不可用")
+            return "ok"
+        return call
+
+    def test_timeout_trimmed_to_remaining_budget(self):
+        """分级超时为20秒，剩余预算只有3秒时按剩余预算调用"""
+        with deadline_scope(3):
+            self.assertEqual(simple_api.call_llm("提示", task=TASK_EXTRACT), "ok")
+        self.assertEqual(len(self.calls), 1)
+        self.assertLessEqual(self.calls[0][1], 3)
+
+    def test_fallback_stops_after_deadline(self):
+        """第一个提供商失败时预算已不足，不再尝试后续提供商"""
+        self.fail_slowly = 0.5
+        with deadline_scope(simple_api.MIN_CALL_SECONDS + 0.3):
+            with self.assertRaises(DeadlineExceeded):
+                simple_api.call_llm("提示", task=TASK_EXTRACT)
+        self.assertEqual([provider for provider, _ in self.calls], ["gemini"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import gzip
+import json
+import unittest
+import sys
+from pathlib import Path
+
+# 导入流式JSON编码
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.json_stream import Deferred, gzip_chunks, iter_json, stream_json
+
+PAYLOAD = {
+    'code': 200,
+    'message': '生成成功',
+    'data': {
+        'zhihu_research': [
+            {'keyword': '图神经网络', 'zhihu_link': f'https://zhuanlan.zhihu.com/p/{i}', 'content': '正文' * 2000}
+            for i in range(20)
+        ],
+        'arxiv_papers': [{'id': str(i), 'authors': [{'name': 'Alice'}]} for i in range(50)],
+    }
+}
+
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_chunks_join_to_valid_json(self):
+        """结果分为多块输出，拼接后与完整编码相同"""
+        chunks = list(iter_json(PAYLOAD, chunk_bytes=4096))
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(json.loads(b"".join(chunks).decode('utf-8')), PAYLOAD)
+        self.assertEqual(b"".join(chunks).decode('utf-8'), json.dumps(PAYLOAD, ensure_ascii=False))
+
+    def test_gzip_stream(self):
+        """逐块压缩输出，拼接后是合法的gzip流"""
+        compressed = list(gzip_chunks(iter_json(PAYLOAD, chunk_bytes=4096), level=6))
+        self.assertGreater(len(compressed), 1)
+        self.assertEqual(json.loads(gzip.decompress(b"".join(compressed))), PAYLOAD)
+        self.assertEqual(json.loads(gzip.decompress(b"".join(stream_json(PAYLOAD, gzip=True)))), PAYLOAD)
+
+    def test_deferred_resolved_after_first_chunk(self):
+        """Deferred 值在编码到它时才计算，前面的内容已经先输出"""
+        calls = []
+        payload = dict(PAYLOAD, reportId=Deferred(lambda: calls.append(True) or "report-id"))
+        chunks = iter_json(payload, chunk_bytes=4096)
+        next(chunks)
+        self.assertEqual(calls, [])
+        rest = list(chunks)
+        self.assertEqual(calls, [True])
+        self.assertGreater(len(rest), 5)
+        self.assertEqual(json.loads(b"".join(iter_json(dict(PAYLOAD, reportId=Deferred(lambda: "x"))))), dict(PAYLOAD, reportId="x"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import sys
+import json
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# 导入日志管道
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.deadline import run_with_context
+from utils.log_pipeline import log_context, log_stage, setup_logging, shutdown_logging
+
+
+class TestLogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger('test_log_pipeline')
+
+    def tearDown(self):
+        shutdown_logging()
+
+    def records(self):
+        shutdown_logging()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_json_records_carry_context(self):
+        """请求ID和阶段随上下文传到线程池中的日志"""
+        setup_logging(level="INFO", log_file="", fmt="json", stream=self.stream)
+
+        @log_stage("research")
+        def search(keyword):
+            self.logger.info("搜索 %s", keyword, extra={"hits": 3})
+
+        with log_context(request_id="req-1"):
+            self.logger.info("开始")
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(run_with_context(search), ["a", "b"]))
+        self.logger.debug("不输出")
+        self.logger.info("结束")
+
+        records = self.records()
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0]["request_id"], "req-1")
+        self.assertNotIn("stage", records[0])
+        searches = [r for r in records if r["message"].startswith("搜索")]
+        self.assertEqual(sorted(r["message"] for r in searches), ["搜索 a", "搜索 b"])
+        for record in searches:
+            self.assertEqual((record["request_id"], record["stage"], record["hits"]), ("req-1", "research", 3))
+        self.assertNotIn("request_id", records[-1])
+
+    def test_exception_written_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = str(Path(tmp) / "logs" / "app.log")
+            setup_logging(level="INFO", log_file=log_file, fmt="json", stream=self.stream)
+            try:
+                raise ValueError("坏数据")
+            except ValueError:
+                self.logger.exception("解析失败")
+            records = self.records()
+            self.assertIn("ValueError: 坏数据", records[0]["exc"])
+            with open(log_file, encoding='utf-8') as f:
+                self.assertEqual(json.loads(f.readline())["message"], "解析失败")
+
+
+if __name__ == "__main__":
+    unittest.main()
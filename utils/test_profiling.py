@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# 导入性能分析
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.deadline import run_with_context
+from utils.log_pipeline import log_stage
+from utils.profiling import _active_profiler, current_thread_stage, profile_scope
+
+
+def busy_parse(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(i * i for i in range(200))
+
+
+@log_stage("research")
+def research():
+    # 线程池中的任务归入提交者所在的阶段
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(run_with_context(busy_parse), [0.15, 0.15]))
+
+
+@log_stage("proposal")
+def proposal():
+    busy_parse(0.15)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_disabled_has_no_profiler(self):
+        with profile_scope(None, 0.005) as profiler:
+            self.assertIsNone(profiler)
+            self.assertIsNone(_active_profiler.get())
+            self.assertIsNone(current_thread_stage())
+
+    def test_stage_attribution_across_threads(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with profile_scope(tmp, 0.005) as profiler:
+                research()
+                proposal()
+            summary = profiler.summary()
+
+            self.assertEqual(set(profiler.paths), {"collapsed", "summary"})
+            self.assertTrue(all(os.path.exists(path) for path in profiler.paths.values()))
+            self.assertIn("research", summary["stages"])
+            self.assertIn("proposal", summary["stages"])
+            # 两个线程并行，研究阶段的线程耗时约为提案阶段的两倍（另含等待线程池的请求线程）
+            self.assertGreater(summary["stages"]["research"], summary["stages"]["proposal"])
+            with open(profiler.paths["collapsed"], encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            worker_lines = [line for line in lines if line.startswith("research;") and "busy_parse" in line]
+            self.assertTrue(worker_lines)
+            stack, count = worker_lines[0].rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn("test_profiling.py", stack)
+        self.assertIsNone(_active_profiler.get())
+
+
+if __name__ == "__main__":
+    unittest.main()
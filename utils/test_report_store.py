@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+import sys
+from pathlib import Path
+
+# 导入报告存储
+sys.path.insert(0, str(Path(__file__).parent))
+from report_store import ReportStore
+
+REPORT = {"proposal": "# 开题报告\n" + "研究内容" * 500, "experiment_design": "# 实验设计", "zhihu_research": [], "arxiv_papers": []}
+
+
+class TestReportStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = ReportStore(self.tmpdir, codec="gzip")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_content_addressed(self):
+        """相同内容得到相同ID，只保存一份"""
+        report_id = self.store.save(REPORT)
+        self.assertEqual(self.store.save(dict(reversed(list(REPORT.items())))), report_id)
+        self.assertEqual(self.store.load(report_id), REPORT)
+        self.assertIsNone(self.store.load("0" * 32))
+        self.assertIsNone(self.store.load("../etc/passwd"))
+
+    def test_representation_negotiation(self):
+        """可接受存储编码时直接返回压缩字节，否则返回未压缩内容"""
+        report_id = self.store.save(REPORT)
+        body, encoding = self.store.get_representation(report_id, ["gzip"])
+        self.assertEqual(encoding, "gzip")
+        self.assertEqual(json.loads(gzip.decompress(body)), REPORT)
+        self.assertLess(len(body), len(json.dumps(REPORT, ensure_ascii=False).encode('utf-8')) / 5)
+
+        body, encoding = self.store.get_representation(report_id, [])
+        self.assertIsNone(encoding)
+        self.assertEqual(json.loads(body), REPORT)
+
+    def test_save_streams_without_full_string(self):
+        """保存大报告时逐块编码和压缩，峰值内存远小于完整JSON；ID与一次性编码的结果一致"""
+        report = dict(REPORT, zhihu_research=[
+            {"keyword": "图神经网络", "zhihu_link": f"https://zhuanlan.zhihu.com/p/{i}", "content": f"{i}知乎回答正文" * 5000}
+            for i in range(200)
+        ])
+        data = json.dumps(report, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        tracemalloc.start()
+        try:
+            report_id = self.store.save(report)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(report_id, hashlib.sha256(data).hexdigest()[:32])
+        self.assertEqual(self.store.load(report_id), report)
+        self.assertLess(peak, len(data) / 10)
+        self.assertEqual([name for name in os.listdir(self.tmpdir) if name.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import urllib.error
+import sys
+from pathlib import Path
+
+# 导入重试策略
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.deadline import DeadlineExceeded, deadline_scope
+from utils.metrics import metrics
+from utils import resilience
+from utils.resilience import RetryBudget, RetryPolicy, is_retryable, retry_call
+
+
+class HTTPStatusError(Exception):
+    """模拟带状态码的SDK异常"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Flaky:
+    """前 failures 次调用失败的函数"""
+
+    def __init__(self, failures, error=None):
+        self.failures = failures
+        self.error = error or ConnectionError("连接失败")
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+FAST_POLICY = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001)
+
+
+class TestResilience(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_backoff_bounds(self):
+        """退避时间在 [0, min(max_delay, base * 2^n)] 内"""
+        policy = RetryPolicy(base_delay=0.5, max_delay=4)
+        for retry_index, ceiling in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 4.0)]:
+            for _ in range(50):
+                self.assertTrue(0 <= policy.backoff(retry_index) <= ceiling)
+
+    def test_classification(self):
+        """错误分类"""
+        self.assertTrue(is_retryable(ConnectionError()))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertTrue(is_retryable(HTTPStatusError(429)))
+        self.assertTrue(is_retryable(HTTPStatusError(503)))
+        self.assertTrue(is_retryable(urllib.error.HTTPError("u", 502, "bad gateway", {}, None)))
+        self.assertFalse(is_retryable(urllib.error.HTTPError("u", 404, "not found", {}, None)))
+        self.assertFalse(is_retryable(HTTPStatusError(401)))
+        self.assertFalse(is_retryable(ValueError()))
+        self.assertFalse(is_retryable(DeadlineExceeded()))
+
+    def test_retry_then_success(self):
+        """可重试错误重试后成功，并记录重试指标"""
+        func = Flaky(2)
+        self.assertEqual(retry_call("test-success", func, policy=FAST_POLICY), "ok")
+        self.assertEqual(func.calls, 3)
+        self.assertEqual(metrics.get_counter("upstream_retries", {"upstream": "test-success"}), 2)
+        self.assertEqual(metrics.get_counter("upstream_calls", {"upstream": "test-success", "outcome": "failure"}), 2)
+
+    def test_not_retryable(self):
+        """不可重试的错误直接抛出"""
+        func = Flaky(1, HTTPStatusError(400))
+        with self.assertRaises(HTTPStatusError):
+            retry_call("test-fatal", func, policy=FAST_POLICY)
+        self.assertEqual(func.calls, 1)
+
+    def test_budget_caps_retries(self):
+        """重试预算耗尽后不再重试"""
+        budget = RetryBudget(ratio=0.1, burst=1)
+        self.assertTrue(budget.try_withdraw())
+        self.assertFalse(budget.try_withdraw())
+        for _ in range(11):
+            budget.record_request()
+        self.assertTrue(budget.try_withdraw())
+
+        resilience._budgets["test-budget"] = RetryBudget(ratio=0, burst=1)
+        func = Flaky(5)
+        with self.assertRaises(ConnectionError):
+            retry_call("test-budget", func, policy=RetryPolicy(max_attempts=5, base_delay=0.001, max_delay=0.001))
+        self.assertEqual(func.calls, 2)
+        self.assertEqual(
+            metrics.get_counter("upstream_retries_denied", {"upstream": "test-budget", "reason": "budget"}), 1
+        )
+
+    def test_deadline_stops_retries(self):
+        """剩余时间不足以等待退避时不再重试"""
+        func = Flaky(5)
+        with deadline_scope(0.05):
+            with self.assertRaises(ConnectionError):
+                retry_call("test-deadline", func, policy=RetryPolicy(max_attempts=5, base_delay=10, max_delay=10))
+        self.assertLessEqual(func.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from pathlib import Path
+
+# 导入上传文件存储
+sys.path.insert(0, str(Path(__file__).parent))
+from upload_store import UploadStore, UploadTooLarge, UploadWriterSet
+
+
+class TestUploadStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = UploadStore(self.tmpdir, max_file_bytes=1024, allowed_extensions=['.pdf', '.docx'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_save_stream_content_addressed(self):
+        """分块写入并按内容哈希命名，重复上传得到同一个ID"""
+        meta = self.store.save_stream(io.BytesIO(b"x" * 1000), "开题报告.pdf", chunk_size=64)
+        again = self.store.save_stream(io.BytesIO(b"x" * 1000), "copy.pdf", chunk_size=64)
+        self.assertEqual(meta["fileId"], again["fileId"])
+        self.assertEqual(meta["size"], 1000)
+        path = self.store.get(meta["fileId"])["filePath"]
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"x" * 1000)
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_size_limit(self):
+        """超过大小限制时中止并清理临时文件"""
+        with self.assertRaises(UploadTooLarge):
+            self.store.save_stream(io.BytesIO(b"x" * 2000), "big.pdf", chunk_size=64)
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_oversized_multipart_leaves_no_part_file(self):
+        """multipart 解析到超大文件时中断，请求结束关闭写入器后不留 .part 文件，已提交的文件保留"""
+        writers = UploadWriterSet(self.store)
+        small = writers.open_writer("a.pdf")
+        small.write(b"x" * 100)
+        meta = self.store.commit(small)
+        big = writers.open_writer("b.pdf")
+        with self.assertRaises(UploadTooLarge):
+            # 模拟 werkzeug 逐块写入文件流
+            for _ in range(40):
+                big.write(b"y" * 64)
+        self.assertTrue(os.listdir(self.store.tmp_dir))
+
+        writers.close_all()
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+        self.assertIsNotNone(self.store.get(meta["fileId"]))
+
+    def test_rejects_extension(self):
+        with self.assertRaises(ValueError):
+            self.store.open_writer("notes.txt")
+
+    def test_resolve_material_files(self):
+        """文件ID替换为本地路径，类型按原始文件名推断，本地路径原样保留"""
+        meta = self.store.save_stream(io.BytesIO(b"proposal"), "我的开题报告.docx")
+        resolved = self.store.resolve_material_files([meta["fileId"], {"fileId": meta["fileId"], "fileBizType": 4}, "/data/a.pdf"])
+        self.assertEqual(resolved[0]["fileBizType"], 1)
+        self.assertTrue(resolved[0]["filePath"].endswith(".docx"))
+        self.assertEqual(resolved[1]["fileBizType"], 4)
+        self.assertEqual(resolved[2], "/data/a.pdf")
+        with self.assertRaises(KeyError):
+            self.store.resolve_material_files(["0" * 32])
+
+
+if __name__ == "__main__":
+    unittest.main()
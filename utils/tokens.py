@@ -0,0 +1,23 @@
+import re
+
+# 中日韩字符大致一个字符一个token，其余按单词和符号计
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]')
+_WORD_PATTERN = re.compile(r'[A-Za-z0-9]+|[^\sA-Za-z0-9぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估计文本的token数，用于统计和预算，不依赖具体模型的分词器
+
+    Args:
+        text (str): 输入文本
+
+    Returns:
+        int: 估计的token数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    words = _WORD_PATTERN.findall(text)
+    # 英文单词平均约1.3个token
+    return cjk + int(sum(1.3 if w[0].isalnum() else 1 for w in words))
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from config import settings
+from file_parser import infer_file_type
+
+logger = logging.getLogger('upload_store')
+
+# 文件ID：内容sha256的前32位十六进制
+FILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# 超过该时间（秒）仍未提交的临时文件视为中断上传的残留
+STALE_PART_SECONDS = 3600
+
+
+class UploadTooLarge(Exception):
+    """上传文件超过大小限制"""
+
+
+class UploadWriter:
+    """
+    上传文件写入器
+
+    以类文件对象的形式接收数据块，边写临时文件边计算sha256并检查大小限制，
+    不在内存中缓存整个文件。可直接作为 werkzeug 解析 multipart 时的文件流。
+    """
+
+    def __init__(self, store: "UploadStore", file_name: str):
+        self.store = store
+        self.file_name = file_name
+        self.size = 0
+        self.committed = False
+        self._hash = hashlib.sha256()
+        self.tmp_path = os.path.join(store.tmp_dir, f"{uuid.uuid4().hex}.part")
+        self._file = open(self.tmp_path, 'w+b')
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.store.max_file_bytes:
+            raise UploadTooLarge(f"文件 {self.file_name} 超过大小限制 {self.store.max_file_bytes} 字节")
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def flush(self):
+        self._file.flush()
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self):
+        """关闭文件；未提交的临时文件随之删除"""
+        if not self._file.closed:
+            self._file.close()
+        if not self.committed and os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class UploadWriterSet:
+    """
+    一次请求中打开的上传写入器
+
+    multipart 解析中途出错（如文件超过大小限制）时，已打开的写入器不会出现在 request.files 中，
+    没有人关闭它们；请求结束时统一关闭，未提交的临时文件随之删除。
+    """
+
+    def __init__(self, store: "UploadStore"):
+        self.store = store
+        self.writers: List[UploadWriter] = []
+
+    def open_writer(self, file_name: str) -> UploadWriter:
+        writer = UploadWriter(self.store, file_name)
+        self.writers.append(writer)
+        return writer
+
+    def close_all(self):
+        """关闭所有写入器，删除未提交的临时文件"""
+        for writer in self.writers:
+            try:
+                writer.close()
+            except OSError as e:
+                logger.warning(f"清理上传临时文件失败 {writer.tmp_path}: {str(e)}")
+        self.writers = []
+
+
+class UploadStore:
+    """
+    按内容寻址的上传文件存储
+
+    文件保存为 <root>/<file_id><扩展名>，元数据保存为 <root>/<file_id>.json；
+    相同内容重复上传得到同一个ID，不重复占用磁盘。
+    """
+
+    def __init__(self, root: str, max_file_bytes: int, allowed_extensions: List[str]):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.max_file_bytes = max_file_bytes
+        self.allowed_extensions = [ext.lower() for ext in allowed_extensions]
+        self._lock = threading.Lock()
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._remove_stale_parts()
+
+    def _remove_stale_parts(self):
+        """清理中断上传留下的临时文件"""
+        now = time.time()
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if name.endswith('.part') and now - os.path.getmtime(path) > STALE_PART_SECONDS:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def check_extension(self, file_name: str) -> str:
+        """返回小写扩展名，不支持时抛出ValueError"""
+        ext = os.path.splitext(file_name or '')[1].lower()
+        if ext not in self.allowed_extensions:
+            raise ValueError(f"不支持的文件格式: {ext or file_name}，支持 {', '.join(self.allowed_extensions)}")
+        return ext
+
+    def open_writer(self, file_name: str) -> UploadWriter:
+        self.check_extension(file_name)
+        return UploadWriter(self, file_name)
+
+    def save_stream(self, stream: BinaryIO, file_name: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        按固定大小的块把输入流写入存储（用于请求体直接是文件内容的上传）
+
+        Args:
+            stream (BinaryIO): 输入流
+            file_name (str): 原始文件名
+            chunk_size (Optional[int]): 每次读取的字节数，默认读取配置
+
+        Returns:
+            Dict[str, Any]: 文件元数据
+        """
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+        writer = self.open_writer(file_name)
+        try:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self.commit(writer)
+        finally:
+            writer.close()
+
+    def commit(self, writer: UploadWriter) -> Dict[str, Any]:
+        """
+        把写完的临时文件移动到按内容哈希命名的位置
+
+        Returns:
+            Dict[str, Any]: 文件元数据 fileId/fileName/size/sha256
+        """
+        if writer.size == 0:
+            raise ValueError(f"文件 {writer.file_name} 为空")
+        ext = self.check_extension(writer.file_name)
+        writer.flush()
+        file_id = writer.sha256[:32]
+        meta = {
+            'fileId': file_id,
+            'fileName': os.path.basename(writer.file_name),
+            'size': writer.size,
+            'sha256': writer.sha256,
+            'ext': ext,
+        }
+        data_path = os.path.join(self.root, f"{file_id}{ext}")
+        with self._lock:
+            if os.path.exists(data_path):
+                logger.info(f"文件已存在，复用 {file_id}")
+            else:
+                os.replace(writer.tmp_path, data_path)
+            writer.committed = True
+            with open(os.path.join(self.root, f"{file_id}.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+        if os.path.exists(writer.tmp_path):
+            os.remove(writer.tmp_path)
+        return meta
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """按ID读取文件元数据（含本地路径 filePath），不存在时返回None"""
+        if not FILE_ID_PATTERN.match(file_id or ''):
+            return None
+        try:
+            with open(os.path.join(self.root, f"{file_id}.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        meta['filePath'] = os.path.join(self.root, f"{file_id}{meta['ext']}")
+        return meta if os.path.exists(meta['filePath']) else None
+
+    def resolve_material_files(self, material_files: List[Any]) -> List[Any]:
+        """
+        把 materialFiles 中的上传文件ID替换为 parse_material_files 可用的文件信息
+
+        支持文件ID字符串，或 {"fileId": ID, "fileBizType": 类型} 字典（类型缺省时按原始文件名推断）；
+        其他项（本地路径、filePath字典）原样保留。
+
+        Raises:
+            KeyError: 文件ID不存在
+        """
+        resolved = []
+        for item in material_files or []:
+            if isinstance(item, dict) and 'fileId' in item:
+                file_id, biz_type = item['fileId'], item.get('fileBizType')
+            elif isinstance(item, str) and FILE_ID_PATTERN.match(item):
+                file_id, biz_type = item, None
+            else:
+                resolved.append(item)
+                continue
+
+            meta = self.get(file_id)
+            if meta is None:
+                raise KeyError(file_id)
+            resolved.append({
+                'filePath': meta['filePath'],
+                'fileBizType': biz_type or infer_file_type(meta['fileName']),
+            })
+        return resolved
+
+
+_upload_store: Optional[UploadStore] = None
+_upload_store_lock = threading.Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """获取全局上传文件存储"""
+    global _upload_store
+    if _upload_store is None:
+        with _upload_store_lock:
+            if _upload_store is None:
+                _upload_store = UploadStore(
+                    settings.UPLOAD_DIR,
+                    settings.UPLOAD_MAX_FILE_BYTES,
+                    settings.UPLOAD_ALLOWED_EXTENSIONS
+                )
+    return _upload_store